@@ -1,9 +1,119 @@
 """The rpi_gpio_pwm component."""
 
+import logging
+
+import voluptuous as vol
+
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import (
+    CONF_ENTITY_ID,
+    CONF_HOST,
+    CONF_NAME,
+    CONF_PLATFORM,
+    CONF_PORT,
+)
+from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.exceptions import ServiceValidationError
+import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.typing import ConfigType
+
+from .connection import get_registry
+from .const import (
+    ATTR_SIZE,
+    CONF_BACKEND,
+    CONF_CURVE,
+    CONF_DEVICE,
+    CONF_FAN,
+    CONF_FREQUENCY,
+    CONF_GAMMA,
+    CONF_MAX_DUTY,
+    CONF_MAX_KELVIN,
+    CONF_MIN_DUTY,
+    CONF_MIN_KELVIN,
+    CONF_REFRESH_INTERVAL,
+    CONF_TACH_PIN,
+    CONF_TACH_PULSES,
+    DATA_CONNECTION,
+    DATA_OPTIONS,
+    DATA_PLATFORMS,
+    DATA_TACHOMETER,
+    DEFAULT_BACKEND,
+    DEFAULT_TACH_PULSES,
+    DEFAULT_TRACE_SIZE,
+    DOMAIN,
+    PLATFORMS,
+    PLATFORMS_FAN,
+    PLATFORMS_LIGHT,
+    SERVICE_START_TRACE,
+    SERVICE_STOP_TRACE,
+    SIGNAL_OPTIONS_UPDATED,
+    TRACE_FILE,
+)
+from .pins import async_get_pin_index
+from .tach import Tachometer
+from .trace import TraceRecorder
+
+_LOGGER = logging.getLogger(__name__)
+
+# Options the entities of an entry apply in place, changing any other one
+# sets the entry up again. The entity_id is renamed by the options flow.
+LIVE_OPTIONS = {
+    CONF_ENTITY_ID,
+    CONF_NAME,
+    CONF_FREQUENCY,
+    CONF_REFRESH_INTERVAL,
+    CONF_CURVE,
+    CONF_GAMMA,
+    CONF_MIN_KELVIN,
+    CONF_MAX_KELVIN,
+}
+# The duty cycle range of a light is in its curve, the one of a fan bounds
+# its controller, which is built with the entity
+LIVE_LIGHT_OPTIONS = LIVE_OPTIONS | {CONF_MIN_DUTY, CONF_MAX_DUTY}
+
+# Lights and fans are configured under their own domains in YAML
+CONFIG_SCHEMA = cv.platform_only_config_schema(DOMAIN)
 
-from .const import DOMAIN, PLATFORMS, PLATFORMS_FAN, PLATFORMS_LIGHT
+START_TRACE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_SIZE, default=DEFAULT_TRACE_SIZE): vol.All(
+            vol.Coerce(int), vol.Range(min=1000, max=10000000)
+        ),
+    }
+)
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Register the services tracing the duty cycle writes."""
+
+    async def async_start_trace(call: ServiceCall) -> None:
+        get_registry(hass).start_trace(TraceRecorder(call.data[ATTR_SIZE]))
+
+    async def async_stop_trace(call: ServiceCall) -> None:
+        recorder = get_registry(hass).stop_trace()
+        if recorder is None:
+            raise ServiceValidationError("No trace is running")
+        path = hass.config.path(TRACE_FILE)
+        await hass.async_add_executor_job(_write_trace, path, recorder.dump())
+        _LOGGER.info(
+            "Saved the last %s of %s duty cycle writes to %s",
+            min(recorder.recorded, recorder.size),
+            recorder.recorded,
+            path,
+        )
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_START_TRACE, async_start_trace, schema=START_TRACE_SCHEMA
+    )
+    hass.services.async_register(DOMAIN, SERVICE_STOP_TRACE, async_stop_trace)
+    return True
+
+
+def _write_trace(path: str, data: bytes) -> None:
+    """Write a trace file."""
+    with open(path, "wb") as file:
+        file.write(data)
 
 
 # Transform the configEntry from config_flow into an entity
@@ -13,6 +123,46 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     # Sets the default domain to be our domain
     hass.data.setdefault(DOMAIN, {})
     hass_data = dict(entry.data)
+    # The data the entities were set up with, to tell what an update changed
+    hass_data[DATA_OPTIONS] = dict(entry.data)
+
+    # Keep the pin index in step with the data of the entry, which the
+    # options flow may have changed before reloading it
+    async_get_pin_index(hass).async_set_entry(entry.entry_id, entry.data)
+
+    # Share one connection between all entries on the same host:port, or on
+    # the PWM peripheral of this machine with the sysfs backend
+    registry = get_registry(hass)
+    hass_data[DATA_CONNECTION] = await registry.async_acquire(
+        entry.data[CONF_HOST],
+        entry.data[CONF_PORT],
+        entry.data.get(CONF_BACKEND, DEFAULT_BACKEND),
+    )
+
+    # Count the pulses of the fan tachometer, read by the speed sensor. The
+    # connection may still be opening or come back later, so start counting
+    # each time it is up.
+    if entry.data.get(CONF_TACH_PIN) is not None:
+        connection = hass_data[DATA_CONNECTION]
+        tachometer = Tachometer(
+            entry.data[CONF_TACH_PIN],
+            entry.data.get(CONF_TACH_PULSES, DEFAULT_TACH_PULSES),
+        )
+
+        async def async_start_tachometer() -> None:
+            if not connection.available:
+                tachometer.forget()
+                return
+            await hass.async_add_executor_job(
+                tachometer.start, connection.factory.connection
+            )
+
+        hass_data["unsub_tachometer"] = connection.async_add_listener(
+            async_start_tachometer
+        )
+        if connection.available:
+            await async_start_tachometer()
+        hass_data[DATA_TACHOMETER] = tachometer
 
     # Registers update listener to update config entry when options are updated.
     unsub_options_update_listener = entry.add_update_listener(options_update_listener)
@@ -24,16 +174,38 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     # Propagates the configEntry to all platforms declared in the integration
     # This creates each HA object for each platform your device requires.
     if hass_data["platform"] == "fan":
-        await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS_FAN)
+        hass_data[DATA_PLATFORMS] = PLATFORMS_FAN
     if hass_data["platform"] == "light":
-        await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS_LIGHT)
+        hass_data[DATA_PLATFORMS] = PLATFORMS_LIGHT
+    # A device sets up all of its channels with this one forward
+    if hass_data["platform"] == CONF_DEVICE:
+        hass_data[DATA_PLATFORMS] = PLATFORMS
+    await hass.config_entries.async_forward_entry_setups(
+        entry, hass_data[DATA_PLATFORMS]
+    )
 
     return True
 
 
 async def options_update_listener(hass: HomeAssistant, config_entry: ConfigEntry):
-    """Handle options update."""
-    await hass.config_entries.async_reload(config_entry.entry_id)
+    """Handle options update, in place unless a pin or the host changed."""
+    entry_data = hass.data[DOMAIN][config_entry.entry_id]
+    old = entry_data[DATA_OPTIONS]
+    new = config_entry.data
+    live = LIVE_OPTIONS if new[CONF_PLATFORM] == CONF_FAN else LIVE_LIGHT_OPTIONS
+    changed = {key for key in {*old, *new} if old.get(key) != new.get(key)}
+    if not changed:
+        return
+    if changed - live:
+        _LOGGER.debug(
+            "Reloading %s to apply %s", config_entry.title, sorted(changed - live)
+        )
+        await hass.config_entries.async_reload(config_entry.entry_id)
+        return
+    entry_data[DATA_OPTIONS] = dict(new)
+    async_dispatcher_send(
+        hass, SIGNAL_OPTIONS_UPDATED.format(config_entry.entry_id), dict(new)
+    )
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
@@ -42,11 +214,25 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     # needs to unload itself, and remove callbacks. See the classes for further
     # details
 
-    unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    # Only unload the platforms the entry was forwarded to
+    unload_ok = await hass.config_entries.async_unload_platforms(
+        entry, hass.data[DOMAIN][entry.entry_id][DATA_PLATFORMS]
+    )
     if unload_ok:
         # Remove config entry from domain.
         entry_data = hass.data[DOMAIN].pop(entry.entry_id)
         # Remove options_update_listener.
         entry_data["unsub_options_update_listener"]()
+        if tachometer := entry_data.get(DATA_TACHOMETER):
+            entry_data["unsub_tachometer"]()
+            await hass.async_add_executor_job(tachometer.stop)
+        # Close the pigpiod connection if this was its last user.
+        connection = entry_data[DATA_CONNECTION]
+        await get_registry(hass).async_release(connection.host, connection.port)
 
     return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Free the pins of a removed config entry."""
+    async_get_pin_index(hass).async_remove_entry(entry.entry_id)
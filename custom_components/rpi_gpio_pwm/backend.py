@@ -0,0 +1,205 @@
+"""PWM backends for the rpi_gpio_pwm component."""
+
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+import asyncio
+from collections.abc import Awaitable, Callable
+import logging
+import time
+from typing import Any
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+
+from .cache import WriteCache
+from .stats import ConnectionStats
+from .trace import TraceRecorder
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class PwmError(Exception):
+    """Error raised by a backend writing or setting up a pin."""
+
+
+class PwmConnection(ABC):
+    """A reference-counted connection to the PWM outputs of one host.
+
+    Entities only talk to this interface, a backend decides how a duty
+    cycle reaches the pin: pigpiod over its socket, or the kernel PWM
+    sysfs interface on the machine running Home Assistant. The base class
+    owns what every backend shares: the write cache, the statistics, the
+    trace and the availability listeners.
+    """
+
+    backend = ""
+
+    def __init__(self, host: str, port: int) -> None:
+        """Initialize the connection, async_start() opens it."""
+        self.host = host
+        self.port = port
+        # The pigpio handle of the tachometer callbacks and the fade scripts,
+        # only pigpiod has one
+        self.factory = None
+        self.cache = WriteCache()
+        self.stats = ConnectionStats()
+        # Set while the writes are traced
+        self.trace: TraceRecorder | None = None
+        self.refs = 0
+        self.available = False
+        self._listeners: list[Callable[[], Awaitable[None]]] = []
+        self._started = 0.0
+        # Timing of the first connection, for diagnostics
+        self.startup: dict[str, Any] = {}
+        # pin -> last value written, replayed after a reconnect
+        self._values: dict[int, float] = {}
+        # pin -> frequency of the pins driven by the PWM peripheral
+        self._hardware_pwm: dict[int, int] = {}
+
+    async def async_set_value(self, pin: int, value: float) -> None:
+        """Set the duty cycle of a pin, value between 0 and 1."""
+        await self.async_set_values({pin: value})
+
+    async def async_set_values(self, values: dict[int, float]) -> None:
+        """Set the duty cycles of several pins in the same burst."""
+        if not values:
+            return
+        start = time.monotonic()
+        self._values.update(values)
+        if self.trace is not None:
+            self.trace.record(f"{self.host}:{self.port}", values, self._hardware_pwm)
+        # Skip the pins that already have their duty cycle
+        duties = {
+            pin: duty
+            for pin, duty in (await self._async_duties(values)).items()
+            if not self.cache.is_fresh(pin, *duty)
+        }
+        if not duties:
+            return
+        for pin, (duty, frequency) in duties.items():
+            self.cache.store(pin, duty, frequency)
+        try:
+            await self._async_write(duties)
+        except Exception:
+            self.stats.errors += 1
+            self.cache.invalidate(duties)
+            raise
+        except asyncio.CancelledError:
+            self.cache.invalidate(duties)
+            raise
+        self.stats.record(duties, time.monotonic() - start)
+
+    @abstractmethod
+    async def _async_duties(
+        self, values: dict[int, float]
+    ) -> dict[int, tuple[int, int | None]]:
+        """Return the duty cycle of each value in backend units, and its frequency."""
+
+    @abstractmethod
+    async def _async_write(self, duties: dict[int, tuple[int, int | None]]) -> None:
+        """Write duty cycles in backend units to their pins."""
+
+    @abstractmethod
+    async def async_setup_pin(self, pin: int, frequency: int) -> float | None:
+        """Set a pin up for PWM without touching its output.
+
+        Return the value the pin has, None if it is not running PWM.
+        """
+
+    @abstractmethod
+    async def async_set_frequency(self, pin: int, frequency: int) -> None:
+        """Change the PWM frequency of a pin, keeping its duty cycle."""
+
+    @property
+    @abstractmethod
+    def commands(self) -> int:
+        """Return the number of writes that reached the outputs."""
+
+    async def async_release_pin(self, pin: int) -> None:
+        """Turn a pin off and forget it, the entity driving it is going away."""
+        if self.available:
+            try:
+                await self.async_set_value(pin, 0)
+            except PwmError as err:
+                _LOGGER.debug("Cannot turn off pin %s on %s: %s", pin, self.host, err)
+        self.forget_pin(pin)
+
+    @callback
+    @abstractmethod
+    def async_start(self, hass: HomeAssistant) -> None:
+        """Open the connection in the background, so setup never waits on it."""
+
+    @abstractmethod
+    async def async_close(self, hass: HomeAssistant) -> None:
+        """Close the connection."""
+
+    async def _async_notify(self) -> None:
+        """Tell every listener that the availability changed.
+
+        The listeners run together, so the pin setup of every entity on the
+        host shares the round trips instead of queueing behind each other.
+        """
+        results = await asyncio.gather(
+            *(listener() for listener in list(self._listeners)),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                _LOGGER.error(
+                    "Error setting up a pin on %s:%s",
+                    self.host,
+                    self.port,
+                    exc_info=result,
+                )
+
+    @callback
+    def async_add_listener(
+        self, listener: Callable[[], Awaitable[None]]
+    ) -> CALLBACK_TYPE:
+        """Call listener each time the connection becomes available or is lost."""
+        self._listeners.append(listener)
+
+        @callback
+        def remove_listener() -> None:
+            self._listeners.remove(listener)
+
+        return remove_listener
+
+    def set_hardware_pwm(self, pin: int, frequency: int) -> None:
+        """Drive a pin with the PWM peripheral instead of pigpiod timing."""
+        self._hardware_pwm[pin] = frequency
+
+    def set_refresh_interval(self, pin: int, seconds: float) -> None:
+        """Set after how long an unchanged duty cycle of a pin is written anyway."""
+        self.cache.set_refresh_interval(pin, seconds)
+
+    def forget_pin(self, pin: int) -> None:
+        """Forget what is cached about a pin that was released."""
+        self._hardware_pwm.pop(pin, None)
+        self._values.pop(pin, None)
+        self.cache.forget(pin)
+
+    def as_dict(self, pins=None) -> dict[str, Any]:
+        """Return the state and statistics of the connection, for diagnostics.
+
+        With pins, only the latencies of those pins are included.
+        """
+        return {
+            "backend": self.backend,
+            "host": self.host,
+            "port": self.port,
+            "available": self.available,
+            "users": self.refs,
+            "cache_hits": self.cache.hits,
+            "cache_misses": self.cache.misses,
+            "errors": self.stats.errors,
+            "connect_failures": self.stats.connect_failures,
+            "reconnects": self.stats.reconnects,
+            "startup": self.startup,
+            "latency": self.stats.latency.as_dict(),
+            "pins": {
+                pin: histogram.as_dict()
+                for pin, histogram in sorted(self.stats.pins.items())
+                if pins is None or pin in pins
+            },
+        }
@@ -0,0 +1,62 @@
+"""Write suppression for the rpi_gpio_pwm component."""
+
+from __future__ import annotations
+
+import time
+
+from .const import DEFAULT_REFRESH_INTERVAL
+
+
+class WriteCache:
+    """Remember the last duty cycle written to each pin of one daemon.
+
+    A write of the duty cycle a pin already has is skipped, unless the pin
+    was last written more than its refresh interval ago, so something that
+    changed the pin behind our back is corrected eventually. A refresh
+    interval of 0 disables the cache for that pin.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty cache."""
+        # pin -> (duty, hardware PWM frequency or None, time of the write)
+        self._written: dict[int, tuple[int, int | None, float]] = {}
+        self._refresh: dict[int, float] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def set_refresh_interval(self, pin: int, seconds: float) -> None:
+        """Set after how long an unchanged duty cycle is written anyway."""
+        self._refresh[pin] = seconds
+
+    def is_fresh(self, pin: int, duty: int, frequency: int | None = None) -> bool:
+        """Return true if the write can be skipped, counting a hit or a miss."""
+        refresh = self._refresh.get(pin, DEFAULT_REFRESH_INTERVAL)
+        written = self._written.get(pin)
+        if (
+            refresh > 0
+            and written is not None
+            and written[:2] == (duty, frequency)
+            and time.monotonic() - written[2] < refresh
+        ):
+            self.hits += 1
+            return True
+        self.misses += 1
+        return False
+
+    def store(self, pin: int, duty: int, frequency: int | None = None) -> None:
+        """Record a duty cycle that is being written."""
+        self._written[pin] = (duty, frequency, time.monotonic())
+
+    def invalidate(self, pins) -> None:
+        """Forget the duty cycles of pins whose write may not have landed."""
+        for pin in pins:
+            self._written.pop(pin, None)
+
+    def clear(self) -> None:
+        """Forget every duty cycle, the daemon may have been restarted."""
+        self._written.clear()
+
+    def forget(self, pin: int) -> None:
+        """Forget everything about a pin that was released."""
+        self._written.pop(pin, None)
+        self._refresh.pop(pin, None)
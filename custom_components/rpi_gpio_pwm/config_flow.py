@@ -7,7 +7,12 @@ from typing import Any
 
 import voluptuous as vol
 
-from homeassistant.config_entries import ConfigEntry, ConfigFlow, ConfigFlowResult, OptionsFlow
+from homeassistant.config_entries import (
+    ConfigEntry,
+    ConfigFlow,
+    ConfigFlowResult,
+    OptionsFlow,
+)
 from homeassistant.const import (
     CONF_ENTITY_ID,
     CONF_HOST,
@@ -21,14 +26,76 @@ from homeassistant.helpers import entity_registry as er, selector
 import homeassistant.helpers.config_validation as cv
 
 from .const import (
+    BACKEND_SYSFS,
+    BACKENDS,
+    COLOR_CHANNELS,
+    COLOR_TYPE_CCT,
+    COLOR_TYPE_RGB,
+    COLOR_TYPES,
+    CONF_BACKEND,
+    CONF_BLUE_PIN,
+    CONF_CHANNELS,
+    CONF_COLD_PIN,
+    CONF_COLOR_TYPE,
+    CONF_CONTROL,
+    CONF_CURVE,
+    CONF_DAEMON_TRANSITION,
+    CONF_DEVICE,
     CONF_FAN,
+    CONF_FAN_PINS,
     CONF_FREQUENCY,
+    CONF_GAMMA,
+    CONF_GREEN_PIN,
+    CONF_HARDWARE_PWM,
+    CONF_KD,
+    CONF_KI,
+    CONF_KP,
     CONF_LIGHT,
+    CONF_LIGHT_PINS,
+    CONF_MAX_DUTY,
+    CONF_MAX_KELVIN,
+    CONF_MIN_DUTY,
+    CONF_MIN_KELVIN,
     CONF_PIN,
+    CONF_RED_PIN,
+    CONF_REFRESH_INTERVAL,
+    CONF_SLEW_RATE,
+    CONF_TACH_PIN,
+    CONF_TACH_PULSES,
+    CONF_TARGET,
+    CONF_TEMPERATURE_ENTITY,
+    CONF_WARM_PIN,
+    CONF_WHITE_PIN,
+    CONTROL_NONE,
+    CONTROL_RPM,
+    CONTROL_TEMPERATURE,
+    CONTROLS,
+    CURVES,
+    DEFAULT_BACKEND,
+    DEFAULT_CONTROL,
+    DEFAULT_CURVE,
+    DEFAULT_DAEMON_TRANSITION,
     DEFAULT_FREQUENCY,
+    DEFAULT_GAMMA,
+    DEFAULT_HARDWARE_PWM,
     DEFAULT_HOST,
+    DEFAULT_MAX_DUTY,
+    DEFAULT_MAX_KELVIN,
+    DEFAULT_MIN_DUTY,
+    DEFAULT_MIN_KELVIN,
     DEFAULT_PORT,
+    DEFAULT_REFRESH_INTERVAL,
+    DEFAULT_SLEW_RATE,
+    DEFAULT_TACH_PULSES,
     DOMAIN,
+    GPIO_PINS,
+    HARDWARE_PWM_PINS,
+)
+from .pins import (
+    async_get_pin_index,
+    entry_host,
+    entry_pins,
+    hardware_pwm_channel,
 )
 
 DATA_SCHEMA_ConfigFlowLight = vol.Schema(
@@ -38,15 +105,63 @@ DATA_SCHEMA_ConfigFlowLight = vol.Schema(
         vol.Optional(CONF_HOST, default=DEFAULT_HOST): cv.string,
         vol.Optional(CONF_PORT, default=DEFAULT_PORT): cv.port,
         vol.Optional(CONF_FREQUENCY, default=DEFAULT_FREQUENCY): cv.positive_int,
+        vol.Optional(CONF_BACKEND, default=DEFAULT_BACKEND): vol.In(BACKENDS),
+        vol.Optional(CONF_HARDWARE_PWM, default=DEFAULT_HARDWARE_PWM): cv.boolean,
+        vol.Optional(
+            CONF_REFRESH_INTERVAL, default=DEFAULT_REFRESH_INTERVAL
+        ): cv.positive_int,
+        vol.Optional(
+            CONF_DAEMON_TRANSITION, default=DEFAULT_DAEMON_TRANSITION
+        ): cv.boolean,
+        vol.Optional(CONF_CURVE, default=DEFAULT_CURVE): vol.In(CURVES),
+        vol.Optional(CONF_GAMMA, default=DEFAULT_GAMMA): vol.All(
+            vol.Coerce(float), vol.Range(min=0.1, max=5)
+        ),
+        vol.Optional(CONF_MIN_DUTY, default=DEFAULT_MIN_DUTY): vol.All(
+            vol.Coerce(float), vol.Range(min=0, max=100)
+        ),
+        vol.Optional(CONF_MAX_DUTY, default=DEFAULT_MAX_DUTY): vol.All(
+            vol.Coerce(float), vol.Range(min=0, max=100)
+        ),
     }
 )
 
+# Closed-loop speed control of a fan, gains default to the ones of the mode
+FAN_CONTROL_FIELDS = {
+    vol.Optional(CONF_CONTROL, default=DEFAULT_CONTROL): vol.In(CONTROLS),
+    vol.Optional(CONF_TARGET): vol.Coerce(float),
+    vol.Optional(CONF_TEMPERATURE_ENTITY): selector.EntitySelector(
+        selector.EntitySelectorConfig(domain="sensor", device_class="temperature")
+    ),
+    vol.Optional(CONF_KP): vol.Coerce(float),
+    vol.Optional(CONF_KI): vol.Coerce(float),
+    vol.Optional(CONF_KD): vol.Coerce(float),
+    vol.Optional(CONF_SLEW_RATE, default=DEFAULT_SLEW_RATE): vol.All(
+        vol.Coerce(float), vol.Range(min=0.1, max=100)
+    ),
+    vol.Optional(CONF_MIN_DUTY, default=DEFAULT_MIN_DUTY): vol.All(
+        vol.Coerce(float), vol.Range(min=0, max=100)
+    ),
+    vol.Optional(CONF_MAX_DUTY, default=DEFAULT_MAX_DUTY): vol.All(
+        vol.Coerce(float), vol.Range(min=0, max=100)
+    ),
+}
+
 DATA_SCHEMA_ConfigFlowFan = vol.Schema(
     {
         vol.Required(CONF_NAME): cv.string,
         vol.Required(CONF_PIN): cv.positive_int,
         vol.Optional(CONF_HOST, default=DEFAULT_HOST): cv.string,
         vol.Optional(CONF_PORT, default=DEFAULT_PORT): cv.port,
+        vol.Optional(CONF_FREQUENCY, default=DEFAULT_FREQUENCY): cv.positive_int,
+        vol.Optional(CONF_BACKEND, default=DEFAULT_BACKEND): vol.In(BACKENDS),
+        vol.Optional(CONF_HARDWARE_PWM, default=DEFAULT_HARDWARE_PWM): cv.boolean,
+        vol.Optional(
+            CONF_REFRESH_INTERVAL, default=DEFAULT_REFRESH_INTERVAL
+        ): cv.positive_int,
+        vol.Optional(CONF_TACH_PIN): cv.positive_int,
+        vol.Optional(CONF_TACH_PULSES, default=DEFAULT_TACH_PULSES): cv.positive_int,
+        **FAN_CONTROL_FIELDS,
     }
 )
 
@@ -62,6 +177,24 @@ DATA_SCHEMA_OptionFlowLight = vol.Schema(
         vol.Optional(CONF_HOST, default=DEFAULT_HOST): cv.string,
         vol.Optional(CONF_PORT, default=DEFAULT_PORT): cv.port,
         vol.Optional(CONF_FREQUENCY, default=DEFAULT_FREQUENCY): cv.positive_int,
+        vol.Optional(CONF_BACKEND, default=DEFAULT_BACKEND): vol.In(BACKENDS),
+        vol.Optional(CONF_HARDWARE_PWM, default=DEFAULT_HARDWARE_PWM): cv.boolean,
+        vol.Optional(
+            CONF_REFRESH_INTERVAL, default=DEFAULT_REFRESH_INTERVAL
+        ): cv.positive_int,
+        vol.Optional(
+            CONF_DAEMON_TRANSITION, default=DEFAULT_DAEMON_TRANSITION
+        ): cv.boolean,
+        vol.Optional(CONF_CURVE, default=DEFAULT_CURVE): vol.In(CURVES),
+        vol.Optional(CONF_GAMMA, default=DEFAULT_GAMMA): vol.All(
+            vol.Coerce(float), vol.Range(min=0.1, max=5)
+        ),
+        vol.Optional(CONF_MIN_DUTY, default=DEFAULT_MIN_DUTY): vol.All(
+            vol.Coerce(float), vol.Range(min=0, max=100)
+        ),
+        vol.Optional(CONF_MAX_DUTY, default=DEFAULT_MAX_DUTY): vol.All(
+            vol.Coerce(float), vol.Range(min=0, max=100)
+        ),
     }
 )
 
@@ -76,30 +209,265 @@ DATA_SCHEMA_OptionFlowFan = vol.Schema(
         vol.Required(CONF_PIN): cv.positive_int,
         vol.Optional(CONF_HOST, default=DEFAULT_HOST): cv.string,
         vol.Optional(CONF_PORT, default=DEFAULT_PORT): cv.port,
+        vol.Optional(CONF_FREQUENCY, default=DEFAULT_FREQUENCY): cv.positive_int,
+        vol.Optional(CONF_BACKEND, default=DEFAULT_BACKEND): vol.In(BACKENDS),
+        vol.Optional(CONF_HARDWARE_PWM, default=DEFAULT_HARDWARE_PWM): cv.boolean,
+        vol.Optional(
+            CONF_REFRESH_INTERVAL, default=DEFAULT_REFRESH_INTERVAL
+        ): cv.positive_int,
+        vol.Optional(CONF_TACH_PIN): cv.positive_int,
+        vol.Optional(CONF_TACH_PULSES, default=DEFAULT_TACH_PULSES): cv.positive_int,
+        **FAN_CONTROL_FIELDS,
+    }
+)
+
+COLOR_LIGHT_FIELDS = {
+    vol.Optional(CONF_RED_PIN): cv.positive_int,
+    vol.Optional(CONF_GREEN_PIN): cv.positive_int,
+    vol.Optional(CONF_BLUE_PIN): cv.positive_int,
+    vol.Optional(CONF_WHITE_PIN): cv.positive_int,
+    vol.Optional(CONF_COLD_PIN): cv.positive_int,
+    vol.Optional(CONF_WARM_PIN): cv.positive_int,
+    vol.Optional(CONF_HOST, default=DEFAULT_HOST): cv.string,
+    vol.Optional(CONF_PORT, default=DEFAULT_PORT): cv.port,
+    vol.Optional(CONF_FREQUENCY, default=DEFAULT_FREQUENCY): cv.positive_int,
+    vol.Optional(
+        CONF_REFRESH_INTERVAL, default=DEFAULT_REFRESH_INTERVAL
+    ): cv.positive_int,
+    vol.Optional(CONF_MIN_KELVIN, default=DEFAULT_MIN_KELVIN): cv.positive_int,
+    vol.Optional(CONF_MAX_KELVIN, default=DEFAULT_MAX_KELVIN): cv.positive_int,
+    vol.Optional(CONF_CURVE, default=DEFAULT_CURVE): vol.In(CURVES),
+    vol.Optional(CONF_GAMMA, default=DEFAULT_GAMMA): vol.All(
+        vol.Coerce(float), vol.Range(min=0.1, max=5)
+    ),
+    vol.Optional(CONF_MIN_DUTY, default=DEFAULT_MIN_DUTY): vol.All(
+        vol.Coerce(float), vol.Range(min=0, max=100)
+    ),
+    vol.Optional(CONF_MAX_DUTY, default=DEFAULT_MAX_DUTY): vol.All(
+        vol.Coerce(float), vol.Range(min=0, max=100)
+    ),
+}
+
+DATA_SCHEMA_ConfigFlowColorLight = vol.Schema(
+    {
+        vol.Required(CONF_NAME): cv.string,
+        vol.Required(CONF_COLOR_TYPE, default=COLOR_TYPE_RGB): vol.In(COLOR_TYPES),
+        **COLOR_LIGHT_FIELDS,
+    }
+)
+
+DATA_SCHEMA_OptionFlowColorLight = vol.Schema(
+    {
+        vol.Required(CONF_NAME): cv.string,
+        vol.Required(CONF_ENTITY_ID): selector.TextSelector(
+            selector.TextSelectorConfig(
+                prefix="light.", type=selector.TextSelectorType.TEXT
+            )
+        ),
+        vol.Required(CONF_COLOR_TYPE, default=COLOR_TYPE_RGB): vol.In(COLOR_TYPES),
+        **COLOR_LIGHT_FIELDS,
     }
 )
 
+# The GPIOs of the lights or the fans of a device, picked from the header
+DEVICE_PINS_SELECTOR = selector.SelectSelector(
+    selector.SelectSelectorConfig(
+        options=[str(pin) for pin in GPIO_PINS],
+        multiple=True,
+        mode=selector.SelectSelectorMode.DROPDOWN,
+    )
+)
+
+# A device drives many pins of one host, its channels share these settings
+DATA_SCHEMA_Device = vol.Schema(
+    {
+        vol.Required(CONF_NAME): cv.string,
+        vol.Optional(CONF_HOST, default=DEFAULT_HOST): cv.string,
+        vol.Optional(CONF_PORT, default=DEFAULT_PORT): cv.port,
+        vol.Optional(CONF_LIGHT_PINS, default=[]): DEVICE_PINS_SELECTOR,
+        vol.Optional(CONF_FAN_PINS, default=[]): DEVICE_PINS_SELECTOR,
+        vol.Optional(CONF_FREQUENCY, default=DEFAULT_FREQUENCY): cv.positive_int,
+        vol.Optional(
+            CONF_REFRESH_INTERVAL, default=DEFAULT_REFRESH_INTERVAL
+        ): cv.positive_int,
+        vol.Optional(
+            CONF_DAEMON_TRANSITION, default=DEFAULT_DAEMON_TRANSITION
+        ): cv.boolean,
+        vol.Optional(CONF_CURVE, default=DEFAULT_CURVE): vol.In(CURVES),
+        vol.Optional(CONF_GAMMA, default=DEFAULT_GAMMA): vol.All(
+            vol.Coerce(float), vol.Range(min=0.1, max=5)
+        ),
+        vol.Optional(CONF_MIN_DUTY, default=DEFAULT_MIN_DUTY): vol.All(
+            vol.Coerce(float), vol.Range(min=0, max=100)
+        ),
+        vol.Optional(CONF_MAX_DUTY, default=DEFAULT_MAX_DUTY): vol.All(
+            vol.Coerce(float), vol.Range(min=0, max=100)
+        ),
+    }
+)
 
-async def async_check_if_pin_is_used(hass: HomeAssistant, pin: int) -> str | None:
-    """Check if pin is free or already use by rpi_gpio_pwm component."""
 
-    # Load all already configured config_entries (in .storage/core.config_entries)
-    config_entries_data = await hass.config_entries._store.async_load()
+def entry_title(data: Mapping[str, Any]) -> str:
+    """Return the title of a config entry."""
+    pins = (
+        entry_pins(data)
+        if CONF_COLOR_TYPE in data or CONF_CHANNELS in data
+        else [data.get(CONF_PIN)]
+    )
+    return "GPIO " + ", ".join(str(pin) for pin in pins) + " PWM " + data[CONF_PLATFORM]
+
+
+def check_color_light(
+    hass: HomeAssistant, data: Mapping[str, Any], entry_id: str | None = None
+) -> dict[str, str]:
+    """Validate the pins and ranges of a color light."""
+    errors: dict[str, str] = {}
+    seen: list[int] = []
+    for key in COLOR_CHANNELS[data[CONF_COLOR_TYPE]]:
+        pin = data.get(key)
+        if pin is None:
+            errors[key] = "pin_missing"
+        elif pin in seen:
+            errors[key] = "pin_used"
+        elif not check_if_pin_is_free(hass, entry_host(data), pin, entry_id):
+            errors[key] = "pin_used"
+        seen.append(pin)
+    if (
+        data[CONF_COLOR_TYPE] == COLOR_TYPE_CCT
+        and data[CONF_MIN_KELVIN] >= data[CONF_MAX_KELVIN]
+    ):
+        errors[CONF_MIN_KELVIN] = "kelvin_range"
+    if data[CONF_MIN_DUTY] >= data[CONF_MAX_DUTY]:
+        errors[CONF_MIN_DUTY] = "duty_range"
+    return errors
+
+
+def check_device(
+    hass: HomeAssistant, data: Mapping[str, Any], entry_id: str | None = None
+) -> dict[str, str]:
+    """Validate the pins and ranges of a device."""
+    errors: dict[str, str] = {}
+    if not data[CONF_LIGHT_PINS] and not data[CONF_FAN_PINS]:
+        errors["base"] = "channels_missing"
+    for key in (CONF_LIGHT_PINS, CONF_FAN_PINS):
+        if not all(
+            check_if_pin_is_free(hass, entry_host(data), int(pin), entry_id)
+            for pin in data[key]
+        ):
+            errors[key] = "pin_used"
+    if set(data[CONF_LIGHT_PINS]) & set(data[CONF_FAN_PINS]):
+        errors[CONF_FAN_PINS] = "pin_used"
+    if data[CONF_MIN_DUTY] >= data[CONF_MAX_DUTY]:
+        errors[CONF_MIN_DUTY] = "duty_range"
+    return errors
+
+
+def device_channels(
+    data: Mapping[str, Any], channels: list[dict[str, Any]] | None = None
+) -> list[dict[str, Any]]:
+    """Return the channels of a device from the pins picked on its form.
+
+    A channel keeping its pin and platform keeps its name from channels.
+    """
+    names = {
+        (channel[CONF_PIN], channel[CONF_PLATFORM]): channel[CONF_NAME]
+        for channel in channels or []
+    }
+    return [
+        {
+            CONF_PIN: pin,
+            CONF_PLATFORM: platform,
+            CONF_NAME: names.get((pin, platform), f"{data[CONF_NAME]} GPIO {pin}"),
+        }
+        for platform, key in ((CONF_LIGHT, CONF_LIGHT_PINS), (CONF_FAN, CONF_FAN_PINS))
+        for pin in sorted(int(pin) for pin in data[key])
+    ]
+
+
+def device_form_pins(channels: list[dict[str, Any]]) -> dict[str, list[str]]:
+    """Return the pins of the channels of a device as picked on its form."""
+    return {
+        key: [
+            str(channel[CONF_PIN])
+            for channel in channels
+            if channel[CONF_PLATFORM] == platform
+        ]
+        for platform, key in ((CONF_LIGHT, CONF_LIGHT_PINS), (CONF_FAN, CONF_FAN_PINS))
+    }
 
-    # Create a list of pins already in use
-    pin_list = []
-    for i in config_entries_data:
-        if i == "entries":
-            for j in config_entries_data[i]:
-                if j.get("domain") == DOMAIN:
-                    for k in j:
-                        if k == "data":
-                            pin_list.extend([j[k].get(CONF_PIN)])
 
-    # Return True if pin is free, else False
-    if pin in pin_list:
-        return False
-    return True
+def check_tach_pin(
+    hass: HomeAssistant, data: Mapping[str, Any], entry_id: str | None = None
+) -> dict[str, str]:
+    """Validate the tachometer pin of a fan."""
+    tach_pin = data.get(CONF_TACH_PIN)
+    if tach_pin is None:
+        return {}
+    if tach_pin == data[CONF_PIN] or not check_if_pin_is_free(
+        hass, entry_host(data), tach_pin, entry_id
+    ):
+        return {CONF_TACH_PIN: "pin_used"}
+    return {}
+
+
+def check_pwm_channel(
+    hass: HomeAssistant, data: Mapping[str, Any], entry_id: str | None = None
+) -> dict[str, str]:
+    """Validate that no other entry drives the PWM channel of a hardware PWM pin."""
+    channel = hardware_pwm_channel(data)
+    if channel is None:
+        return {}
+    if not async_get_pin_index(hass).is_channel_free(
+        entry_host(data), channel, entry_id
+    ):
+        return {CONF_PIN: "pwm_channel_used"}
+    return {}
+
+
+def check_backend(data: Mapping[str, Any]) -> dict[str, str]:
+    """Validate a pin driven through the kernel PWM sysfs interface."""
+    errors: dict[str, str] = {}
+    if data.get(CONF_BACKEND, DEFAULT_BACKEND) != BACKEND_SYSFS:
+        return errors
+    if not data.get(CONF_HARDWARE_PWM):
+        errors[CONF_HARDWARE_PWM] = "sysfs_hardware_pwm"
+    if data.get(CONF_TACH_PIN) is not None:
+        errors[CONF_TACH_PIN] = "sysfs_tach"
+    return errors
+
+
+def check_fan_control(data: Mapping[str, Any]) -> dict[str, str]:
+    """Validate the closed-loop control settings of a fan."""
+    errors: dict[str, str] = {}
+    control = data.get(CONF_CONTROL, DEFAULT_CONTROL)
+    if control == CONTROL_NONE:
+        return errors
+    if data.get(CONF_TARGET) is None:
+        errors[CONF_TARGET] = "control_target"
+    if control == CONTROL_RPM and data.get(CONF_TACH_PIN) is None:
+        errors[CONF_CONTROL] = "control_tach"
+    if control == CONTROL_TEMPERATURE and not data.get(CONF_TEMPERATURE_ENTITY):
+        errors[CONF_TEMPERATURE_ENTITY] = "control_entity"
+    return errors
+
+
+def check_if_pin_is_free(
+    hass: HomeAssistant, host: str, pin: int, entry_id: str | None = None
+) -> bool:
+    """Check if a pin of a host is free or already used by the entry being edited."""
+    return async_get_pin_index(hass).is_free(host, pin, entry_id)
+
+
+def free_pins_placeholders(hass: HomeAssistant) -> dict[str, str]:
+    """Return the free pins of every known host, to show them on the form."""
+    index = async_get_pin_index(hass)
+    hosts = sorted({*index.hosts, DEFAULT_HOST})
+    return {
+        "free_pins": "; ".join(
+            host + ": " + ", ".join(str(pin) for pin in index.free_pins(host))
+            for host in hosts
+        )
+    }
 
 
 async def async_get_entity_id_by_unique_id(
@@ -161,10 +529,12 @@ class GPIOPWMConfigFlow(ConfigFlow, domain=DOMAIN):
         """Invoke when a user initiates a flow via the user interface."""
         return self.async_show_menu(
             step_id="user",
-            menu_options=["light", "fan"],
+            menu_options=["light", "color_light", "fan", "device"],
         )
 
-    async def async_step_light(self, user_input: dict | None = None) -> ConfigFlowResult:
+    async def async_step_light(
+        self, user_input: dict | None = None
+    ) -> ConfigFlowResult:
         """Invoke when a user initiates a flow via the user interface."""
         errors: dict[str, str] = {}
 
@@ -175,11 +545,19 @@ class GPIOPWMConfigFlow(ConfigFlow, domain=DOMAIN):
             self.data[CONF_PLATFORM] = CONF_LIGHT
 
             # Check if selected pin is free
-            pin_is_free = await async_check_if_pin_is_used(
-                hass=self.hass, pin=self.data[CONF_PIN]
-            )
-            if pin_is_free is False:
+            if not check_if_pin_is_free(
+                self.hass, entry_host(self.data), self.data[CONF_PIN]
+            ):
                 errors[CONF_PIN] = "pin_used"
+            if (
+                self.data[CONF_HARDWARE_PWM]
+                and self.data[CONF_PIN] not in HARDWARE_PWM_PINS
+            ):
+                errors[CONF_PIN] = "hardware_pwm_pin"
+            if self.data[CONF_MIN_DUTY] >= self.data[CONF_MAX_DUTY]:
+                errors[CONF_MIN_DUTY] = "duty_range"
+            errors.update(check_pwm_channel(self.hass, self.data))
+            errors.update(check_backend(self.data))
 
             if not errors:
                 # Create the entity
@@ -190,7 +568,39 @@ class GPIOPWMConfigFlow(ConfigFlow, domain=DOMAIN):
 
         # Menu to display
         return self.async_show_form(
-            step_id="light", data_schema=DATA_SCHEMA_ConfigFlowLight, errors=errors
+            step_id="light",
+            data_schema=DATA_SCHEMA_ConfigFlowLight,
+            errors=errors,
+            description_placeholders=free_pins_placeholders(self.hass),
+        )
+
+    async def async_step_color_light(
+        self, user_input: dict | None = None
+    ) -> ConfigFlowResult:
+        """Invoke when a user initiates a flow via the user interface."""
+        errors: dict[str, str] = {}
+
+        if user_input is not None:
+            # Memorizes the information entered in user_input
+            self.data = user_input
+            # Color lights are lights driving several pins
+            self.data[CONF_PLATFORM] = CONF_LIGHT
+
+            errors = check_color_light(hass=self.hass, data=self.data)
+
+            if not errors:
+                # Create the entity
+                return self.async_create_entry(
+                    title=entry_title(self.data),
+                    data=self.data,
+                )
+
+        # Menu to display
+        return self.async_show_form(
+            step_id="color_light",
+            data_schema=DATA_SCHEMA_ConfigFlowColorLight,
+            errors=errors,
+            description_placeholders=free_pins_placeholders(self.hass),
         )
 
     async def async_step_fan(self, user_input: dict | None = None) -> ConfigFlowResult:
@@ -204,11 +614,21 @@ class GPIOPWMConfigFlow(ConfigFlow, domain=DOMAIN):
             self.data[CONF_PLATFORM] = CONF_FAN
 
             # Check if selected pin is free
-            pin_is_free = await async_check_if_pin_is_used(
-                hass=self.hass, pin=self.data[CONF_PIN]
-            )
-            if pin_is_free is False:
+            if not check_if_pin_is_free(
+                self.hass, entry_host(self.data), self.data[CONF_PIN]
+            ):
                 errors[CONF_PIN] = "pin_used"
+            if (
+                self.data[CONF_HARDWARE_PWM]
+                and self.data[CONF_PIN] not in HARDWARE_PWM_PINS
+            ):
+                errors[CONF_PIN] = "hardware_pwm_pin"
+            if self.data[CONF_MIN_DUTY] >= self.data[CONF_MAX_DUTY]:
+                errors[CONF_MIN_DUTY] = "duty_range"
+            errors.update(check_tach_pin(hass=self.hass, data=self.data))
+            errors.update(check_pwm_channel(self.hass, self.data))
+            errors.update(check_backend(self.data))
+            errors.update(check_fan_control(self.data))
 
             if not errors:
                 # Create the entity
@@ -219,7 +639,44 @@ class GPIOPWMConfigFlow(ConfigFlow, domain=DOMAIN):
 
         # Menu to display
         return self.async_show_form(
-            step_id="fan", data_schema=DATA_SCHEMA_ConfigFlowFan, errors=errors
+            step_id="fan",
+            data_schema=DATA_SCHEMA_ConfigFlowFan,
+            errors=errors,
+            description_placeholders=free_pins_placeholders(self.hass),
+        )
+
+    async def async_step_device(
+        self, user_input: dict | None = None
+    ) -> ConfigFlowResult:
+        """Invoke when a user initiates a flow via the user interface."""
+        errors: dict[str, str] = {}
+
+        if user_input is not None:
+            errors = check_device(hass=self.hass, data=user_input)
+
+            if not errors:
+                # The pins picked on the form become one channel each
+                self.data = {
+                    key: value
+                    for key, value in user_input.items()
+                    if key not in (CONF_LIGHT_PINS, CONF_FAN_PINS)
+                }
+                self.data[CONF_PLATFORM] = CONF_DEVICE
+                self.data[CONF_CHANNELS] = device_channels(user_input)
+                # Create the entities
+                return self.async_create_entry(
+                    title=entry_title(self.data),
+                    data=self.data,
+                )
+
+        # Menu to display
+        return self.async_show_form(
+            step_id="device",
+            data_schema=add_suggested_values_to_schema(
+                data_schema=DATA_SCHEMA_Device, suggested_values=user_input or {}
+            ),
+            errors=errors,
+            description_placeholders=free_pins_placeholders(self.hass),
         )
 
     # Declare optionFlow
@@ -244,6 +701,8 @@ class GPIOPWMOptionsFlow(OptionsFlow):
 
     async def async_step_init(self, user_input: dict | None = None) -> FlowResult:
         """Manage the options. Same option as configflow."""
+        if CONF_CHANNELS in self.config_entry.data:
+            return await self.async_step_device(user_input)
         errors: dict[str, str] = {}
 
         # Stock OLD entity_id and add it to data for show it in config suggested_values in case it need to change
@@ -258,20 +717,48 @@ class GPIOPWMOptionsFlow(OptionsFlow):
         )
         self.data.update({CONF_ENTITY_ID: entity_id_old})
 
-        # Stock OLD pin in case it don't change
-        pin_old = self.config_entry.data.get(CONF_PIN)
+        is_color_light = CONF_COLOR_TYPE in self.config_entry.data
 
         if user_input is not None:
             # Memorizes the information entered in user_input
             self.data.update(user_input)
 
-            # Check if the pin changes and check if it is free if it is
-            if pin_old != self.data[CONF_PIN]:
-                pin_is_free = await async_check_if_pin_is_used(
-                    hass=self.hass, pin=self.data[CONF_PIN]
+            if is_color_light:
+                errors = check_color_light(
+                    hass=self.hass,
+                    data=self.data,
+                    entry_id=self.config_entry.entry_id,
+                )
+            # Check if the pin is free, the pins of this entry are
+            elif not check_if_pin_is_free(
+                self.hass,
+                entry_host(self.data),
+                self.data[CONF_PIN],
+                self.config_entry.entry_id,
+            ):
+                errors[CONF_PIN] = "pin_used"
+            if not is_color_light:
+                if (
+                    self.data.get(CONF_HARDWARE_PWM)
+                    and self.data[CONF_PIN] not in HARDWARE_PWM_PINS
+                ):
+                    errors[CONF_PIN] = "hardware_pwm_pin"
+                if self.data.get(CONF_MIN_DUTY, DEFAULT_MIN_DUTY) >= self.data.get(
+                    CONF_MAX_DUTY, DEFAULT_MAX_DUTY
+                ):
+                    errors[CONF_MIN_DUTY] = "duty_range"
+                errors.update(
+                    check_tach_pin(
+                        hass=self.hass,
+                        data=self.data,
+                        entry_id=self.config_entry.entry_id,
+                    )
                 )
-                if pin_is_free is False:
-                    errors[CONF_PIN] = "pin_used"
+                errors.update(
+                    check_pwm_channel(self.hass, self.data, self.config_entry.entry_id)
+                )
+                errors.update(check_backend(self.data))
+                errors.update(check_fan_control(self.data))
 
             # Check format for Entity_ID
             if self.config_entry.data[CONF_PLATFORM] == CONF_LIGHT:
@@ -285,17 +772,13 @@ class GPIOPWMOptionsFlow(OptionsFlow):
 
             if not errors:
                 # Update the entity
-                if self.config_entry.data[CONF_PLATFORM] == CONF_LIGHT:
-                    TITLE = "GPIO " + str(self.data[CONF_PIN]) + " PWM " + CONF_LIGHT
-                elif self.config_entry.data[CONF_PLATFORM] == CONF_FAN:
-                    TITLE = "GPIO " + str(self.data[CONF_PIN]) + " PWM " + CONF_FAN
+                TITLE = entry_title(self.data)
+                # The update listener applies the options, in place if it can
                 self.hass.config_entries.async_update_entry(
                     self.config_entry,
                     title=TITLE,
                     data=self.data,
                 )
-                # Reload the entry
-                await self.hass.config_entries.async_reload(self.config_entry.entry_id)
 
                 # Updates the entity_id if it changes
                 if entity_id_old != self.data[CONF_ENTITY_ID]:
@@ -315,6 +798,16 @@ class GPIOPWMOptionsFlow(OptionsFlow):
                 return self.async_create_entry(title=None, data=None)
 
         # Menu to display
+        if is_color_light:
+            return self.async_show_form(
+                step_id="init",
+                data_schema=add_suggested_values_to_schema(
+                    data_schema=DATA_SCHEMA_OptionFlowColorLight,
+                    suggested_values=self.data,
+                ),
+                errors=errors,
+                description_placeholders=free_pins_placeholders(self.hass),
+            )
         if self.data[CONF_PLATFORM] == CONF_LIGHT:
             return self.async_show_form(
                 step_id="init",
@@ -323,6 +816,7 @@ class GPIOPWMOptionsFlow(OptionsFlow):
                     suggested_values=self.data,
                 ),
                 errors=errors,
+                description_placeholders=free_pins_placeholders(self.hass),
             )
         elif self.data[CONF_PLATFORM] == CONF_FAN:
             return self.async_show_form(
@@ -332,8 +826,49 @@ class GPIOPWMOptionsFlow(OptionsFlow):
                     suggested_values=self.data,
                 ),
                 errors=errors,
+                description_placeholders=free_pins_placeholders(self.hass),
+            )
+
+    async def async_step_device(self, user_input: dict | None = None) -> FlowResult:
+        """Manage the channels and settings of a device."""
+        errors: dict[str, str] = {}
+        channels = self.config_entry.data[CONF_CHANNELS]
+
+        if user_input is not None:
+            form = {**self.data, **user_input}
+            errors = check_device(
+                hass=self.hass, data=form, entry_id=self.config_entry.entry_id
             )
 
+            if not errors:
+                # Channels are renamed in the entity settings, keep their names
+                self.data = {
+                    key: value
+                    for key, value in form.items()
+                    if key not in (CONF_LIGHT_PINS, CONF_FAN_PINS)
+                }
+                self.data[CONF_CHANNELS] = device_channels(form, channels)
+                # The update listener applies the options, in place if it can
+                self.hass.config_entries.async_update_entry(
+                    self.config_entry,
+                    title=entry_title(self.data),
+                    data=self.data,
+                )
+                # We do nothing in the options object in the configEntry
+                return self.async_create_entry(title=None, data=None)
+
+        # Menu to display
+        return self.async_show_form(
+            step_id="device",
+            data_schema=add_suggested_values_to_schema(
+                data_schema=DATA_SCHEMA_Device,
+                suggested_values={**self.data, **device_form_pins(channels)}
+                | (user_input or {}),
+            ),
+            errors=errors,
+            description_placeholders=free_pins_placeholders(self.hass),
+        )
+
     async def notify_update_entity_id(
         self, entity_id_OLD: str, entity_id_NEW: str
     ) -> None:
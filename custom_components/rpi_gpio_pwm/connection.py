@@ -0,0 +1,381 @@
+"""Shared pigpiod connections for the rpi_gpio_pwm component."""
+
+from __future__ import annotations
+
+import asyncio
+from functools import partial
+import logging
+import time
+from typing import Any
+
+from gpiozero.pins.pigpio import PiGPIOFactory
+
+from homeassistant.core import HomeAssistant, callback
+
+from .backend import PwmConnection
+from .const import BACKEND_PIGPIOD, BACKEND_SYSFS, DATA_CONNECTIONS, DOMAIN
+from .pigpiod import (
+    CMD_GDC,
+    CMD_PFG,
+    CMD_PRG,
+    HARDWARE_PWM_RANGE,
+    PigpiodClient,
+    PigpiodError,
+)
+from .sysfs import LOCAL_HOST, LOCAL_PORT, SysfsPwmConnection
+from .trace import TraceRecorder
+from .writer import WriteScheduler
+
+_LOGGER = logging.getLogger(__name__)
+
+# Seconds between two checks that the daemon still answers
+HEARTBEAT_INTERVAL = 10
+# Bounds of the exponential backoff between two connection attempts
+RECONNECT_MIN_DELAY = 1
+RECONNECT_MAX_DELAY = 60
+# Seconds one attempt to open a daemon may take, the other hosts never wait
+CONNECT_TIMEOUT = 10
+
+
+class PigpioConnection(PwmConnection):
+    """A reference-counted connection to one pigpiod daemon.
+
+    PWM pins are set up and written through the asyncio client, so they
+    never block an executor thread. The gpiozero factory holds the pigpio
+    handle of the tachometer callbacks and the fade scripts.
+
+    A supervisor task started by async_start() opens the connection, checks
+    with a heartbeat that the daemon still answers and reopens it with an
+    exponential backoff when it does not. Listeners hear about every change
+    of availability, so entities set their pins up again on a restarted
+    daemon, and the last duty cycle of every pin is replayed in one burst.
+    """
+
+    backend = BACKEND_PIGPIOD
+
+    def __init__(self, host: str, port: int) -> None:
+        """Initialize the connection, async_start() opens it."""
+        super().__init__(host, port)
+        self.factory: PiGPIOFactory | None = None
+        self.client = PigpiodClient(host, port)
+        self.writer = WriteScheduler(self.client)
+        self._connect_task: asyncio.Task | None = None
+        self._pwm_ranges: dict[int, int] = {}
+
+    async def _async_duties(
+        self, values: dict[int, float]
+    ) -> dict[int, tuple[int, int | None]]:
+        """Return the duty cycle of each value in units of the pin's PWM range."""
+        for pin in values:
+            if pin not in self._hardware_pwm and pin not in self._pwm_ranges:
+                self._pwm_ranges[pin] = await self.client.async_get_pwm_range(pin)
+        return {
+            pin: (round(value * HARDWARE_PWM_RANGE), self._hardware_pwm[pin])
+            if pin in self._hardware_pwm
+            else (round(value * self._pwm_ranges[pin]), None)
+            for pin, value in values.items()
+        }
+
+    async def _async_write(self, duties: dict[int, tuple[int, int | None]]) -> None:
+        """Queue duty cycles for the next burst and wait for its acknowledgment."""
+        flushed = [
+            self.writer.queue(pin, duty, frequency)
+            for pin, (duty, frequency) in duties.items()
+        ]
+        # Each write has its own future, resolved together with the burst
+        await asyncio.shield(asyncio.gather(*flushed))
+
+    async def async_setup_pin(self, pin: int, frequency: int) -> float | None:
+        """Set a pin up for PWM without touching its output.
+
+        Return the value the pin has, None if pigpiod is not running PWM on
+        it. The duty cycle read back goes into the write cache, so writing
+        the value a pin already has, say restored after a restart of Home
+        Assistant, is skipped and the output never flickers.
+        """
+        if pin in self._hardware_pwm:
+            frequency = self._hardware_pwm[pin]
+        results = await asyncio.gather(
+            *(
+                self.client.async_wait(self.client.send(cmd, pin))
+                for cmd in (CMD_PFG, CMD_PRG, CMD_GDC)
+            ),
+            return_exceptions=True,
+        )
+        # A pin that is not running PWM fails to return its duty cycle
+        if isinstance(results[0], Exception):
+            raise results[0]
+        current, pwm_range, duty = results
+        if pin in self._hardware_pwm:
+            if isinstance(duty, Exception):
+                return None
+            # A write at another frequency sets the one configured
+            if current == frequency:
+                self.cache.store(pin, duty, frequency)
+            return duty / HARDWARE_PWM_RANGE
+        if isinstance(pwm_range, Exception):
+            raise pwm_range
+        self._pwm_ranges[pin] = pwm_range
+        if current != frequency:
+            await self.client.async_set_pwm_frequency(pin, frequency)
+        if isinstance(duty, Exception):
+            return None
+        self.cache.store(pin, duty)
+        return duty / pwm_range
+
+    async def async_set_frequency(self, pin: int, frequency: int) -> None:
+        """Change the PWM frequency of a pin, keeping its duty cycle."""
+        if pin in self._hardware_pwm:
+            self.set_hardware_pwm(pin, frequency)
+            if self.available and pin in self._values:
+                await self.async_set_value(pin, self._values[pin])
+        elif self.available:
+            await self.client.async_set_pwm_frequency(pin, frequency)
+
+    @property
+    def commands(self) -> int:
+        """Return the number of commands sent to the daemon."""
+        return self.writer.sent
+
+    async def _async_open(self, hass: HomeAssistant) -> None:
+        """Open the factory and the client together."""
+        factory = hass.async_add_executor_job(
+            partial(PiGPIOFactory, host=self.host, port=self.port)
+        )
+        try:
+            # The executor job runs on after a timeout, shielded or not
+            _, self.factory = await asyncio.gather(
+                self.client.async_connect(), asyncio.shield(factory)
+            )
+        except BaseException:
+            factory.add_done_callback(partial(_close_late_factory, hass))
+            raise
+
+    async def _async_teardown(self, hass: HomeAssistant) -> None:
+        """Drop a connection that was lost, the daemon may have restarted."""
+        await self.client.async_close()
+        if self.factory is not None:
+            factory, self.factory = self.factory, None
+            try:
+                await hass.async_add_executor_job(factory.close)
+            except Exception:  # noqa: BLE001
+                _LOGGER.debug("Error closing the lost factory of %s", self.host)
+        # A restarted daemon has the default PWM range and duty cycles again
+        self._pwm_ranges.clear()
+        self.cache.clear()
+
+    async def _async_heartbeat(self) -> None:
+        """Return once the socket is lost or the daemon stops answering."""
+        lost = asyncio.ensure_future(self.client.async_wait_lost())
+        try:
+            while True:
+                done, _ = await asyncio.wait([lost], timeout=HEARTBEAT_INTERVAL)
+                if done:
+                    err = lost.result()
+                    break
+                try:
+                    await self.client.async_get_version()
+                except PigpiodError as heartbeat_err:
+                    err = heartbeat_err
+                    break
+        finally:
+            lost.cancel()
+        _LOGGER.warning(
+            "Lost pigpiod on %s:%s, reconnecting: %s", self.host, self.port, err
+        )
+
+    async def _async_supervise(self, hass: HomeAssistant) -> None:
+        """Keep the connection open for as long as it is in use."""
+        delay = RECONNECT_MIN_DELAY
+        connected_before = False
+        attempts = 0
+        while True:
+            attempts += 1
+            start = time.monotonic()
+            try:
+                await asyncio.wait_for(self._async_open(hass), CONNECT_TIMEOUT)
+            except (OSError, PigpiodError, asyncio.TimeoutError) as err:
+                _LOGGER.warning(
+                    "Cannot connect to pigpiod on %s:%s, retrying in %s s: %s",
+                    self.host,
+                    self.port,
+                    delay,
+                    err,
+                )
+                self.stats.connect_failures += 1
+                await self._async_teardown(hass)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, RECONNECT_MAX_DELAY)
+                continue
+            delay = RECONNECT_MIN_DELAY
+            if connected_before:
+                self.stats.reconnects += 1
+            _LOGGER.debug("Connected to pigpiod on %s:%s", self.host, self.port)
+            self.available = True
+            connected = time.monotonic()
+            # Listeners set their pins up, then every pin gets its value back
+            await self._async_notify()
+            set_up = time.monotonic()
+            try:
+                await self.async_set_values(dict(self._values))
+            except PigpiodError as err:
+                _LOGGER.warning(
+                    "Cannot restore the pins of pigpiod on %s:%s: %s",
+                    self.host,
+                    self.port,
+                    err,
+                )
+            if not connected_before:
+                self._record_startup(attempts, start, connected, set_up)
+            connected_before = True
+            await self._async_heartbeat()
+            self.available = False
+            await self._async_teardown(hass)
+            await self._async_notify()
+
+    def _record_startup(
+        self, attempts: int, start: float, connected: float, set_up: float
+    ) -> None:
+        """Record and log how long the first connection took, step by step."""
+        done = time.monotonic()
+        self.startup = {
+            "attempts": attempts,
+            "waited_ms": round((start - self._started) * 1000, 3),
+            "connect_ms": round((connected - start) * 1000, 3),
+            "pin_setup_ms": round((set_up - connected) * 1000, 3),
+            "restore_ms": round((done - set_up) * 1000, 3),
+            "available_ms": round((done - self._started) * 1000, 3),
+            "listeners": len(self._listeners),
+        }
+        _LOGGER.debug(
+            "pigpiod on %s:%s available after %s ms: %s",
+            self.host,
+            self.port,
+            self.startup["available_ms"],
+            self.startup,
+        )
+
+    @callback
+    def async_start(self, hass: HomeAssistant) -> None:
+        """Connect in the background, so setup never waits on the daemon."""
+        self._started = time.monotonic()
+        self._connect_task = hass.async_create_background_task(
+            self._async_supervise(hass),
+            f"rpi_gpio_pwm connect {self.host}:{self.port}",
+        )
+
+    def forget_pin(self, pin: int) -> None:
+        """Forget what is cached about a pin that was released."""
+        super().forget_pin(pin)
+        self._pwm_ranges.pop(pin, None)
+
+    def as_dict(self, pins=None) -> dict[str, Any]:
+        """Return the state and statistics of the connection, for diagnostics.
+
+        With pins, only the latencies of those pins are included.
+        """
+        return super().as_dict(pins) | {
+            "writes": self.writer.writes,
+            "coalesced": self.writer.coalesced,
+            "commands": self.writer.sent,
+            "bursts": self.writer.bursts,
+        }
+
+    async def async_close(self, hass: HomeAssistant) -> None:
+        """Close the connection to the daemon."""
+        if self._connect_task is not None and not self._connect_task.done():
+            self._connect_task.cancel()
+        self.available = False
+        await self.client.async_close()
+        if self.factory is not None:
+            await hass.async_add_executor_job(self.factory.close)
+
+
+class ConnectionRegistry:
+    """Hand out one shared connection per (host, port).
+
+    The sysfs backend drives the machine Home Assistant runs on, its one
+    connection is localhost with port 0.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize an empty registry."""
+        self._hass = hass
+        self._connections: dict[tuple[str, int], PwmConnection] = {}
+        self._lock = asyncio.Lock()
+        self.trace: TraceRecorder | None = None
+
+    async def async_acquire(
+        self, host: str, port: int, backend: str = BACKEND_PIGPIOD
+    ) -> PwmConnection:
+        """Return the connection for host:port, opening it in the background."""
+        if backend == BACKEND_SYSFS:
+            host, port = LOCAL_HOST, LOCAL_PORT
+        async with self._lock:
+            connection = self._connections.get((host, port))
+            if connection is None:
+                _LOGGER.debug("Opening %s connection to %s:%s", backend, host, port)
+                connection = (
+                    SysfsPwmConnection()
+                    if backend == BACKEND_SYSFS
+                    else PigpioConnection(host, port)
+                )
+                connection.trace = self.trace
+                connection.async_start(self._hass)
+                self._connections[(host, port)] = connection
+            connection.refs += 1
+            _LOGGER.debug(
+                "Connection to %s:%s now has %s user(s)",
+                host,
+                port,
+                connection.refs,
+            )
+            return connection
+
+    async def async_release(self, host: str, port: int) -> None:
+        """Drop one reference and close the connection with the last one."""
+        async with self._lock:
+            connection = self._connections.get((host, port))
+            if connection is None:
+                return
+            connection.refs -= 1
+            if connection.refs > 0:
+                return
+            del self._connections[(host, port)]
+            _LOGGER.debug("Closing connection to %s:%s", host, port)
+            await connection.async_close(self._hass)
+
+    def start_trace(self, recorder: TraceRecorder) -> None:
+        """Trace the writes to every daemon, those connected later included."""
+        self.trace = recorder
+        for connection in self._connections.values():
+            connection.trace = recorder
+
+    def stop_trace(self) -> TraceRecorder | None:
+        """Stop tracing and return the trace, None if none was running."""
+        recorder, self.trace = self.trace, None
+        for connection in self._connections.values():
+            connection.trace = None
+        return recorder
+
+    @property
+    def counts(self) -> dict[str, int]:
+        """Return the number of users of each open connection."""
+        return {
+            f"{host}:{port}": connection.refs
+            for (host, port), connection in self._connections.items()
+        }
+
+
+def _close_late_factory(hass: HomeAssistant, factory: asyncio.Future) -> None:
+    """Close a factory that opened after its connection attempt was given up."""
+    if not factory.cancelled() and factory.exception() is None:
+        hass.async_add_executor_job(factory.result().close)
+
+
+def get_registry(hass: HomeAssistant) -> ConnectionRegistry:
+    """Return the connection registry, creating it on first use."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if DATA_CONNECTIONS not in domain_data:
+        domain_data[DATA_CONNECTIONS] = ConnectionRegistry(hass)
+    return domain_data[DATA_CONNECTIONS]
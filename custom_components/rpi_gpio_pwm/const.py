@@ -2,29 +2,150 @@
 
 from homeassistant.const import Platform
 
+ATTR_SIZE = "size"
+
+BACKEND_PIGPIOD = "pigpiod"
+BACKEND_SYSFS = "sysfs"
+BACKENDS = [BACKEND_PIGPIOD, BACKEND_SYSFS]
+
+
+CONF_BACKEND = "backend"
+CONF_BLUE_PIN = "blue_pin"
+CONF_CHANNELS = "channels"
+CONF_COLD_PIN = "cold_pin"
+CONF_COLOR_LIGHT = "color_light"
+CONF_COLOR_TYPE = "color_type"
+CONF_CONTROL = "control"
+CONF_CURVE = "curve"
+CONF_DAEMON_TRANSITION = "daemon_transition"
+CONF_DEVICE = "device"
 CONF_FANS = "fans"
 CONF_FAN = "fan"
+CONF_FAN_PINS = "fan_pins"
 CONF_FREQUENCY = "frequency"
+CONF_GAMMA = "gamma"
+CONF_GREEN_PIN = "green_pin"
+CONF_GROUPS = "groups"
+CONF_HARDWARE_PWM = "hardware_pwm"
+CONF_KD = "kd"
+CONF_KI = "ki"
+CONF_KP = "kp"
 CONF_LEDS = "leds"
 CONF_LIGHT = "light"
+CONF_LIGHT_PINS = "light_pins"
+CONF_MAX_DUTY = "max_duty"
+CONF_MAX_KELVIN = "max_kelvin"
+CONF_MEMBERS = "members"
+CONF_MIN_DUTY = "min_duty"
+CONF_MIN_KELVIN = "min_kelvin"
+CONF_OFFSET = "offset"
 CONF_PIN = "pin"
+CONF_RED_PIN = "red_pin"
+CONF_REFRESH_INTERVAL = "refresh_interval"
+CONF_SCALE = "scale"
+CONF_SLEW_RATE = "slew_rate"
+CONF_TACH_PIN = "tach_pin"
+CONF_TACH_PULSES = "tach_pulses"
+CONF_TARGET = "target"
+CONF_TEMPERATURE_ENTITY = "temperature_entity"
+CONF_WARM_PIN = "warm_pin"
+CONF_WHITE_PIN = "white_pin"
+
+COLOR_TYPE_CCT = "cct"
+COLOR_TYPE_RGB = "rgb"
+COLOR_TYPE_RGBW = "rgbw"
+COLOR_TYPES = [COLOR_TYPE_RGB, COLOR_TYPE_RGBW, COLOR_TYPE_CCT]
+# Pin of each channel of a color light, in the order of its color tuple
+COLOR_CHANNELS = {
+    COLOR_TYPE_RGB: [CONF_RED_PIN, CONF_GREEN_PIN, CONF_BLUE_PIN],
+    COLOR_TYPE_RGBW: [CONF_RED_PIN, CONF_GREEN_PIN, CONF_BLUE_PIN, CONF_WHITE_PIN],
+    COLOR_TYPE_CCT: [CONF_COLD_PIN, CONF_WARM_PIN],
+}
+
+CONTROL_NONE = "none"
+CONTROL_RPM = "rpm"
+CONTROL_TEMPERATURE = "temperature"
+CONTROLS = [CONTROL_NONE, CONTROL_RPM, CONTROL_TEMPERATURE]
+# Proportional, integral and derivative gains of each control mode, in percent
+# of duty cycle per rpm or degree of error
+DEFAULT_GAINS = {
+    CONTROL_RPM: (0.01, 0.005, 0),
+    CONTROL_TEMPERATURE: (10, 0.2, 0),
+}
+
+CURVE_CIE1931 = "cie1931"
+CURVE_GAMMA = "gamma"
+CURVE_LINEAR = "linear"
+CURVES = [CURVE_LINEAR, CURVE_GAMMA, CURVE_CIE1931]
 
+DATA_CONNECTION = "connection"
+DATA_CONNECTIONS = "connections"
+DATA_EFFECTS = "effects"
+DATA_OPTIONS = "options"
+DATA_PIN_INDEX = "pin_index"
+DATA_PLATFORMS = "platforms"
+DATA_TACHOMETER = "tachometer"
 
+DEFAULT_BACKEND = BACKEND_PIGPIOD
 DEFAULT_BRIGHTNESS = 255
+DEFAULT_CONTROL = CONTROL_NONE
+DEFAULT_CURVE = CURVE_LINEAR
+DEFAULT_DAEMON_TRANSITION = False
 DEFAULT_FAN_PERCENTAGE = 100
 DEFAULT_FREQUENCY = 100
+DEFAULT_GAMMA = 2.2
+DEFAULT_HARDWARE_PWM = False
 DEFAULT_HOST = "localhost"
+DEFAULT_MAX_DUTY = 100
+DEFAULT_MAX_KELVIN = 6500
+DEFAULT_MIN_DUTY = 0
+DEFAULT_MIN_KELVIN = 2700
+DEFAULT_OFFSET = 0
 DEFAULT_PORT = 8888
+DEFAULT_REFRESH_INTERVAL = 300
+DEFAULT_SCALE = 1
+DEFAULT_SLEW_RATE = 5
+DEFAULT_TACH_PULSES = 2
+DEFAULT_TRACE_SIZE = 100000
 DOMAIN = "rpi_gpio_pwm"
 
+EFFECT_BREATHE = "breathe"
+EFFECT_CANDLE = "candle"
+EFFECT_PULSE = "pulse"
+EFFECTS = [EFFECT_BREATHE, EFFECT_PULSE, EFFECT_CANDLE]
+
+PRESET_MODE_AUTO = "auto"
+
+SERVICE_START_TRACE = "start_trace"
+SERVICE_STOP_TRACE = "stop_trace"
+# Written to the config directory by SERVICE_STOP_TRACE
+TRACE_FILE = "rpi_gpio_pwm_trace.bin"
+
+# Dispatched with the data of an entry whose options are applied in place
+SIGNAL_OPTIONS_UPDATED = "rpi_gpio_pwm_options_updated_{}"
+
+# GPIOs (BCM numbering) on the header of the Raspberry Pi
+GPIO_PINS = range(2, 28)
+
+# GPIOs (BCM numbering) wired to the PWM peripheral of the Raspberry Pi.
+# 12 and 18 share channel 0, 13 and 19 share channel 1.
+HARDWARE_PWM_PINS = (12, 13, 18, 19)
+# GPIO -> channel of the PWM peripheral driving it
+HARDWARE_PWM_CHANNELS = {12: 0, 13: 1, 18: 0, 19: 1}
+
 
+# Device entries hold lights and fans, so they are forwarded to every platform
 PLATFORMS: list[Platform] = [
     Platform.FAN,
     Platform.LIGHT,
+    Platform.SENSOR,
 ]
+# Every entry has diagnostic sensors, fans with a tach pin a speed sensor too
 PLATFORMS_FAN: list[Platform] = [
     Platform.FAN,
+    Platform.SENSOR,
 ]
 PLATFORMS_LIGHT: list[Platform] = [
     Platform.LIGHT,
+    Platform.SENSOR,
 ]
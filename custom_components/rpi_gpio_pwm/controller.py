@@ -0,0 +1,180 @@
+"""Closed-loop fan speed control for the rpi_gpio_pwm component."""
+
+from __future__ import annotations
+
+from collections.abc import Awaitable, Callable
+from datetime import timedelta
+import logging
+import time
+
+from homeassistant.const import STATE_UNAVAILABLE, STATE_UNKNOWN
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant
+from homeassistant.helpers.event import async_track_time_interval
+
+from .const import CONTROL_RPM
+from .tach import Tachometer
+
+_LOGGER = logging.getLogger(__name__)
+
+# Period of the control loop
+CONTROL_INTERVAL = timedelta(seconds=1)
+# Duty cycles closer than this to the last one written are not sent
+DUTY_RESOLUTION = 0.001
+
+
+class PidController:
+    """PID controller with anti-windup and a rate limit on its output.
+
+    Gains are in percent of duty cycle per unit of error, outputs are duty
+    cycles between low and high. The integral is clamped to the output range
+    and frozen while the output saturates, so it never winds up past what the
+    fan can do. The derivative acts on the measurement, so changing the target
+    does not kick the output.
+    """
+
+    def __init__(
+        self,
+        kp: float,
+        ki: float,
+        kd: float,
+        low: float,
+        high: float,
+        slew_rate: float,
+        reverse: bool = False,
+    ) -> None:
+        """Initialize the controller, slew_rate in duty cycle per second.
+
+        reverse is for processes where more output lowers the measurement,
+        like cooling a temperature.
+        """
+        sign = -1 if reverse else 1
+        self._kp = sign * kp / 100
+        self._ki = sign * ki / 100
+        self._kd = sign * kd / 100
+        self._low = low
+        self._high = high
+        self._slew_rate = slew_rate
+        self._integral = low
+        self._last_measurement: float | None = None
+        self.output: float | None = None
+
+    def _clamp(self, value: float) -> float:
+        """Return a value limited to the output range."""
+        return min(max(value, self._low), self._high)
+
+    def reset(self, output: float) -> None:
+        """Restart from an output, so taking over from manual control is bumpless."""
+        self.output = self._clamp(output)
+        self._integral = self.output
+        self._last_measurement = None
+
+    def update(self, target: float, measurement: float, dt: float) -> float:
+        """Return the output for a new measurement taken dt seconds after the last."""
+        error = target - measurement
+        proportional = self._kp * error
+        derivative = 0.0
+        if self._last_measurement is not None and dt > 0:
+            derivative = -self._kd * (measurement - self._last_measurement) / dt
+        self._last_measurement = measurement
+
+        integral = self._clamp(self._integral + self._ki * error * dt)
+        output = proportional + integral + derivative
+        # Do not integrate further in the direction the output already saturates
+        if (output > self._high and integral > self._integral) or (
+            output < self._low and integral < self._integral
+        ):
+            integral = self._integral
+            output = proportional + integral + derivative
+        self._integral = integral
+
+        output = self._clamp(output)
+        if self.output is not None:
+            step = self._slew_rate * dt
+            output = min(max(output, self.output - step), self.output + step)
+        self.output = output
+        return output
+
+
+class FanController:
+    """Run a PID loop that holds a fan speed or a temperature at a target.
+
+    Every CONTROL_INTERVAL the measurement is read, either from the
+    tachometer of the fan or from a temperature entity, and the new duty
+    cycle is handed to write() only if it moved by at least DUTY_RESOLUTION.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        write: Callable[[float], Awaitable[None]],
+        mode: str,
+        target: float,
+        pid: PidController,
+        tachometer: Tachometer | None = None,
+        temperature_entity: str | None = None,
+    ) -> None:
+        """Initialize the controller, start() begins controlling."""
+        self._hass = hass
+        self._write = write
+        self._mode = mode
+        self._target = target
+        self._pid = pid
+        self._tachometer = tachometer
+        self._temperature_entity = temperature_entity
+        self._unsub: CALLBACK_TYPE | None = None
+        self._sample: tuple[int, float] | None = None
+        self._since = 0.0
+        self._written: float | None = None
+
+    @property
+    def running(self) -> bool:
+        """Return true if the control loop runs."""
+        return self._unsub is not None
+
+    def start(self, duty: float) -> None:
+        """Take over the fan from its current duty cycle."""
+        self.stop()
+        self._pid.reset(duty)
+        self._written = duty
+        self._since = time.monotonic()
+        if self._tachometer is not None:
+            self._sample = self._tachometer.sample()
+        self._unsub = async_track_time_interval(
+            self._hass, self._async_step, CONTROL_INTERVAL
+        )
+
+    def stop(self) -> None:
+        """Stop the control loop, the fan keeps its last duty cycle."""
+        if self._unsub is not None:
+            self._unsub()
+            self._unsub = None
+
+    def _measure(self) -> float | None:
+        """Return the current measurement, None if there is none."""
+        if self._mode == CONTROL_RPM:
+            rpm = self._tachometer.rpm_since(self._sample)
+            self._sample = self._tachometer.sample()
+            return rpm
+        state = self._hass.states.get(self._temperature_entity)
+        if state is None or state.state in (STATE_UNAVAILABLE, STATE_UNKNOWN):
+            return None
+        try:
+            return float(state.state)
+        except ValueError:
+            _LOGGER.warning(
+                "%s is not a temperature: %s", self._temperature_entity, state.state
+            )
+            return None
+
+    async def _async_step(self, now=None) -> None:
+        """Run one step of the loop."""
+        measurement = self._measure()
+        if measurement is None:
+            return
+        since, self._since = self._since, time.monotonic()
+        duty = self._pid.update(self._target, measurement, self._since - since)
+        duty = round(duty / DUTY_RESOLUTION) * DUTY_RESOLUTION
+        if self._written is not None and abs(duty - self._written) < DUTY_RESOLUTION:
+            return
+        self._written = duty
+        await self._write(duty)
@@ -0,0 +1,60 @@
+"""Dimming curves for the rpi_gpio_pwm component."""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+
+from .const import CURVE_CIE1931, CURVE_GAMMA
+
+# One entry per Home Assistant brightness step
+TABLE_STEPS = 255
+
+
+def _cie1931(level: float) -> float:
+    """Return the relative luminance of a CIE 1931 lightness between 0 and 1."""
+    lightness = level * 100
+    if lightness <= 8:
+        return lightness / 903.3
+    return ((lightness + 16) / 116) ** 3
+
+
+class BrightnessCurve:
+    """Map light levels between 0 and 1 to duty cycles through a lookup table.
+
+    The table is built once, so converting a brightness on the command path
+    is an index and fades in level space look linear to the eye.
+    """
+
+    def __init__(
+        self, curve: str, gamma: float, min_duty: float, max_duty: float
+    ) -> None:
+        """Build the table, min_duty and max_duty in percent."""
+        low = min_duty / 100
+        high = max_duty / 100
+        table = [0.0]
+        for step in range(1, TABLE_STEPS + 1):
+            level = step / TABLE_STEPS
+            if curve == CURVE_GAMMA:
+                level = level**gamma
+            elif curve == CURVE_CIE1931:
+                level = _cie1931(level)
+            table.append(low + (high - low) * level)
+        self._table = tuple(table)
+
+    def duty(self, level: float) -> float:
+        """Return the duty cycle of a level, interpolating between steps."""
+        position = level * TABLE_STEPS
+        index = int(position)
+        if index >= TABLE_STEPS:
+            return self._table[TABLE_STEPS]
+        fraction = position - index
+        if not fraction:
+            return self._table[index]
+        return (
+            self._table[index]
+            + (self._table[index + 1] - self._table[index]) * fraction
+        )
+
+    def level(self, duty: float) -> float:
+        """Return the level closest to a duty cycle read back from a pin."""
+        return min(bisect_left(self._table, duty), TABLE_STEPS) / TABLE_STEPS
@@ -0,0 +1,30 @@
+"""Diagnostics support for the rpi_gpio_pwm component."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_HOST
+from homeassistant.core import HomeAssistant
+
+from .const import DATA_CONNECTION, DOMAIN
+from .effects import get_effect_player
+from .pins import entry_pins
+
+TO_REDACT = {CONF_HOST}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return the diagnostics of a config entry and of its pigpiod connection."""
+    connection = hass.data[DOMAIN][entry.entry_id][DATA_CONNECTION]
+    return {
+        "entry": async_redact_data(dict(entry.data), TO_REDACT),
+        "connection": async_redact_data(
+            connection.as_dict(pins=entry_pins(entry.data)), TO_REDACT
+        ),
+        "effects": get_effect_player(hass).as_dict(),
+    }
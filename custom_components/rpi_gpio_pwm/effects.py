@@ -0,0 +1,218 @@
+"""Light effects for the rpi_gpio_pwm component."""
+
+from __future__ import annotations
+
+from array import array
+import asyncio
+from collections.abc import Callable
+from dataclasses import dataclass
+from functools import cache
+import logging
+import math
+import random
+import time
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.core import HomeAssistant
+
+from .backend import PwmError
+from .const import DATA_EFFECTS, DOMAIN, EFFECT_BREATHE, EFFECT_CANDLE, EFFECT_PULSE
+from .stats import LatencyHistogram
+
+if TYPE_CHECKING:
+    from .backend import PwmConnection
+
+_LOGGER = logging.getLogger(__name__)
+
+# Frames per second of every effect, the same cap as a fade
+FRAMES_PER_SECOND = 25
+FRAME_INTERVAL = 1 / FRAMES_PER_SECOND
+# Length of one cycle of each effect, in seconds
+BREATHE_PERIOD = 5
+PULSE_PERIOD = 2
+CANDLE_PERIOD = 8
+# Lowest level of an effect, so the light never looks switched off
+EFFECT_FLOOR = 0.05
+
+
+def _breathe() -> list[float]:
+    """Return a cosine swell from the floor to full and back."""
+    frames = BREATHE_PERIOD * FRAMES_PER_SECOND
+    return [
+        EFFECT_FLOOR
+        + (1 - EFFECT_FLOOR) * (0.5 - 0.5 * math.cos(2 * math.pi * i / frames))
+        for i in range(frames)
+    ]
+
+
+def _pulse() -> list[float]:
+    """Return a flash to full, decaying back to the floor."""
+    frames = PULSE_PERIOD * FRAMES_PER_SECOND
+    return [
+        max(EFFECT_FLOOR, math.exp(-5 * i / FRAMES_PER_SECOND)) for i in range(frames)
+    ]
+
+
+def _candle() -> list[float]:
+    """Return a smoothed random walk, looping without a jump."""
+    frames = CANDLE_PERIOD * FRAMES_PER_SECOND
+    # Seeded, so every start of Home Assistant flickers the same way
+    rng = random.Random(EFFECT_CANDLE)
+    level = target = 0.8
+    levels = []
+    for i in range(frames):
+        if i % 3 == 0:
+            target = rng.uniform(0.55, 1) if rng.random() > 0.1 else 0.4
+        level += (target - level) * 0.35
+        levels.append(level)
+    # Blend the last second into the first frame so the cycle wraps smoothly
+    for i in range(FRAMES_PER_SECOND):
+        weight = (i + 1) / FRAMES_PER_SECOND
+        index = frames - FRAMES_PER_SECOND + i
+        levels[index] += (levels[0] - levels[index]) * weight
+    return levels
+
+
+CYCLE_BUILDERS = {
+    EFFECT_BREATHE: _breathe,
+    EFFECT_CANDLE: _candle,
+    EFFECT_PULSE: _pulse,
+}
+
+
+@cache
+def effect_cycle(effect: str) -> array:
+    """Return the levels of one cycle of an effect, one per frame.
+
+    Built once per effect and shared by every light running it, as 32 bit
+    floats so a cycle takes a few hundred bytes.
+    """
+    return array("f", CYCLE_BUILDERS[effect]())
+
+
+@dataclass
+class RunningEffect:
+    """An effect played on the pins of one light."""
+
+    connection: PwmConnection
+    effect: str
+    cycle: array
+    # Maps a level to the duty cycle of every pin of the light
+    render: Callable[[float], dict[int, float]]
+    scale: float
+    origin: int
+    level: float = 0.0
+
+
+class EffectPlayer:
+    """Play the effects of every light from one task.
+
+    Each frame reads the next level of every running effect from its cycle
+    and writes the pins of each daemon in one burst, so dozens of lights
+    cost one timer and one burst per daemon per frame. Frames the daemons
+    could not keep up with are skipped, never queued.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the player, its task starts with the first effect."""
+        self._hass = hass
+        self._effects: dict[Any, RunningEffect] = {}
+        self._task: asyncio.Task | None = None
+        self._start = 0.0
+        self._frame = 0
+        self.frames = 0
+        self.skipped = 0
+        self.errors = 0
+        # Time spent computing the levels of one frame
+        self.frame_time = LatencyHistogram()
+
+    def start(
+        self,
+        key: Any,
+        connection: PwmConnection,
+        effect: str,
+        render: Callable[[float], dict[int, float]],
+        scale: float,
+    ) -> None:
+        """Run an effect on a light, or change the brightness of the running one."""
+        running = self._effects.get(key)
+        if running is not None and running.effect == effect:
+            running.scale = scale
+            return
+        cycle = effect_cycle(effect)
+        # Candles flicker out of step, the other effects run together
+        phase = hash(key) % len(cycle) if effect == EFFECT_CANDLE else 0
+        self._effects[key] = RunningEffect(
+            connection, effect, cycle, render, scale, self._frame - phase
+        )
+        if self._task is None or self._task.done():
+            self._start = self._hass.loop.time()
+            self._frame = 0
+            self._task = self._hass.async_create_background_task(
+                self._async_run(), "rpi_gpio_pwm effects"
+            )
+
+    def stop(self, key: Any) -> float | None:
+        """Stop the effect of a light and return the level it was at."""
+        running = self._effects.pop(key, None)
+        if not self._effects and self._task is not None:
+            self._task.cancel()
+            self._task = None
+        return None if running is None else running.level
+
+    async def _async_run(self) -> None:
+        """Write one frame of every effect per interval."""
+        loop = asyncio.get_running_loop()
+        while self._effects:
+            await asyncio.sleep(
+                max(0, self._start + (self._frame + 1) * FRAME_INTERVAL - loop.time())
+            )
+            frame = int((loop.time() - self._start) / FRAME_INTERVAL)
+            self.skipped += max(0, frame - self._frame - 1)
+            self._frame = frame
+            begin = time.perf_counter()
+            bursts: dict[PwmConnection, dict[int, float]] = {}
+            for running in self._effects.values():
+                if not running.connection.available:
+                    continue
+                running.level = (
+                    running.cycle[(frame - running.origin) % len(running.cycle)]
+                    * running.scale
+                )
+                bursts.setdefault(running.connection, {}).update(
+                    running.render(running.level)
+                )
+            self.frame_time.record(time.perf_counter() - begin)
+            self.frames += 1
+            results = await asyncio.gather(
+                *(
+                    connection.async_set_values(values)
+                    for connection, values in bursts.items()
+                ),
+                return_exceptions=True,
+            )
+            for result in results:
+                if isinstance(result, PwmError):
+                    self.errors += 1
+                    _LOGGER.debug("Cannot write an effect frame: %s", result)
+                elif isinstance(result, Exception):
+                    raise result
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the state and cost of the player, for diagnostics."""
+        return {
+            "running": len(self._effects),
+            "frames_per_second": FRAMES_PER_SECOND,
+            "frames": self.frames,
+            "skipped_frames": self.skipped,
+            "errors": self.errors,
+            "frame_time": self.frame_time.as_dict(),
+        }
+
+
+def get_effect_player(hass: HomeAssistant) -> EffectPlayer:
+    """Return the effect player, creating it on first use."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if DATA_EFFECTS not in domain_data:
+        domain_data[DATA_EFFECTS] = EffectPlayer(hass)
+    return domain_data[DATA_EFFECTS]
@@ -2,10 +2,9 @@
 
 from __future__ import annotations
 
+from collections.abc import Mapping
 import logging
 
-from gpiozero import PWMOutputDevice
-from gpiozero.pins.pigpio import PiGPIOFactory
 import voluptuous as vol
 
 from homeassistant.components.fan import (
@@ -18,24 +17,64 @@ from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
     CONF_HOST,
     CONF_NAME,
+    CONF_PLATFORM,
     CONF_PORT,
     CONF_UNIQUE_ID,
     STATE_ON,
 )
 from homeassistant.core import HomeAssistant
 import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.restore_state import RestoreEntity
 from homeassistant.helpers.typing import ConfigType, DiscoveryInfoType
 
+from .connection import get_registry
 from .const import (
+    BACKENDS,
+    CONF_BACKEND,
+    CONF_CHANNELS,
+    CONF_CONTROL,
     CONF_FAN,
     CONF_FANS,
+    CONF_FREQUENCY,
+    CONF_GROUPS,
+    CONF_HARDWARE_PWM,
+    CONF_KD,
+    CONF_KI,
+    CONF_KP,
+    CONF_MAX_DUTY,
+    CONF_MEMBERS,
+    CONF_MIN_DUTY,
     CONF_PIN,
+    CONF_REFRESH_INTERVAL,
+    CONF_SLEW_RATE,
+    CONF_TARGET,
+    CONF_TEMPERATURE_ENTITY,
+    CONTROL_NONE,
+    CONTROL_TEMPERATURE,
+    DATA_CONNECTION,
+    DATA_TACHOMETER,
+    DEFAULT_BACKEND,
+    DEFAULT_CONTROL,
     DEFAULT_FAN_PERCENTAGE,
+    DEFAULT_FREQUENCY,
+    DEFAULT_GAINS,
+    DEFAULT_HARDWARE_PWM,
     DEFAULT_HOST,
+    DEFAULT_MAX_DUTY,
+    DEFAULT_MIN_DUTY,
     DEFAULT_PORT,
+    DEFAULT_REFRESH_INTERVAL,
+    DEFAULT_SLEW_RATE,
+    DOMAIN,
+    PRESET_MODE_AUTO,
+    SIGNAL_OPTIONS_UPDATED,
 )
+from .controller import FanController, PidController
+from .group import MEMBERS_SCHEMA, GroupMembers
+from .pins import check_hardware_pwm, check_pwm_channels, check_sysfs
+from .publish import StatePublisher
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -43,47 +82,114 @@ SUPPORT_SIMPLE_FAN = (
     FanEntityFeature.SET_SPEED | FanEntityFeature.TURN_ON | FanEntityFeature.TURN_OFF
 )
 
-PLATFORM_SCHEMA = PLATFORM_SCHEMA.extend(
-    {
-        vol.Required(CONF_FANS): vol.All(
-            cv.ensure_list,
-            [
-                {
-                    vol.Required(CONF_NAME): cv.string,
-                    vol.Required(CONF_PIN): cv.positive_int,
-                    vol.Optional(CONF_HOST, default=DEFAULT_HOST): cv.string,
-                    vol.Optional(CONF_PORT, default=DEFAULT_PORT): cv.port,
-                    vol.Optional(CONF_UNIQUE_ID): cv.string,
-                }
-            ],
-        )
+
+def _fan_options(data: Mapping, name: str) -> dict:
+    """Return the options of a fan its entity applies in place."""
+    return {
+        "name": name,
+        "frequency": data.get(CONF_FREQUENCY, DEFAULT_FREQUENCY),
+        "refresh_interval": data.get(CONF_REFRESH_INTERVAL, DEFAULT_REFRESH_INTERVAL),
     }
+
+
+PLATFORM_SCHEMA = vol.All(
+    PLATFORM_SCHEMA.extend(
+        {
+            vol.Optional(CONF_FANS, default=[]): vol.All(
+                cv.ensure_list,
+                [
+                    vol.All(
+                        {
+                            vol.Required(CONF_NAME): cv.string,
+                            vol.Required(CONF_PIN): cv.positive_int,
+                            vol.Optional(CONF_HOST, default=DEFAULT_HOST): cv.string,
+                            vol.Optional(CONF_PORT, default=DEFAULT_PORT): cv.port,
+                            vol.Optional(CONF_FREQUENCY): cv.positive_int,
+                            vol.Optional(CONF_BACKEND, default=DEFAULT_BACKEND): vol.In(
+                                BACKENDS
+                            ),
+                            vol.Optional(
+                                CONF_HARDWARE_PWM, default=DEFAULT_HARDWARE_PWM
+                            ): cv.boolean,
+                            vol.Optional(
+                                CONF_REFRESH_INTERVAL, default=DEFAULT_REFRESH_INTERVAL
+                            ): cv.positive_int,
+                            vol.Optional(CONF_UNIQUE_ID): cv.string,
+                        },
+                        check_hardware_pwm,
+                        check_sysfs,
+                    )
+                ],
+                check_pwm_channels,
+            ),
+            vol.Optional(CONF_GROUPS, default=[]): vol.All(
+                cv.ensure_list,
+                [
+                    {
+                        vol.Required(CONF_NAME): cv.string,
+                        vol.Required(CONF_MEMBERS): MEMBERS_SCHEMA,
+                        vol.Optional(CONF_HOST, default=DEFAULT_HOST): cv.string,
+                        vol.Optional(CONF_PORT, default=DEFAULT_PORT): cv.port,
+                        vol.Optional(
+                            CONF_FREQUENCY, default=DEFAULT_FREQUENCY
+                        ): cv.positive_int,
+                        vol.Optional(
+                            CONF_REFRESH_INTERVAL, default=DEFAULT_REFRESH_INTERVAL
+                        ): cv.positive_int,
+                        vol.Optional(CONF_UNIQUE_ID): cv.string,
+                    }
+                ],
+            ),
+        }
+    ),
+    cv.has_at_least_one_key(CONF_FANS, CONF_GROUPS),
 )
 
 
-def setup_platform(
+async def async_setup_platform(
     hass: HomeAssistant,
     config: ConfigType,
-    add_entities: AddEntitiesCallback,
+    async_add_entities: AddEntitiesCallback,
     discovery_info: DiscoveryInfoType | None = None,
 ) -> None:
     """Set up the PWM FAN."""
+    registry = get_registry(hass)
     fans = []
     for fan_conf in config[CONF_FANS]:
         pin = fan_conf[CONF_PIN]
-        opt_args = {}
-        opt_args["pin_factory"] = PiGPIOFactory(
-            host=fan_conf[CONF_HOST], port=fan_conf[CONF_PORT]
+        connection = await registry.async_acquire(
+            fan_conf[CONF_HOST], fan_conf[CONF_PORT], fan_conf[CONF_BACKEND]
         )
         fan = PwmSimpleFan(
-            fan=PWMOutputDevice(pin, **opt_args),
+            pin=pin,
             name=fan_conf[CONF_NAME],
             unique_id=fan_conf[CONF_UNIQUE_ID],
             hass=hass,
+            hardware_pwm=fan_conf[CONF_HARDWARE_PWM],
+            refresh_interval=fan_conf[CONF_REFRESH_INTERVAL],
+            frequency=fan_conf.get(CONF_FREQUENCY, DEFAULT_FREQUENCY),
+            connection=connection,
+            owns_connection=True,
         )
         fans.append(fan)
+    for group_conf in config[CONF_GROUPS]:
+        connection = await registry.async_acquire(
+            group_conf[CONF_HOST], group_conf[CONF_PORT]
+        )
+        fans.append(
+            PwmGroupFan(
+                members=GroupMembers(group_conf[CONF_MEMBERS]),
+                name=group_conf[CONF_NAME],
+                unique_id=group_conf.get(CONF_UNIQUE_ID),
+                hass=hass,
+                refresh_interval=group_conf[CONF_REFRESH_INTERVAL],
+                frequency=group_conf[CONF_FREQUENCY],
+                connection=connection,
+                owns_connection=True,
+            )
+        )
 
-    add_entities(fans)
+    async_add_entities(fans)
 
 
 # Transform the configEntry from config_flow into an entity
@@ -93,43 +199,106 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up fan from the ConfigEntry configuration created in the integrations UI."""
+    if CONF_CHANNELS in config_entry.data:
+        await _async_setup_device_entry(hass, config_entry, async_add_entities)
+        return
+    # Do not create entity if is not a fan
+    if CONF_FAN not in config_entry.title:
+        return
     pin = config_entry.data.get(CONF_PIN)
-    opt_args = {}
-    opt_args["pin_factory"] = PiGPIOFactory(
-        host=config_entry.data.get(CONF_HOST), port=config_entry.data.get(CONF_PORT)
-    )
+    # The connection is shared with other entries and owned by __init__
+    connection = hass.data[DOMAIN][config_entry.entry_id][DATA_CONNECTION]
     entity1 = PwmSimpleFan(
-        fan=PWMOutputDevice(pin, **opt_args),
+        pin=pin,
         hass=hass,
         config_entry=config_entry,
+        connection=connection,
+        tachometer=hass.data[DOMAIN][config_entry.entry_id].get(DATA_TACHOMETER),
     )
-    # Do not create entity if is not a fan
-    if CONF_FAN not in config_entry.title:
-        pass
-    else:
-        async_add_entities([entity1], update_before_add=True)
+    async_add_entities([entity1])
 
+    async def async_options_updated(data: Mapping) -> None:
+        await entity1.async_update_options(**_fan_options(data, data.get(CONF_NAME)))
 
-class PwmSimpleFan(FanEntity, RestoreEntity):
-    """Representation of a simple PWM FAN."""
+    config_entry.async_on_unload(
+        async_dispatcher_connect(
+            hass,
+            SIGNAL_OPTIONS_UPDATED.format(config_entry.entry_id),
+            async_options_updated,
+        )
+    )
+
+
+async def _async_setup_device_entry(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Set up the fan channels of a device, one entity per pin."""
+    data = config_entry.data
+    connection = hass.data[DOMAIN][config_entry.entry_id][DATA_CONNECTION]
+    frequency = data.get(CONF_FREQUENCY, DEFAULT_FREQUENCY)
+    # pin -> fan of every fan channel
+    fans = {
+        channel[CONF_PIN]: PwmSimpleFan(
+            pin=channel[CONF_PIN],
+            name=channel[CONF_NAME],
+            unique_id=f"{config_entry.entry_id}_{channel[CONF_PIN]}",
+            hass=hass,
+            hardware_pwm=False,
+            refresh_interval=data.get(CONF_REFRESH_INTERVAL, DEFAULT_REFRESH_INTERVAL),
+            frequency=frequency,
+            connection=connection,
+        )
+        for channel in data[CONF_CHANNELS]
+        if channel[CONF_PLATFORM] == CONF_FAN
+    }
+    async_add_entities(list(fans.values()))
+
+    async def async_options_updated(data: Mapping) -> None:
+        for channel in data[CONF_CHANNELS]:
+            if channel[CONF_PIN] in fans:
+                await fans[channel[CONF_PIN]].async_update_options(
+                    **_fan_options(data, channel[CONF_NAME])
+                )
+
+    config_entry.async_on_unload(
+        async_dispatcher_connect(
+            hass,
+            SIGNAL_OPTIONS_UPDATED.format(config_entry.entry_id),
+            async_options_updated,
+        )
+    )
+
+
+class PwmFan(FanEntity, RestoreEntity):
+    """Base of the PWM fans, on one pin or running several at one speed.
+
+    Subclasses turn a speed into the duty cycle of each of their pins, which
+    are all written in the same burst.
+    """
 
     def __init__(self, **kwarg):
-        """Initialize PWM FAN."""
+        """Initialize the PWM fan on its pins."""
         self._hass = kwarg["hass"]
         self._attr_has_entity_name = True
-        self._fan = kwarg["fan"]
-        self._name = (
-            kwarg["config_entry"].data.get(CONF_NAME)
-            if "config_entry" in kwarg
-            else kwarg["name"]
-        )
-        self._unique_id = (
-            kwarg["config_entry"].entry_id
-            if "config_entry" in kwarg
-            else kwarg["unique_id"]
-        )
+        self._publisher = StatePublisher(self._hass, self.async_write_ha_state)
+        # The pins are set up once the connection to pigpiod is available
+        self._pins_ready = False
+        self._pins = kwarg["pins"]
+        self._connection = kwarg["connection"]
+        # YAML entities own their connection, config entries share the one of the entry
+        self._owns_connection = kwarg.get("owns_connection", False)
+        self._frequency = kwarg["frequency"]
+        for pin in self._pins:
+            self._connection.set_refresh_interval(pin, kwarg["refresh_interval"])
+        self._name = kwarg["name"]
+        self._unique_id = kwarg["unique_id"]
         self._is_on = False
         self._percentage = DEFAULT_FAN_PERCENTAGE
+        self._preset_mode = None
+        # Closed-loop control is only available to fans set up from the UI
+        self._controller = None
 
     async def async_added_to_hass(self):
         """Handle entity about to be added to hass event."""
@@ -139,12 +308,81 @@ class PwmSimpleFan(FanEntity, RestoreEntity):
             self._percentage = last_state.attributes.get(
                 "percentage", DEFAULT_FAN_PERCENTAGE
             )
+            if self._controller is not None:
+                self._preset_mode = last_state.attributes.get("preset_mode")
+        # Without a state to restore, the fan takes the one of its first pin
+        self._restored = last_state is not None
+        # Set the pins up once pigpiod is reachable, which may be later
+        self.async_on_remove(
+            self._connection.async_add_listener(self._async_connection_changed)
+        )
+        if self._connection.available:
+            await self._async_connection_changed()
+
+    async def _async_connection_changed(self) -> None:
+        """Set the pins up on a connection that came back, drop them on a lost one."""
+        if not self._connection.available:
+            # The pin setup of a lost daemon is gone with it
+            if self._controller is not None:
+                self._controller.stop()
+            self._pins_ready = False
+            self.async_write_ha_state()
+            return
+        if not self._pins_ready:
+            values = [
+                await self._connection.async_setup_pin(pin, self._frequency)
+                for pin in self._pins
+            ]
+            if not self._restored and values[0] is not None:
+                self._is_on = values[0] > 0
+                if self._is_on:
+                    self._percentage = max(1, round(self._duty(values[0]) * 100))
+            self._restored = True
+            self._pins_ready = True
+            # Only written to the pins which do not have it already
+            await self._async_write_value(self._percentage / 100 if self._is_on else 0)
+        # Resume holding the target
+        if (
+            self._is_on
+            and self._preset_mode == PRESET_MODE_AUTO
+            and not self._controller.running
+        ):
+            self._controller.start(self._percentage / 100)
+        self.async_write_ha_state()
+
+    async def async_update_options(self, **kwarg) -> None:
+        """Apply changed options to the fan in place, it never stops."""
+        self._name = kwarg["name"]
+        for pin in self._pins:
+            self._connection.set_refresh_interval(pin, kwarg["refresh_interval"])
+        if kwarg["frequency"] != self._frequency:
+            self._frequency = kwarg["frequency"]
+            for pin in self._pins:
+                await self._connection.async_set_frequency(pin, self._frequency)
+        self.async_write_ha_state()
+
+    async def async_will_remove_from_hass(self):
+        """Release the pins and the connection of the entity."""
+        self._publisher.cancel()
+        if self._controller is not None:
+            self._controller.stop()
+        for pin in self._pins:
+            await self._connection.async_release_pin(pin)
+        if self._owns_connection:
+            await get_registry(self.hass).async_release(
+                self._connection.host, self._connection.port
+            )
 
     @property
     def should_poll(self):
         """No polling needed."""
         return False
 
+    @property
+    def available(self):
+        """Return true once the pins are set up on pigpiod."""
+        return self._connection.available and self._pins_ready
+
     @property
     def name(self):
         """Return the name of the group."""
@@ -165,32 +403,178 @@ class PwmSimpleFan(FanEntity, RestoreEntity):
         """Return the percentage property."""
         return self._percentage
 
+    @property
+    def preset_mode(self):
+        """Return auto while the controller holds the target."""
+        return self._preset_mode
+
+    @property
+    def preset_modes(self):
+        """Return the preset modes, auto if the fan has a controller."""
+        if self._controller is None:
+            return None
+        return [PRESET_MODE_AUTO]
+
     @property
     def supported_features(self):
         """Flag supported features."""
-        return SUPPORT_SIMPLE_FAN
+        if self._controller is None:
+            return SUPPORT_SIMPLE_FAN
+        return SUPPORT_SIMPLE_FAN | FanEntityFeature.PRESET_MODE
 
-    def turn_on(self, percentage: None, preset_mode: None, **kwargs) -> None:
+    async def async_turn_on(
+        self,
+        percentage: int | None = None,
+        preset_mode: str | None = None,
+        **kwargs,
+    ) -> None:
         """Turn on the fan."""
+        if preset_mode is not None:
+            await self.async_set_preset_mode(preset_mode)
+            return
+        if percentage is None:
+            percentage = kwargs.get(ATTR_PERCENTAGE)
+        if percentage is None and self._preset_mode == PRESET_MODE_AUTO:
+            self._controller.start(self._percentage / 100 if self._is_on else 0)
+            self._is_on = True
+            self._publisher.publish()
+            return
+        self._stop_controller()
         if percentage is not None:
             self._percentage = percentage
-        elif ATTR_PERCENTAGE in kwargs:
-            self._percentage = kwargs[ATTR_PERCENTAGE]
-        self._fan.value = self._percentage / 100
+        await self._async_write_value(self._percentage / 100)
         self._is_on = True
-        self.schedule_update_ha_state()
+        self._publisher.publish()
 
-    def turn_off(self, **kwargs) -> None:
+    async def async_turn_off(self, **kwargs) -> None:
         """Turn the fan off."""
+        # The preset is kept, so turning the fan on again resumes it
+        if self._controller is not None:
+            self._controller.stop()
         if self.is_on:
-            self._fan.off()
+            await self._async_write_value(0)
         self._is_on = False
-        self.schedule_update_ha_state()
+        self._publisher.publish()
 
-    def set_percentage(self, percentage: int) -> None:
+    async def async_set_percentage(self, percentage: int) -> None:
         """Set the speed percentage of the fan."""
+        self._stop_controller()
         self._percentage = percentage
-        self._fan.value = self._percentage / 100
+        await self._async_write_value(self._percentage / 100)
         self._is_on = True
-        self.schedule_update_ha_state()
+        self._publisher.publish()
+
+    async def _async_write_value(self, value: float) -> None:
+        """Write the duty cycles of a value to every pin in one burst."""
+        await self._connection.async_set_values(self._duties(value))
+
+    def _duties(self, value: float) -> dict[int, float]:
+        """Return the duty cycle of every pin for a value."""
+        return dict.fromkeys(self._pins, value)
+
+    def _duty(self, value: float) -> float:
+        """Return the duty cycle of the fan a value of its first pin stands for."""
+        return value
+
+    async def async_set_preset_mode(self, preset_mode: str) -> None:
+        """Hand the fan over to the controller."""
+        if self._controller is None or preset_mode != PRESET_MODE_AUTO:
+            raise ValueError(f"Invalid preset mode: {preset_mode}")
+        self._preset_mode = preset_mode
+        self._controller.start(self._percentage / 100 if self._is_on else 0)
+        self._is_on = True
+        self._publisher.publish()
+
+    def _stop_controller(self) -> None:
+        """Leave automatic control for a manual speed."""
+        if self._controller is not None:
+            self._controller.stop()
+        self._preset_mode = None
+
+    async def _async_write_controller_duty(self, duty: float) -> None:
+        """Write a duty cycle chosen by the controller."""
+        await self._async_write_value(duty)
+        # The state only changes with the whole percentage shown in the UI
+        percentage = round(duty * 100)
+        if percentage != self._percentage:
+            self._percentage = percentage
+            self._publisher.publish()
 
+
+class PwmSimpleFan(PwmFan):
+    """Representation of a simple PWM FAN."""
+
+    def __init__(self, **kwarg):
+        """Initialize PWM FAN."""
+        if "config_entry" in kwarg:
+            data = kwarg["config_entry"].data
+            kwarg.update(
+                hardware_pwm=data.get(CONF_HARDWARE_PWM, DEFAULT_HARDWARE_PWM),
+                frequency=data.get(CONF_FREQUENCY, DEFAULT_FREQUENCY),
+                refresh_interval=data.get(
+                    CONF_REFRESH_INTERVAL, DEFAULT_REFRESH_INTERVAL
+                ),
+                name=data.get(CONF_NAME),
+                unique_id=kwarg["config_entry"].entry_id,
+            )
+        if kwarg["hardware_pwm"]:
+            kwarg["connection"].set_hardware_pwm(kwarg["pin"], kwarg["frequency"])
+        super().__init__(pins=[kwarg["pin"]], **kwarg)
+        if "config_entry" in kwarg:
+            self._controller = _controller_from_entry(
+                self._hass,
+                kwarg["config_entry"],
+                self._async_write_controller_duty,
+                kwarg.get("tachometer"),
+            )
+
+
+class PwmGroupFan(PwmFan):
+    """Representation of PWM fans on several pins, run at one speed.
+
+    Every pin of the group is written in the same burst, so the members of
+    a group speed up and slow down together.
+    """
+
+    def __init__(self, **kwarg):
+        """Initialize the group of PWM fans."""
+        self._members = kwarg["members"]
+        super().__init__(pins=self._members.pins, **kwarg)
+
+    def _duties(self, value: float) -> dict[int, float]:
+        """Return the duty cycle of every member pin for a value."""
+        return self._members.duties(value)
+
+    def _duty(self, value: float) -> float:
+        """Return the duty cycle of the group a value of its first pin stands for."""
+        return self._members.group_duty(value)
+
+
+def _controller_from_entry(
+    hass: HomeAssistant, config_entry: ConfigEntry, write, tachometer
+) -> FanController | None:
+    """Return the controller configured for a fan, None if it has none."""
+    data = config_entry.data
+    mode = data.get(CONF_CONTROL, DEFAULT_CONTROL)
+    if mode == CONTROL_NONE:
+        return None
+    kp, ki, kd = DEFAULT_GAINS[mode]
+    pid = PidController(
+        kp=data.get(CONF_KP, kp),
+        ki=data.get(CONF_KI, ki),
+        kd=data.get(CONF_KD, kd),
+        low=data.get(CONF_MIN_DUTY, DEFAULT_MIN_DUTY) / 100,
+        high=data.get(CONF_MAX_DUTY, DEFAULT_MAX_DUTY) / 100,
+        slew_rate=data.get(CONF_SLEW_RATE, DEFAULT_SLEW_RATE) / 100,
+        # More air lowers the temperature
+        reverse=mode == CONTROL_TEMPERATURE,
+    )
+    return FanController(
+        hass,
+        write,
+        mode,
+        data[CONF_TARGET],
+        pid,
+        tachometer=tachometer,
+        temperature_entity=data.get(CONF_TEMPERATURE_ENTITY),
+    )
@@ -0,0 +1,75 @@
+"""Pin groups for the rpi_gpio_pwm component."""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+
+import voluptuous as vol
+
+import homeassistant.helpers.config_validation as cv
+
+from .const import CONF_OFFSET, CONF_PIN, CONF_SCALE, DEFAULT_OFFSET, DEFAULT_SCALE
+
+
+def _check_unique_pins(members: list[dict]) -> list[dict]:
+    """Check that no pin is in a group twice."""
+    pins = [member[CONF_PIN] for member in members]
+    if len(set(pins)) != len(pins):
+        raise vol.Invalid("A pin can only be in a group once")
+    return members
+
+
+MEMBERS_SCHEMA = vol.All(
+    cv.ensure_list,
+    vol.Length(min=1),
+    [
+        {
+            vol.Required(CONF_PIN): cv.positive_int,
+            vol.Optional(CONF_OFFSET, default=DEFAULT_OFFSET): vol.All(
+                vol.Coerce(float), vol.Range(min=-100, max=100)
+            ),
+            vol.Optional(CONF_SCALE, default=DEFAULT_SCALE): vol.All(
+                vol.Coerce(float), vol.Range(min=0.01, max=10)
+            ),
+        }
+    ],
+    _check_unique_pins,
+)
+
+
+class GroupMembers:
+    """Spread the duty cycle of a group over the pins of its members.
+
+    Each member scales the duty cycle of the group and adds its offset, in
+    percent, so strips or fans that differ in strength match. A group at 0
+    turns every member off, whatever its offset.
+    """
+
+    def __init__(self, members: list[Mapping]) -> None:
+        """Initialize the members from their configuration."""
+        self.pins = [member[CONF_PIN] for member in members]
+        # (pin, offset, scale) of every member
+        self._members = [
+            (
+                member[CONF_PIN],
+                member.get(CONF_OFFSET, DEFAULT_OFFSET) / 100,
+                member.get(CONF_SCALE, DEFAULT_SCALE),
+            )
+            for member in members
+        ]
+
+    def duties(self, duty: float) -> dict[int, float]:
+        """Return the duty cycle of every member pin for one of the group."""
+        if duty <= 0:
+            return dict.fromkeys(self.pins, 0.0)
+        return {
+            pin: min(max(offset + scale * duty, 0.0), 1.0)
+            for pin, offset, scale in self._members
+        }
+
+    def group_duty(self, value: float) -> float:
+        """Return the duty cycle of the group a value of its first pin stands for."""
+        if value <= 0:
+            return 0.0
+        _, offset, scale = self._members[0]
+        return min(max((value - offset) / scale, 0.0), 1.0)
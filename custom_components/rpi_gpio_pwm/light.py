@@ -2,14 +2,18 @@
 
 from __future__ import annotations
 
+from collections.abc import Mapping
 import logging
 
-from gpiozero import PWMLED
-from gpiozero.pins.pigpio import PiGPIOFactory
 import voluptuous as vol
 
 from homeassistant.components.light import (
     ATTR_BRIGHTNESS,
+    ATTR_COLOR_TEMP_KELVIN,
+    ATTR_EFFECT,
+    ATTR_RGB_COLOR,
+    ATTR_RGBW_COLOR,
+    ATTR_TRANSITION,
     PLATFORM_SCHEMA,
     ColorMode,
     LightEntity,
@@ -19,75 +23,242 @@ from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
     CONF_HOST,
     CONF_NAME,
+    CONF_PLATFORM,
     CONF_PORT,
     CONF_UNIQUE_ID,
     STATE_ON,
 )
 from homeassistant.core import HomeAssistant
 import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.restore_state import RestoreEntity
 from homeassistant.helpers.typing import ConfigType, DiscoveryInfoType
 
+from .connection import get_registry
 from .const import (
+    BACKENDS,
+    COLOR_CHANNELS,
+    COLOR_TYPE_CCT,
+    COLOR_TYPE_RGB,
+    COLOR_TYPE_RGBW,
+    CONF_BACKEND,
+    CONF_CHANNELS,
+    CONF_COLOR_TYPE,
+    CONF_CURVE,
+    CONF_DAEMON_TRANSITION,
     CONF_FREQUENCY,
+    CONF_GAMMA,
+    CONF_GROUPS,
+    CONF_HARDWARE_PWM,
     CONF_LEDS,
     CONF_LIGHT,
+    CONF_MAX_DUTY,
+    CONF_MAX_KELVIN,
+    CONF_MEMBERS,
+    CONF_MIN_DUTY,
+    CONF_MIN_KELVIN,
     CONF_PIN,
+    CONF_REFRESH_INTERVAL,
+    CURVES,
+    DATA_CONNECTION,
+    DEFAULT_BACKEND,
     DEFAULT_BRIGHTNESS,
+    DEFAULT_CURVE,
+    DEFAULT_DAEMON_TRANSITION,
+    DEFAULT_FREQUENCY,
+    DEFAULT_GAMMA,
+    DEFAULT_HARDWARE_PWM,
     DEFAULT_HOST,
+    DEFAULT_MAX_DUTY,
+    DEFAULT_MAX_KELVIN,
+    DEFAULT_MIN_DUTY,
+    DEFAULT_MIN_KELVIN,
     DEFAULT_PORT,
+    DEFAULT_REFRESH_INTERVAL,
+    DOMAIN,
+    EFFECTS,
+    SIGNAL_OPTIONS_UPDATED,
 )
+from .curves import BrightnessCurve
+from .effects import get_effect_player
+from .group import MEMBERS_SCHEMA, GroupMembers
+from .pins import check_hardware_pwm, check_pwm_channels, check_sysfs
+from .publish import StatePublisher
+from .transition import DaemonRamp, Fader
 
 _LOGGER = logging.getLogger(__name__)
 
 SUPPORT_SIMPLE_LED = LightEntityFeature.TRANSITION
+SUPPORT_EFFECT_LED = LightEntityFeature.TRANSITION | LightEntityFeature.EFFECT
 COLORMODE = ColorMode.BRIGHTNESS
+COLOR_MODES = {
+    COLOR_TYPE_RGB: ColorMode.RGB,
+    COLOR_TYPE_RGBW: ColorMode.RGBW,
+    COLOR_TYPE_CCT: ColorMode.COLOR_TEMP,
+}
 
-PLATFORM_SCHEMA = PLATFORM_SCHEMA.extend(
-    {
-        vol.Required(CONF_LEDS): vol.All(
-            cv.ensure_list,
-            [
-                {
-                    vol.Required(CONF_NAME): cv.string,
-                    vol.Required(CONF_PIN): cv.positive_int,
-                    vol.Optional(CONF_FREQUENCY): cv.positive_int,
-                    vol.Optional(CONF_HOST, default=DEFAULT_HOST): cv.string,
-                    vol.Optional(CONF_PORT, default=DEFAULT_PORT): cv.port,
-                    vol.Optional(CONF_UNIQUE_ID): cv.string,
-                }
-            ],
-        )
+
+def _check_duty_range(conf: dict) -> dict:
+    """Check that the minimum duty cycle is below the maximum one."""
+    if conf[CONF_MIN_DUTY] >= conf[CONF_MAX_DUTY]:
+        raise vol.Invalid(f"{CONF_MIN_DUTY} must be lower than {CONF_MAX_DUTY}")
+    return conf
+
+
+def _curve_from_config(conf: Mapping) -> BrightnessCurve:
+    """Build the dimming curve of a LED from its configuration."""
+    return BrightnessCurve(
+        conf.get(CONF_CURVE, DEFAULT_CURVE),
+        conf.get(CONF_GAMMA, DEFAULT_GAMMA),
+        conf.get(CONF_MIN_DUTY, DEFAULT_MIN_DUTY),
+        conf.get(CONF_MAX_DUTY, DEFAULT_MAX_DUTY),
+    )
+
+
+def _led_options(data: Mapping, name: str) -> dict:
+    """Return the options of a LED its entity applies in place."""
+    return {
+        "name": name,
+        "curve": _curve_from_config(data),
+        "frequency": data.get(CONF_FREQUENCY, DEFAULT_FREQUENCY),
+        "refresh_interval": data.get(CONF_REFRESH_INTERVAL, DEFAULT_REFRESH_INTERVAL),
     }
+
+
+PLATFORM_SCHEMA = vol.All(
+    PLATFORM_SCHEMA.extend(
+        {
+            vol.Optional(CONF_LEDS, default=[]): vol.All(
+                cv.ensure_list,
+                [
+                    vol.All(
+                        {
+                            vol.Required(CONF_NAME): cv.string,
+                            vol.Required(CONF_PIN): cv.positive_int,
+                            vol.Optional(CONF_FREQUENCY): cv.positive_int,
+                            vol.Optional(CONF_HOST, default=DEFAULT_HOST): cv.string,
+                            vol.Optional(CONF_PORT, default=DEFAULT_PORT): cv.port,
+                            vol.Optional(CONF_BACKEND, default=DEFAULT_BACKEND): vol.In(
+                                BACKENDS
+                            ),
+                            vol.Optional(
+                                CONF_HARDWARE_PWM, default=DEFAULT_HARDWARE_PWM
+                            ): cv.boolean,
+                            vol.Optional(
+                                CONF_REFRESH_INTERVAL, default=DEFAULT_REFRESH_INTERVAL
+                            ): cv.positive_int,
+                            vol.Optional(
+                                CONF_DAEMON_TRANSITION,
+                                default=DEFAULT_DAEMON_TRANSITION,
+                            ): cv.boolean,
+                            vol.Optional(CONF_CURVE, default=DEFAULT_CURVE): vol.In(
+                                CURVES
+                            ),
+                            vol.Optional(CONF_GAMMA, default=DEFAULT_GAMMA): vol.All(
+                                vol.Coerce(float), vol.Range(min=0.1, max=5)
+                            ),
+                            vol.Optional(
+                                CONF_MIN_DUTY, default=DEFAULT_MIN_DUTY
+                            ): vol.All(vol.Coerce(float), vol.Range(min=0, max=100)),
+                            vol.Optional(
+                                CONF_MAX_DUTY, default=DEFAULT_MAX_DUTY
+                            ): vol.All(vol.Coerce(float), vol.Range(min=0, max=100)),
+                            vol.Optional(CONF_UNIQUE_ID): cv.string,
+                        },
+                        check_hardware_pwm,
+                        check_sysfs,
+                        _check_duty_range,
+                    )
+                ],
+                check_pwm_channels,
+            ),
+            vol.Optional(CONF_GROUPS, default=[]): vol.All(
+                cv.ensure_list,
+                [
+                    vol.All(
+                        {
+                            vol.Required(CONF_NAME): cv.string,
+                            vol.Required(CONF_MEMBERS): MEMBERS_SCHEMA,
+                            vol.Optional(
+                                CONF_FREQUENCY, default=DEFAULT_FREQUENCY
+                            ): cv.positive_int,
+                            vol.Optional(CONF_HOST, default=DEFAULT_HOST): cv.string,
+                            vol.Optional(CONF_PORT, default=DEFAULT_PORT): cv.port,
+                            vol.Optional(
+                                CONF_REFRESH_INTERVAL, default=DEFAULT_REFRESH_INTERVAL
+                            ): cv.positive_int,
+                            vol.Optional(CONF_CURVE, default=DEFAULT_CURVE): vol.In(
+                                CURVES
+                            ),
+                            vol.Optional(CONF_GAMMA, default=DEFAULT_GAMMA): vol.All(
+                                vol.Coerce(float), vol.Range(min=0.1, max=5)
+                            ),
+                            vol.Optional(
+                                CONF_MIN_DUTY, default=DEFAULT_MIN_DUTY
+                            ): vol.All(vol.Coerce(float), vol.Range(min=0, max=100)),
+                            vol.Optional(
+                                CONF_MAX_DUTY, default=DEFAULT_MAX_DUTY
+                            ): vol.All(vol.Coerce(float), vol.Range(min=0, max=100)),
+                            vol.Optional(CONF_UNIQUE_ID): cv.string,
+                        },
+                        _check_duty_range,
+                    )
+                ],
+            ),
+        }
+    ),
+    cv.has_at_least_one_key(CONF_LEDS, CONF_GROUPS),
 )
 
 
-def setup_platform(
+async def async_setup_platform(
     hass: HomeAssistant,
     config: ConfigType,
-    add_entities: AddEntitiesCallback,
+    async_add_entities: AddEntitiesCallback,
     discovery_info: DiscoveryInfoType | None = None,
 ) -> None:
     """Set up the PWM LED lights."""
+    registry = get_registry(hass)
     leds = []
     for led_conf in config[CONF_LEDS]:
         pin = led_conf[CONF_PIN]
-        opt_args = {}
-        if CONF_FREQUENCY in led_conf:
-            opt_args["frequency"] = led_conf[CONF_FREQUENCY]
-        opt_args["pin_factory"] = PiGPIOFactory(
-            host=led_conf[CONF_HOST], port=led_conf[CONF_PORT]
+        connection = await registry.async_acquire(
+            led_conf[CONF_HOST], led_conf[CONF_PORT], led_conf[CONF_BACKEND]
         )
         led = PwmSimpleLed(
-            led=PWMLED(pin, **opt_args),
+            pin=pin,
             name=led_conf[CONF_NAME],
             unique_id=led_conf[CONF_UNIQUE_ID],
             hass=hass,
+            curve=_curve_from_config(led_conf),
+            hardware_pwm=led_conf[CONF_HARDWARE_PWM],
+            refresh_interval=led_conf[CONF_REFRESH_INTERVAL],
+            frequency=led_conf.get(CONF_FREQUENCY, DEFAULT_FREQUENCY),
+            daemon_transition=led_conf[CONF_DAEMON_TRANSITION],
+            connection=connection,
+            owns_connection=True,
         )
         leds.append(led)
+    for group_conf in config[CONF_GROUPS]:
+        connection = await registry.async_acquire(
+            group_conf[CONF_HOST], group_conf[CONF_PORT]
+        )
+        leds.append(
+            PwmGroupLed(
+                members=GroupMembers(group_conf[CONF_MEMBERS]),
+                name=group_conf[CONF_NAME],
+                unique_id=group_conf.get(CONF_UNIQUE_ID),
+                hass=hass,
+                curve=_curve_from_config(group_conf),
+                refresh_interval=group_conf[CONF_REFRESH_INTERVAL],
+                frequency=group_conf[CONF_FREQUENCY],
+                connection=connection,
+                owns_connection=True,
+            )
+        )
 
-    add_entities(leds)
+    async_add_entities(leds)
 
 
 # Transform the configEntry from config_flow into an entity
@@ -97,44 +268,150 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up light from the ConfigEntry configuration created in the integrations UI."""
+    if CONF_CHANNELS in config_entry.data:
+        await _async_setup_device_entry(hass, config_entry, async_add_entities)
+        return
+    # Do not create entity if is not a light
+    if CONF_LIGHT not in config_entry.title:
+        return
+    if CONF_COLOR_TYPE in config_entry.data:
+        await _async_setup_color_entry(hass, config_entry, async_add_entities)
+        return
     pin = config_entry.data.get(CONF_PIN)
-    opt_args = {}
-    opt_args["frequency"] = config_entry.data.get(CONF_FREQUENCY)
-    opt_args["pin_factory"] = PiGPIOFactory(
-        host=config_entry.data.get(CONF_HOST), port=config_entry.data.get(CONF_PORT)
-    )
+    # The connection is shared with other entries and owned by __init__
+    connection = hass.data[DOMAIN][config_entry.entry_id][DATA_CONNECTION]
     entity1 = PwmSimpleLed(
-        led=PWMLED(pin, **opt_args),
+        pin=pin,
         hass=hass,
         config_entry=config_entry,
+        connection=connection,
+        curve=_curve_from_config(config_entry.data),
     )
-    # Do not create entity if is not a light
-    if CONF_LIGHT not in config_entry.title:
-        pass
-    else:
-        async_add_entities([entity1], update_before_add=True)
+    async_add_entities([entity1])
 
+    async def async_options_updated(data: Mapping) -> None:
+        await entity1.async_update_options(**_led_options(data, data.get(CONF_NAME)))
+
+    config_entry.async_on_unload(
+        async_dispatcher_connect(
+            hass,
+            SIGNAL_OPTIONS_UPDATED.format(config_entry.entry_id),
+            async_options_updated,
+        )
+    )
 
-class PwmSimpleLed(LightEntity, RestoreEntity):
-    """Representation of a simple one-color PWM LED."""
+
+async def _async_setup_device_entry(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Set up the light channels of a device, one entity per pin."""
+    data = config_entry.data
+    connection = hass.data[DOMAIN][config_entry.entry_id][DATA_CONNECTION]
+    frequency = data.get(CONF_FREQUENCY, DEFAULT_FREQUENCY)
+    # pin -> LED of every light channel
+    leds = {
+        channel[CONF_PIN]: PwmSimpleLed(
+            pin=channel[CONF_PIN],
+            name=channel[CONF_NAME],
+            unique_id=f"{config_entry.entry_id}_{channel[CONF_PIN]}",
+            hass=hass,
+            curve=_curve_from_config(data),
+            hardware_pwm=False,
+            refresh_interval=data.get(CONF_REFRESH_INTERVAL, DEFAULT_REFRESH_INTERVAL),
+            frequency=frequency,
+            daemon_transition=data.get(
+                CONF_DAEMON_TRANSITION, DEFAULT_DAEMON_TRANSITION
+            ),
+            connection=connection,
+        )
+        for channel in data[CONF_CHANNELS]
+        if channel[CONF_PLATFORM] == CONF_LIGHT
+    }
+    async_add_entities(list(leds.values()))
+
+    async def async_options_updated(data: Mapping) -> None:
+        for channel in data[CONF_CHANNELS]:
+            if channel[CONF_PIN] in leds:
+                await leds[channel[CONF_PIN]].async_update_options(
+                    **_led_options(data, channel[CONF_NAME])
+                )
+
+    config_entry.async_on_unload(
+        async_dispatcher_connect(
+            hass,
+            SIGNAL_OPTIONS_UPDATED.format(config_entry.entry_id),
+            async_options_updated,
+        )
+    )
+
+
+async def _async_setup_color_entry(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Set up a color light driving one pin per channel."""
+    connection = hass.data[DOMAIN][config_entry.entry_id][DATA_CONNECTION]
+    pins = [
+        config_entry.data[key]
+        for key in COLOR_CHANNELS[config_entry.data[CONF_COLOR_TYPE]]
+    ]
+    entity = PwmColorLed(
+        pins=pins,
+        hass=hass,
+        config_entry=config_entry,
+        connection=connection,
+        curve=_curve_from_config(config_entry.data),
+    )
+    async_add_entities([entity])
+
+    async def async_options_updated(data: Mapping) -> None:
+        await entity.async_update_options(
+            **_led_options(data, data.get(CONF_NAME)),
+            min_kelvin=data.get(CONF_MIN_KELVIN, DEFAULT_MIN_KELVIN),
+            max_kelvin=data.get(CONF_MAX_KELVIN, DEFAULT_MAX_KELVIN),
+        )
+
+    config_entry.async_on_unload(
+        async_dispatcher_connect(
+            hass,
+            SIGNAL_OPTIONS_UPDATED.format(config_entry.entry_id),
+            async_options_updated,
+        )
+    )
+
+
+class PwmLed(LightEntity, RestoreEntity):
+    """Base of the one-color PWM LEDs, on one pin or dimming several as one.
+
+    Subclasses turn a level into the duty cycle of each of their pins, which
+    are all written in the same burst.
+    """
 
     def __init__(self, **kwarg) -> None:
-        """Initialize one-color PWM LED."""
+        """Initialize the one-color PWM LED on its pins."""
         self._hass = kwarg["hass"]
         self._attr_has_entity_name = True
-        self._led = kwarg["led"]
-        self._name = (
-            kwarg["config_entry"].data.get(CONF_NAME)
-            if "config_entry" in kwarg
-            else kwarg["name"]
-        )
-        self._unique_id = (
-            kwarg["config_entry"].entry_id
-            if "config_entry" in kwarg
-            else kwarg["unique_id"]
-        )
+        self._publisher = StatePublisher(self._hass, self.async_write_ha_state)
+        # The pins are set up once the connection to pigpiod is available
+        self._pins_ready = False
+        self._pins = kwarg["pins"]
+        self._connection = kwarg["connection"]
+        # YAML entities own their connection, config entries share the one of the entry
+        self._owns_connection = kwarg.get("owns_connection", False)
+        self._curve = kwarg["curve"]
+        self._frequency = kwarg["frequency"]
+        for pin in self._pins:
+            self._connection.set_refresh_interval(pin, kwarg["refresh_interval"])
+        self._name = kwarg["name"]
+        self._unique_id = kwarg["unique_id"]
         self._is_on = False
         self._brightness = DEFAULT_BRIGHTNESS
+        self._effect = None
+        self._ramp = kwarg.get("ramp")
+        self._fader = Fader(self._hass, self._async_write_value, self._ramp)
 
     async def async_added_to_hass(self):
         """Handle entity about to be added to hass event."""
@@ -144,12 +421,81 @@ class PwmSimpleLed(LightEntity, RestoreEntity):
             self._brightness = last_state.attributes.get(
                 "brightness", DEFAULT_BRIGHTNESS
             )
+            if last_state.attributes.get("effect") in EFFECTS:
+                self._effect = last_state.attributes["effect"]
+        # Without a state to restore, the LED takes the one of its first pin
+        self._restored = last_state is not None
+        # Set the pins up once pigpiod is reachable, which may be later
+        self.async_on_remove(
+            self._connection.async_add_listener(self._async_connection_changed)
+        )
+        if self._connection.available:
+            await self._async_connection_changed()
+
+    async def _async_connection_changed(self) -> None:
+        """Set the pins up on a connection that came back, drop them on a lost one."""
+        if not self._connection.available:
+            # The pin setup of a lost daemon is gone with it
+            self._fader.cancel()
+            self._pins_ready = False
+        elif not self._pins_ready:
+            values = [
+                await self._connection.async_setup_pin(pin, self._frequency)
+                for pin in self._pins
+            ]
+            if not self._restored and values[0] is not None:
+                self._is_on = values[0] > 0
+                if self._is_on:
+                    level = self._curve.level(self._duty(values[0]))
+                    self._brightness = max(1, round(level * 255))
+            self._restored = True
+            self._pins_ready = True
+            # Only written to the pins which do not have it already
+            level = _from_hass_brightness(self._brightness) if self._is_on else 0
+            await self._async_write_value(level)
+            self._fader.value = level
+            if self._is_on and self._effect is not None:
+                self._start_effect()
+        self.async_write_ha_state()
+
+    async def async_update_options(self, **kwarg) -> None:
+        """Apply changed options to the LED in place, the output never drops."""
+        self._name = kwarg["name"]
+        for pin in self._pins:
+            self._connection.set_refresh_interval(pin, kwarg["refresh_interval"])
+        if kwarg["frequency"] != self._frequency:
+            self._frequency = kwarg["frequency"]
+            for pin in self._pins:
+                await self._connection.async_set_frequency(pin, self._frequency)
+        self._curve = kwarg["curve"]
+        if self._ramp is not None:
+            self._ramp.curve = self._curve
+        if self._is_on and self.available:
+            await self._async_write_value(self._fader.value)
+        self.async_write_ha_state()
+
+    async def async_will_remove_from_hass(self):
+        """Release the pins and the connection of the entity."""
+        self._publisher.cancel()
+        get_effect_player(self.hass).stop(self)
+        await self._fader.async_close()
+        for pin in self._pins:
+            await self._connection.async_release_pin(pin)
+        if self._owns_connection:
+            await get_registry(self.hass).async_release(
+                self._connection.host, self._connection.port
+            )
 
     @property
     def should_poll(self):
         """No polling needed."""
         return False
 
+    @property
+    def available(self):
+        """Return true once the pins are set up on pigpiod."""
+        return self._connection.available and self._pins_ready
+
     @property
     def name(self):
         """Return the name of the group."""
@@ -170,6 +516,16 @@ class PwmSimpleLed(LightEntity, RestoreEntity):
         """Return the brightness property."""
         return self._brightness
 
+    @property
+    def effect_list(self):
+        """Return the effects the light can run."""
+        return EFFECTS
+
+    @property
+    def effect(self):
+        """Return the running effect."""
+        return self._effect
+
     @property
     def supported_color_modes(self):
         """Return the flag supported_color_modes property."""
@@ -183,24 +539,353 @@ class PwmSimpleLed(LightEntity, RestoreEntity):
     @property
     def supported_features(self):
         """Flag supported features."""
-        return SUPPORT_SIMPLE_LED
+        return SUPPORT_EFFECT_LED
 
-    def turn_on(self, **kwargs):
+    async def async_turn_on(self, **kwargs):
         """Turn on a led."""
         if ATTR_BRIGHTNESS in kwargs:
             self._brightness = kwargs[ATTR_BRIGHTNESS]
-        self._led.value = _from_hass_brightness(self._brightness)
+        if kwargs.get(ATTR_EFFECT, self._effect) in EFFECTS:
+            # A new brightness scales the running effect
+            await self._fader.async_stop()
+            self._effect = kwargs.get(ATTR_EFFECT, self._effect)
+            self._start_effect()
+        else:
+            self._stop_effect()
+            await self._async_apply(_from_hass_brightness(self._brightness), kwargs)
         self._is_on = True
-        self.schedule_update_ha_state()
+        self._publisher.publish()
 
-    def turn_off(self, **kwargs):
+    async def async_turn_off(self, **kwargs):
         """Turn off a LED."""
+        self._stop_effect()
         if self.is_on:
-            self._led.off()
+            await self._async_apply(0, kwargs)
         self._is_on = False
-        self.schedule_update_ha_state()
+        self._publisher.publish()
+
+    async def _async_apply(self, value: float, kwargs) -> None:
+        """Move the LED to a level, fading if a transition is requested."""
+        transition = kwargs.get(ATTR_TRANSITION)
+        if transition:
+            await self._fader.async_fade(value, transition)
+        else:
+            await self._fader.async_set(value)
+
+    def _start_effect(self) -> None:
+        """Hand the pins over to the effect player."""
+        get_effect_player(self.hass).start(
+            self,
+            self._connection,
+            self._effect,
+            self._duties,
+            _from_hass_brightness(self._brightness),
+        )
+
+    def _stop_effect(self) -> None:
+        """Take the pins back from the effect player, where it left them."""
+        if self._effect is None:
+            return
+        level = get_effect_player(self.hass).stop(self)
+        if level is not None:
+            self._fader.value = level
+        self._effect = None
+
+    async def _async_write_value(self, level: float) -> None:
+        """Write the duty cycles of a level to every pin in one burst."""
+        await self._connection.async_set_values(self._duties(level))
+
+    def _duties(self, level: float) -> dict[int, float]:
+        """Return the duty cycle of every pin for a level."""
+        return {pin: self._curve.duty(level) for pin in self._pins}
+
+    def _duty(self, value: float) -> float:
+        """Return the duty cycle of the LED a value of its first pin stands for."""
+        return value
+
+
+class PwmSimpleLed(PwmLed):
+    """Representation of a simple one-color PWM LED."""
+
+    def __init__(self, **kwarg) -> None:
+        """Initialize one-color PWM LED."""
+        if "config_entry" in kwarg:
+            data = kwarg["config_entry"].data
+            kwarg.update(
+                hardware_pwm=data.get(CONF_HARDWARE_PWM, DEFAULT_HARDWARE_PWM),
+                frequency=data.get(CONF_FREQUENCY, DEFAULT_FREQUENCY),
+                refresh_interval=data.get(
+                    CONF_REFRESH_INTERVAL, DEFAULT_REFRESH_INTERVAL
+                ),
+                name=data.get(CONF_NAME),
+                unique_id=kwarg["config_entry"].entry_id,
+                daemon_transition=data.get(
+                    CONF_DAEMON_TRANSITION, DEFAULT_DAEMON_TRANSITION
+                ),
+            )
+        if kwarg["hardware_pwm"]:
+            kwarg["connection"].set_hardware_pwm(kwarg["pin"], kwarg["frequency"])
+        # Scripts drive the software PWM, not the PWM peripheral
+        if kwarg["daemon_transition"] and not kwarg["hardware_pwm"]:
+            kwarg["ramp"] = DaemonRamp(
+                kwarg["connection"], kwarg["pin"], kwarg["curve"]
+            )
+        super().__init__(pins=[kwarg["pin"]], **kwarg)
 
 
 def _from_hass_brightness(brightness):
-    """Convert Home Assistant brightness units to percentage."""
+    """Convert Home Assistant brightness units to a level between 0 and 1."""
     return brightness / 255
+
+
+class PwmColorLed(LightEntity, RestoreEntity):
+    """Representation of a RGB, RGBW or CCT PWM LED driving one pin per channel."""
+
+    def __init__(self, **kwarg) -> None:
+        """Initialize the color PWM LED."""
+        self._hass = kwarg["hass"]
+        self._attr_has_entity_name = True
+        self._publisher = StatePublisher(self._hass, self.async_write_ha_state)
+        # The pins are set up once the connection to pigpiod is available
+        self._pins_ready = False
+        self._pins = kwarg["pins"]
+        self._connection = kwarg["connection"]
+        self._curve = kwarg["curve"]
+        data = kwarg["config_entry"].data
+        for pin in self._pins:
+            self._connection.set_refresh_interval(
+                pin, data.get(CONF_REFRESH_INTERVAL, DEFAULT_REFRESH_INTERVAL)
+            )
+        self._name = data.get(CONF_NAME)
+        self._unique_id = kwarg["config_entry"].entry_id
+        self._color_type = data[CONF_COLOR_TYPE]
+        self._frequency = data.get(CONF_FREQUENCY, DEFAULT_FREQUENCY)
+        self._min_kelvin = data.get(CONF_MIN_KELVIN, DEFAULT_MIN_KELVIN)
+        self._max_kelvin = data.get(CONF_MAX_KELVIN, DEFAULT_MAX_KELVIN)
+        self._is_on = False
+        self._brightness = DEFAULT_BRIGHTNESS
+        self._rgb_color = (255, 255, 255)
+        self._rgbw_color = (0, 0, 0, 255)
+        self._color_temp_kelvin = (self._min_kelvin + self._max_kelvin) // 2
+        # Channel levels last written, and the two ends of the running fade
+        self._levels = [0.0] * len(self._pins)
+        self._fade_from = self._levels
+        self._fade_to = self._levels
+        # The fader drives the progress of a fade from 0 to 1
+        self._fader = Fader(self._hass, self._async_write_progress)
+
+    async def async_added_to_hass(self):
+        """Handle entity about to be added to hass event."""
+        await super().async_added_to_hass()
+        if last_state := await self.async_get_last_state():
+            self._is_on = last_state.state == STATE_ON
+            attributes = last_state.attributes
+            self._brightness = attributes.get("brightness") or DEFAULT_BRIGHTNESS
+            if attributes.get("rgb_color"):
+                self._rgb_color = tuple(attributes["rgb_color"])
+            if attributes.get("rgbw_color"):
+                self._rgbw_color = tuple(attributes["rgbw_color"])
+            if attributes.get("color_temp_kelvin"):
+                self._color_temp_kelvin = attributes["color_temp_kelvin"]
+        # Set the pins up once pigpiod is reachable, which may be later
+        self.async_on_remove(
+            self._connection.async_add_listener(self._async_connection_changed)
+        )
+        if self._connection.available:
+            await self._async_connection_changed()
+
+    async def _async_connection_changed(self) -> None:
+        """Set the LEDs up on a connection that came back, drop them on a lost one."""
+        if not self._connection.available:
+            # The pin setup of a lost daemon is gone with it
+            self._fader.cancel()
+            self._pins_ready = False
+        elif not self._pins_ready:
+            for pin in self._pins:
+                await self._connection.async_setup_pin(pin, self._frequency)
+            self._pins_ready = True
+            # Only written to the pins which do not have them already
+            self._fade_from = self._fade_to = (
+                self._channel_levels() if self._is_on else [0.0] * len(self._pins)
+            )
+            await self._async_write_progress(1.0)
+        self.async_write_ha_state()
+
+    async def async_update_options(self, **kwarg) -> None:
+        """Apply changed options to the LEDs in place, the output never drops."""
+        self._name = kwarg["name"]
+        for pin in self._pins:
+            self._connection.set_refresh_interval(pin, kwarg["refresh_interval"])
+        if kwarg["frequency"] != self._frequency:
+            self._frequency = kwarg["frequency"]
+            for pin in self._pins:
+                await self._connection.async_set_frequency(pin, self._frequency)
+        self._curve = kwarg["curve"]
+        self._min_kelvin = kwarg["min_kelvin"]
+        self._max_kelvin = kwarg["max_kelvin"]
+        self._color_temp_kelvin = min(
+            max(self._color_temp_kelvin, self._min_kelvin), self._max_kelvin
+        )
+        if self._is_on and self.available:
+            await self._async_apply(self._channel_levels(), {})
+        self.async_write_ha_state()
+
+    async def async_will_remove_from_hass(self):
+        """Release the pins of the entity."""
+        self._publisher.cancel()
+        self._fader.cancel()
+        for pin in self._pins:
+            await self._connection.async_release_pin(pin)
+
+    @property
+    def should_poll(self):
+        """No polling needed."""
+        return False
+
+    @property
+    def available(self):
+        """Return true once the pins are set up on pigpiod."""
+        return self._connection.available and self._pins_ready
+
+    @property
+    def name(self):
+        """Return the name of the group."""
+        return self._name
+
+    @property
+    def unique_id(self):
+        """Return the unique id."""
+        return self._unique_id
+
+    @property
+    def is_on(self):
+        """Return true if device is on."""
+        return self._is_on
+
+    @property
+    def brightness(self):
+        """Return the brightness property."""
+        return self._brightness
+
+    @property
+    def rgb_color(self):
+        """Return the rgb color property."""
+        return self._rgb_color
+
+    @property
+    def rgbw_color(self):
+        """Return the rgbw color property."""
+        return self._rgbw_color
+
+    @property
+    def color_temp_kelvin(self):
+        """Return the color temperature property."""
+        return self._color_temp_kelvin
+
+    @property
+    def min_color_temp_kelvin(self):
+        """Return the warmest color temperature."""
+        return self._min_kelvin
+
+    @property
+    def max_color_temp_kelvin(self):
+        """Return the coldest color temperature."""
+        return self._max_kelvin
+
+    @property
+    def supported_color_modes(self):
+        """Return the flag supported_color_modes property."""
+        return {COLOR_MODES[self._color_type]}
+
+    @property
+    def color_mode(self):
+        """Return the color_mode property."""
+        return COLOR_MODES[self._color_type]
+
+    @property
+    def supported_features(self):
+        """Flag supported features."""
+        return SUPPORT_SIMPLE_LED
+
+    async def async_turn_on(self, **kwargs):
+        """Turn on the LED."""
+        if ATTR_BRIGHTNESS in kwargs:
+            self._brightness = kwargs[ATTR_BRIGHTNESS]
+        if ATTR_RGB_COLOR in kwargs:
+            self._rgb_color = kwargs[ATTR_RGB_COLOR]
+        if ATTR_RGBW_COLOR in kwargs:
+            self._rgbw_color = kwargs[ATTR_RGBW_COLOR]
+        if ATTR_COLOR_TEMP_KELVIN in kwargs:
+            self._color_temp_kelvin = min(
+                max(kwargs[ATTR_COLOR_TEMP_KELVIN], self._min_kelvin),
+                self._max_kelvin,
+            )
+        await self._async_apply(self._channel_levels(), kwargs)
+        self._is_on = True
+        self._publisher.publish()
+
+    async def async_turn_off(self, **kwargs):
+        """Turn off the LED."""
+        if self.is_on:
+            await self._async_apply([0.0] * len(self._pins), kwargs)
+        self._is_on = False
+        self._publisher.publish()
+
+    def _channel_levels(self) -> list[float]:
+        """Return the level of every channel for the current color."""
+        level = _from_hass_brightness(self._brightness)
+        if self._color_type == COLOR_TYPE_CCT:
+            warm = (self._max_kelvin - self._color_temp_kelvin) / (
+                self._max_kelvin - self._min_kelvin
+            )
+            return [(1 - warm) * level, warm * level]
+        color = (
+            self._rgb_color if self._color_type == COLOR_TYPE_RGB else self._rgbw_color
+        )
+        return [_from_hass_brightness(value) * level for value in color]
+
+    async def _async_apply(self, levels: list[float], kwargs) -> None:
+        """Move all channels to their levels together, fading if requested."""
+        await self._fader.async_stop()
+        self._fade_from = self._levels
+        self._fade_to = levels
+        self._fader.value = 0.0
+        transition = kwargs.get(ATTR_TRANSITION)
+        if transition:
+            await self._fader.async_fade(1.0, transition)
+        else:
+            await self._fader.async_set(1.0)
+
+    async def _async_write_progress(self, progress: float) -> None:
+        """Write every channel at some progress of the fade in one burst."""
+        self._levels = [
+            start + (end - start) * progress
+            for start, end in zip(self._fade_from, self._fade_to)
+        ]
+        await self._connection.async_set_values(
+            {
+                pin: self._curve.duty(level)
+                for pin, level in zip(self._pins, self._levels)
+            }
+        )
+
+
+class PwmGroupLed(PwmLed):
+    """Representation of one-color PWM LEDs on several pins, dimmed as one.
+
+    Every pin of the group is written in the same burst, so the members of
+    a group switch and fade together instead of one after the other.
+    """
+
+    def __init__(self, **kwarg) -> None:
+        """Initialize the group of PWM LEDs."""
+        self._members = kwarg["members"]
+        super().__init__(pins=self._members.pins, **kwarg)
+
+    def _duties(self, level: float) -> dict[int, float]:
+        """Return the duty cycle of every member pin for a level."""
+        return self._members.duties(self._curve.duty(level))
+
+    def _duty(self, value: float) -> float:
+        """Return the duty cycle of the group a value of its first pin stands for."""
+        return self._members.group_duty(value)
@@ -0,0 +1,199 @@
+"""Asyncio client for the pigpiod socket interface."""
+
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+import logging
+import struct
+
+from .backend import PwmError
+
+_LOGGER = logging.getLogger(__name__)
+
+# Command numbers of the pigpiod socket interface
+CMD_PWM = 5
+CMD_PFS = 7
+CMD_PRG = 22
+CMD_PFG = 23
+CMD_PIGPV = 26
+CMD_GDC = 83
+CMD_HP = 86
+
+# Duty cycles of hardware PWM are given in millionths
+HARDWARE_PWM_RANGE = 1_000_000
+
+COMMAND_TIMEOUT = 5
+
+# Every request and response starts with four 32 bit little endian words:
+# command, p1, p2 and p3. In a request p3 is the length of the extension
+# following it, in a response p3 is the (signed) result.
+_HEADER = struct.Struct("<IIII")
+_RESPONSE = struct.Struct("<IIIi")
+_UINT = struct.Struct("<I")
+
+
+class PigpiodError(PwmError):
+    """Error returned by pigpiod or raised by the connection to it."""
+
+
+class PigpiodClient:
+    """Pipelined connection to one pigpiod daemon.
+
+    Commands are written as soon as they are issued and pigpiod answers them
+    in order, so any number of them can be in flight without a thread each.
+    """
+
+    def __init__(self, host: str, port: int) -> None:
+        """Initialize the client, async_connect() opens the socket."""
+        self.host = host
+        self.port = port
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+        self._read_task: asyncio.Task | None = None
+        self._pending: deque[asyncio.Future[int]] = deque()
+        self._connect_lock = asyncio.Lock()
+        # Resolved with the error when the socket of a connection is lost
+        self._lost: asyncio.Future[PigpiodError] | None = None
+
+    @property
+    def connected(self) -> bool:
+        """Return True if the socket to pigpiod is open."""
+        return self._writer is not None
+
+    async def async_wait_lost(self) -> PigpiodError:
+        """Wait until the socket is lost or closed and return why."""
+        return await asyncio.shield(self._lost)
+
+    async def async_connect(self) -> None:
+        """Open the socket to pigpiod if it is not open yet."""
+        async with self._connect_lock:
+            if self._writer is not None:
+                return
+            try:
+                self._reader, self._writer = await asyncio.wait_for(
+                    asyncio.open_connection(self.host, self.port), COMMAND_TIMEOUT
+                )
+            except (OSError, asyncio.TimeoutError) as err:
+                raise PigpiodError(
+                    f"Cannot connect to pigpiod on {self.host}:{self.port}: {err}"
+                ) from err
+            loop = asyncio.get_running_loop()
+            self._lost = loop.create_future()
+            self._read_task = loop.create_task(self._async_read_responses())
+
+    async def async_close(self) -> None:
+        """Close the socket and fail the commands still in flight."""
+        if self._read_task is not None:
+            self._read_task.cancel()
+            self._read_task = None
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        self._reader = None
+        err = PigpiodError("Connection to pigpiod closed")
+        self._fail_pending(err)
+        self._set_lost(err)
+
+    async def async_command(
+        self, cmd: int, p1: int = 0, p2: int = 0, extension: bytes = b""
+    ) -> int:
+        """Send one command and return its result."""
+        return await self.async_wait(self.send(cmd, p1, p2, extension))
+
+    def send(
+        self, cmd: int, p1: int = 0, p2: int = 0, extension: bytes = b""
+    ) -> asyncio.Future[int]:
+        """Queue one command without waiting and return its future result.
+
+        The socket must be connected.
+        """
+        if self._writer is None:
+            raise PigpiodError(f"Not connected to pigpiod on {self.host}:{self.port}")
+        future: asyncio.Future[int] = asyncio.get_running_loop().create_future()
+        # Appending and writing without awaiting in between keeps the order
+        # of the futures identical to the order of the responses.
+        self._pending.append(future)
+        self._writer.write(_HEADER.pack(cmd, p1, p2, len(extension)) + extension)
+        return future
+
+    async def async_wait(self, future: asyncio.Future[int]) -> int:
+        """Wait for a result, dropping the connection if pigpiod stalls."""
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), COMMAND_TIMEOUT)
+        except asyncio.TimeoutError as err:
+            # Later responses can no longer be matched to their command
+            await self.async_close()
+            raise PigpiodError(
+                f"pigpiod on {self.host}:{self.port} did not answer"
+            ) from err
+
+    async def _async_read_responses(self) -> None:
+        """Resolve the pending commands in order as their responses arrive."""
+        try:
+            while True:
+                data = await self._reader.readexactly(_RESPONSE.size)
+                cmd, _, _, result = _RESPONSE.unpack(data)
+                if not self._pending:
+                    continue
+                future = self._pending.popleft()
+                if future.done():
+                    continue
+                if result < 0:
+                    future.set_exception(
+                        PigpiodError(f"pigpiod command {cmd} failed with {result}")
+                    )
+                else:
+                    future.set_result(result)
+        except (OSError, asyncio.IncompleteReadError) as err:
+            _LOGGER.debug("Lost pigpiod on %s:%s: %s", self.host, self.port, err)
+            if self._writer is not None:
+                self._writer.close()
+            self._writer = None
+            self._reader = None
+            self._read_task = None
+            lost = PigpiodError(f"Lost connection to pigpiod: {err}")
+            self._fail_pending(lost)
+            self._set_lost(lost)
+
+    def _set_lost(self, err: PigpiodError) -> None:
+        """Tell whoever waits on the connection that it is gone."""
+        if self._lost is not None and not self._lost.done():
+            self._lost.set_result(err)
+
+    def _fail_pending(self, err: PigpiodError) -> None:
+        """Fail every command still waiting for a response."""
+        while self._pending:
+            future = self._pending.popleft()
+            if not future.done():
+                future.set_exception(err)
+
+    async def async_set_pwm_dutycycle(self, pin: int, duty: int) -> None:
+        """Set the PWM duty cycle of a pin, in units of its PWM range."""
+        await self.async_command(CMD_PWM, pin, duty)
+
+    async def async_get_pwm_range(self, pin: int) -> int:
+        """Return the PWM range of a pin."""
+        return await self.async_command(CMD_PRG, pin)
+
+    async def async_set_pwm_frequency(self, pin: int, frequency: int) -> int:
+        """Set the PWM frequency of a pin and return the one it got."""
+        return await self.async_command(CMD_PFS, pin, frequency)
+
+    async def async_get_pwm_frequency(self, pin: int) -> int:
+        """Return the PWM frequency of a pin."""
+        return await self.async_command(CMD_PFG, pin)
+
+    async def async_get_pwm_dutycycle(self, pin: int) -> int:
+        """Return the PWM duty cycle of a pin, in units of its PWM range."""
+        return await self.async_command(CMD_GDC, pin)
+
+    async def async_get_version(self) -> int:
+        """Return the pigpio version of the daemon."""
+        return await self.async_command(CMD_PIGPV)
+
+    def send_hardware_pwm(
+        self, pin: int, frequency: int, duty: int
+    ) -> asyncio.Future[int]:
+        """Queue a hardware PWM setting, duty in units of HARDWARE_PWM_RANGE."""
+        return self.send(CMD_HP, pin, frequency, _UINT.pack(duty))
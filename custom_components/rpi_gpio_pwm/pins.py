@@ -0,0 +1,178 @@
+"""Pin allocation index for the rpi_gpio_pwm component."""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+from typing import Any
+
+import voluptuous as vol
+
+from homeassistant.const import CONF_HOST
+from homeassistant.core import HomeAssistant, callback
+
+from .const import (
+    BACKEND_SYSFS,
+    COLOR_CHANNELS,
+    CONF_BACKEND,
+    CONF_CHANNELS,
+    CONF_COLOR_TYPE,
+    CONF_HARDWARE_PWM,
+    CONF_PIN,
+    CONF_TACH_PIN,
+    DATA_PIN_INDEX,
+    DEFAULT_HOST,
+    DOMAIN,
+    GPIO_PINS,
+    HARDWARE_PWM_CHANNELS,
+    HARDWARE_PWM_PINS,
+)
+from .sysfs import LOCAL_HOST
+
+
+def entry_pins(data: Mapping[str, Any]) -> list[int]:
+    """Return the pins used by the data of a config entry."""
+    if CONF_CHANNELS in data:
+        return [channel[CONF_PIN] for channel in data[CONF_CHANNELS]]
+    if CONF_COLOR_TYPE in data:
+        return [
+            data[key]
+            for key in COLOR_CHANNELS[data[CONF_COLOR_TYPE]]
+            if data.get(key) is not None
+        ]
+    if data.get(CONF_TACH_PIN) is not None:
+        return [data.get(CONF_PIN), data[CONF_TACH_PIN]]
+    return [data.get(CONF_PIN)]
+
+
+def entry_host(data: Mapping[str, Any]) -> str | None:
+    """Return the host whose pins a config entry or YAML entity drives.
+
+    The sysfs backend drives the pins of the machine Home Assistant runs on,
+    whatever host was entered.
+    """
+    if data.get(CONF_BACKEND) == BACKEND_SYSFS:
+        return LOCAL_HOST
+    return data.get(CONF_HOST)
+
+
+def hardware_pwm_channel(data: Mapping[str, Any]) -> int | None:
+    """Return the channel of the PWM peripheral a light or fan drives, if any."""
+    if not data.get(CONF_HARDWARE_PWM):
+        return None
+    return HARDWARE_PWM_CHANNELS.get(data.get(CONF_PIN))
+
+
+def check_hardware_pwm(conf: dict) -> dict:
+    """Check that a pin configured for hardware PWM has a PWM peripheral."""
+    if conf[CONF_HARDWARE_PWM] and conf[CONF_PIN] not in HARDWARE_PWM_PINS:
+        raise vol.Invalid(
+            f"GPIO {conf[CONF_PIN]} does not support hardware PWM, use one of {HARDWARE_PWM_PINS}"
+        )
+    return conf
+
+
+def check_sysfs(conf: dict) -> dict:
+    """Check that a pin driven through sysfs uses the PWM peripheral."""
+    if conf[CONF_BACKEND] == BACKEND_SYSFS and not conf[CONF_HARDWARE_PWM]:
+        raise vol.Invalid(f"The {BACKEND_SYSFS} backend requires {CONF_HARDWARE_PWM}")
+    return conf
+
+
+def check_pwm_channels(confs: list[dict]) -> list[dict]:
+    """Check that no two hardware PWM pins of a host share a channel.
+
+    GPIO 12 and 18 share one channel of the PWM peripheral and GPIO 13 and
+    19 the other, two pins on one channel overwrite each other.
+    """
+    users: dict[tuple[str, int], int] = {}
+    for conf in confs:
+        channel = hardware_pwm_channel(conf)
+        if channel is None:
+            continue
+        pin = users.setdefault((_host_key(entry_host(conf)), channel), conf[CONF_PIN])
+        if pin != conf[CONF_PIN]:
+            raise vol.Invalid(
+                f"GPIO {conf[CONF_PIN]} shares PWM channel {channel} with GPIO {pin}"
+            )
+    return confs
+
+
+def _host_key(host: str | None) -> str:
+    """Return the key of a host, pins on different hosts never conflict."""
+    return (host or DEFAULT_HOST).strip().lower()
+
+
+class PinIndex:
+    """Map (host, pin) to the config entry that uses it.
+
+    Built from the config entries of the domain on first use, then kept up to
+    date as entries are set up, updated and removed. Unloaded and disabled
+    entries keep their pins, so a pin is never handed out twice. The
+    channels of the PWM peripheral are indexed the same way.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty index."""
+        self._owners: dict[tuple[str, int], str] = {}
+        self._entries: dict[str, list[tuple[str, int]]] = {}
+        # (host, channel of the PWM peripheral) -> config entry driving it
+        self._channel_owners: dict[tuple[str, int], str] = {}
+
+    @callback
+    def async_set_entry(self, entry_id: str, data: Mapping[str, Any]) -> None:
+        """Record the pins of a config entry, replacing the ones it had."""
+        self.async_remove_entry(entry_id)
+        host = _host_key(entry_host(data))
+        keys = [(host, pin) for pin in entry_pins(data) if pin is not None]
+        for key in keys:
+            self._owners[key] = entry_id
+        self._entries[entry_id] = keys
+        if (channel := hardware_pwm_channel(data)) is not None:
+            self._channel_owners[(host, channel)] = entry_id
+
+    @callback
+    def async_remove_entry(self, entry_id: str) -> None:
+        """Forget the pins of a config entry."""
+        for key in self._entries.pop(entry_id, []):
+            if self._owners.get(key) == entry_id:
+                del self._owners[key]
+        for key, owner in list(self._channel_owners.items()):
+            if owner == entry_id:
+                del self._channel_owners[key]
+
+    def owner(self, host: str | None, pin: int) -> str | None:
+        """Return the id of the config entry using a pin, None if it is free."""
+        return self._owners.get((_host_key(host), pin))
+
+    def is_free(self, host: str | None, pin: int, entry_id: str | None = None) -> bool:
+        """Return true if a pin is free or already belongs to entry_id."""
+        return self.owner(host, pin) in (None, entry_id)
+
+    def is_channel_free(
+        self, host: str | None, channel: int, entry_id: str | None = None
+    ) -> bool:
+        """Return true if no other entry drives a channel of the PWM peripheral."""
+        owner = self._channel_owners.get((_host_key(host), channel))
+        return owner in (None, entry_id)
+
+    def free_pins(self, host: str | None) -> list[int]:
+        """Return the GPIOs of a host no config entry uses."""
+        host = _host_key(host)
+        return [pin for pin in GPIO_PINS if (host, pin) not in self._owners]
+
+    @property
+    def hosts(self) -> list[str]:
+        """Return the hosts that have pins in use."""
+        return sorted({host for host, _ in self._owners})
+
+
+@callback
+def async_get_pin_index(hass: HomeAssistant) -> PinIndex:
+    """Return the pin index, building it from the config entries on first use."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if DATA_PIN_INDEX not in domain_data:
+        index = PinIndex()
+        for entry in hass.config_entries.async_entries(DOMAIN):
+            index.async_set_entry(entry.entry_id, entry.data)
+        domain_data[DATA_PIN_INDEX] = index
+    return domain_data[DATA_PIN_INDEX]
@@ -0,0 +1,61 @@
+"""State publishing for the rpi_gpio_pwm component."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+
+from homeassistant.core import HomeAssistant, callback
+
+# Shortest time between two states of an entity written by its commands.
+# A burst of commands within it only writes the first and the last state.
+PUBLISH_INTERVAL = 1.0
+
+
+class StatePublisher:
+    """Rate-limit the state writes of one entity.
+
+    A state is written right away unless the previous one was written less
+    than the interval ago. Then one write is scheduled for the end of the
+    interval, which writes whatever the entity holds by then, so a slider
+    dragged across or an automation stepping a fan does not put every step
+    into the state machine and the recorder, and the final target always
+    lands. A command following another within the interval therefore has
+    its target state reported up to PUBLISH_INTERVAL late, not at once.
+    Fades and effects never publish their steps at all.
+    """
+
+    def __init__(self, hass: HomeAssistant, write: Callable[[], None]) -> None:
+        """Initialize the publisher with the callback writing the state."""
+        self._hass = hass
+        self._write = write
+        self._last = -PUBLISH_INTERVAL
+        self._handle: asyncio.TimerHandle | None = None
+
+    @callback
+    def publish(self) -> None:
+        """Write the state now, or at the end of the interval."""
+        if self._handle is not None:
+            return
+        now = self._hass.loop.time()
+        if now - self._last >= PUBLISH_INTERVAL:
+            self._last = now
+            self._write()
+            return
+        self._handle = self._hass.loop.call_at(
+            self._last + PUBLISH_INTERVAL, self._async_write_pending
+        )
+
+    @callback
+    def _async_write_pending(self) -> None:
+        """Write the state held back during the interval."""
+        self._handle = None
+        self._last = self._hass.loop.time()
+        self._write()
+
+    @callback
+    def cancel(self) -> None:
+        """Drop a pending write, the entity is going away."""
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
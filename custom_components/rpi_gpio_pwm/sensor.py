@@ -0,0 +1,259 @@
+"""Support for the tachometer of a PWM fan and the health of its daemon."""
+
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from collections.abc import Mapping
+from datetime import timedelta
+import logging
+
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorStateClass,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import (
+    CONF_NAME,
+    REVOLUTIONS_PER_MINUTE,
+    EntityCategory,
+    UnitOfTime,
+)
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.event import async_track_time_interval
+
+from .const import (
+    CONF_TACH_PIN,
+    DATA_CONNECTION,
+    DATA_TACHOMETER,
+    DOMAIN,
+    SIGNAL_OPTIONS_UPDATED,
+)
+from .pins import entry_pins
+
+_LOGGER = logging.getLogger(__name__)
+
+# Length of the window the fan speed is measured over
+TACH_WINDOW = timedelta(seconds=5)
+# How often the daemon health sensors read the statistics of the connection
+HEALTH_INTERVAL = timedelta(seconds=30)
+
+
+# Transform the configEntry from config_flow into an entity
+async def async_setup_entry(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Set up the sensors of a ConfigEntry."""
+    entry_data = hass.data[DOMAIN][config_entry.entry_id]
+    connection = entry_data[DATA_CONNECTION]
+    # The pins driven by the entry, not the tach input
+    pins = [
+        pin
+        for pin in entry_pins(config_entry.data)
+        if pin != config_entry.data.get(CONF_TACH_PIN)
+    ]
+    sensors = [
+        PwmLatencySensor(connection=connection, pins=pins, config_entry=config_entry),
+        PwmErrorsSensor(connection=connection, config_entry=config_entry),
+    ]
+    if (tachometer := entry_data.get(DATA_TACHOMETER)) is not None:
+        sensors.append(
+            PwmFanSpeedSensor(tachometer=tachometer, config_entry=config_entry)
+        )
+    async_add_entities(sensors)
+
+    @callback
+    def async_options_updated(data: Mapping) -> None:
+        for sensor in sensors:
+            sensor.async_set_entry_name(data.get(CONF_NAME))
+
+    config_entry.async_on_unload(
+        async_dispatcher_connect(
+            hass,
+            SIGNAL_OPTIONS_UPDATED.format(config_entry.entry_id),
+            async_options_updated,
+        )
+    )
+
+
+class PwmFanSpeedSensor(SensorEntity):
+    """Representation of the speed measured by the tachometer of a fan."""
+
+    _attr_native_unit_of_measurement = REVOLUTIONS_PER_MINUTE
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_icon = "mdi:fan"
+    _suffix = " speed"
+
+    def __init__(self, **kwarg) -> None:
+        """Initialize the fan speed sensor."""
+        self._attr_has_entity_name = True
+        self._tachometer = kwarg["tachometer"]
+        self._name = kwarg["config_entry"].data.get(CONF_NAME) + self._suffix
+        self._unique_id = kwarg["config_entry"].entry_id + "_rpm"
+
+    async def async_added_to_hass(self):
+        """Start measuring windows once the entity is added."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            async_track_time_interval(self.hass, self._async_update_rpm, TACH_WINDOW)
+        )
+
+    async def _async_update_rpm(self, now=None) -> None:
+        """Publish the speed of the window that just ended, if it changed."""
+        previous = self._tachometer.rpm
+        if self._tachometer.update() != previous:
+            self.async_write_ha_state()
+
+    @property
+    def should_poll(self):
+        """No polling needed."""
+        return False
+
+    @property
+    def name(self):
+        """Return the name of the sensor."""
+        return self._name
+
+    @property
+    def unique_id(self):
+        """Return the unique id."""
+        return self._unique_id
+
+    @callback
+    def async_set_entry_name(self, name: str) -> None:
+        """Follow a new name of the entry."""
+        self._name = name + self._suffix
+        # Disabled sensors were never added
+        if self.hass is not None:
+            self.async_write_ha_state()
+
+    @property
+    def native_value(self):
+        """Return the fan speed in revolutions per minute."""
+        return self._tachometer.rpm
+
+
+class PwmHealthSensor(SensorEntity, ABC):
+    """Base of the sensors reporting the health of the pigpiod connection.
+
+    They are diagnostic and disabled by default, enable them to watch a slow
+    or flaky remote Pi.
+    """
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+
+    def __init__(self, **kwarg) -> None:
+        """Initialize the sensor."""
+        self._attr_has_entity_name = True
+        self._connection = kwarg["connection"]
+        self._value = None
+        self._attributes = None
+
+    async def async_added_to_hass(self):
+        """Start reading the statistics once the entity is added."""
+        await super().async_added_to_hass()
+        self._value, self._attributes = self._read(), self._read_attributes()
+        self.async_on_remove(
+            async_track_time_interval(self.hass, self._async_update, HEALTH_INTERVAL)
+        )
+
+    @abstractmethod
+    def _read(self):
+        """Return the current value from the statistics of the connection."""
+
+    def _read_attributes(self):
+        """Return the current attributes from the statistics of the connection."""
+        return None
+
+    @callback
+    def async_set_entry_name(self, name: str) -> None:
+        """Follow a new name of the entry."""
+        self._name = name + self._suffix
+        # Disabled sensors were never added
+        if self.hass is not None:
+            self.async_write_ha_state()
+
+    async def _async_update(self, now=None) -> None:
+        """Publish the value and the attributes if they changed."""
+        value, attributes = self._read(), self._read_attributes()
+        if (value, attributes) != (self._value, self._attributes):
+            self._value, self._attributes = value, attributes
+            self.async_write_ha_state()
+
+    @property
+    def should_poll(self):
+        """No polling needed."""
+        return False
+
+    @property
+    def name(self):
+        """Return the name of the sensor."""
+        return self._name
+
+    @property
+    def unique_id(self):
+        """Return the unique id."""
+        return self._unique_id
+
+    @property
+    def native_value(self):
+        """Return the last value read."""
+        return self._value
+
+    @property
+    def extra_state_attributes(self):
+        """Return the last attributes read."""
+        return self._attributes
+
+
+class PwmLatencySensor(PwmHealthSensor):
+    """Recent time from a write to its acknowledgment by pigpiod."""
+
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_native_unit_of_measurement = UnitOfTime.MILLISECONDS
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_suggested_display_precision = 1
+    _suffix = " latency"
+
+    def __init__(self, **kwarg) -> None:
+        """Initialize the latency sensor of the pins of an entry."""
+        super().__init__(**kwarg)
+        self._pins = kwarg["pins"]
+        self._name = kwarg["config_entry"].data.get(CONF_NAME) + self._suffix
+        self._unique_id = kwarg["config_entry"].entry_id + "_latency"
+
+    def _read(self):
+        """Return the worst recent latency of the pins in milliseconds."""
+        recent = self._connection.stats.recent(self._pins)
+        return None if recent is None else round(recent * 1000, 3)
+
+
+class PwmErrorsSensor(PwmHealthSensor):
+    """Failed writes to the pigpiod daemon of an entry."""
+
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+    _attr_icon = "mdi:alert-circle-outline"
+    _suffix = " pigpiod errors"
+
+    def __init__(self, **kwarg) -> None:
+        """Initialize the error sensor of the daemon of an entry."""
+        super().__init__(**kwarg)
+        self._name = kwarg["config_entry"].data.get(CONF_NAME) + self._suffix
+        self._unique_id = kwarg["config_entry"].entry_id + "_errors"
+
+    def _read(self):
+        """Return the number of failed writes."""
+        return self._connection.stats.errors
+
+    def _read_attributes(self):
+        """Return the connection and command counters."""
+        return {
+            "reconnects": self._connection.stats.reconnects,
+            "connect_failures": self._connection.stats.connect_failures,
+            "commands": self._connection.commands,
+        }
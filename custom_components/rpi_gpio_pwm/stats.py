@@ -0,0 +1,104 @@
+"""Latency and error statistics for the rpi_gpio_pwm component."""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from typing import Any
+
+# Upper bounds of the latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1, 2, 5)
+# Weight of the newest latency in the moving average
+RECENT_WEIGHT = 0.2
+
+
+class LatencyHistogram:
+    """Count latencies into fixed buckets, keeping a moving average of them.
+
+    Recording is a bisect and two additions, cheap enough for every write.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty histogram."""
+        # One bucket per bound, plus one for everything slower
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent: float | None = None
+
+    def record(self, seconds: float) -> None:
+        """Record one latency."""
+        self.buckets[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.recent = (
+            seconds
+            if self.recent is None
+            else self.recent + (seconds - self.recent) * RECENT_WEIGHT
+        )
+
+    def percentile(self, fraction: float) -> float | None:
+        """Return the bucket bound below which a fraction of the latencies fall."""
+        if not self.count:
+            return None
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.buckets):
+            seen += count
+            if seen >= fraction * self.count:
+                return bound
+        return self.max
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the histogram in milliseconds, for diagnostics."""
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count * 1000, 3) if self.count else None,
+            "p50_ms": _ms(self.percentile(0.5)),
+            "p95_ms": _ms(self.percentile(0.95)),
+            "max_ms": round(self.max * 1000, 3),
+            "recent_ms": _ms(self.recent),
+            "buckets": {
+                f"le_{_ms(bound)}ms": count
+                for bound, count in zip(LATENCY_BUCKETS, self.buckets)
+            }
+            | {"slower": self.buckets[-1]},
+        }
+
+
+def _ms(seconds: float | None) -> float | None:
+    """Return seconds in milliseconds, rounded for display."""
+    return None if seconds is None else round(seconds * 1000, 3)
+
+
+class ConnectionStats:
+    """Statistics of the writes to one pigpiod daemon and to each of its pins.
+
+    A latency runs from the call writing a duty cycle to the acknowledgment
+    of the burst holding it by pigpiod.
+    """
+
+    def __init__(self) -> None:
+        """Initialize empty statistics."""
+        self.latency = LatencyHistogram()
+        self.pins: dict[int, LatencyHistogram] = {}
+        self.errors = 0
+        self.connect_failures = 0
+        self.reconnects = 0
+
+    def record(self, pins, seconds: float) -> None:
+        """Record the latency of a burst for the daemon and each of its pins."""
+        self.latency.record(seconds)
+        for pin in pins:
+            if pin not in self.pins:
+                self.pins[pin] = LatencyHistogram()
+            self.pins[pin].record(seconds)
+
+    def recent(self, pins) -> float | None:
+        """Return the worst recent latency of some pins, in seconds."""
+        recent = [
+            self.pins[pin].recent
+            for pin in pins
+            if pin in self.pins and self.pins[pin].recent is not None
+        ]
+        return max(recent, default=None)
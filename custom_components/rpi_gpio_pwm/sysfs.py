@@ -0,0 +1,245 @@
+"""Kernel PWM sysfs backend for the rpi_gpio_pwm component."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+
+from .backend import PwmConnection, PwmError
+from .const import BACKEND_SYSFS, HARDWARE_PWM_CHANNELS
+
+_LOGGER = logging.getLogger(__name__)
+
+SYSFS_ROOT = "/sys/class/pwm"
+# The one connection of the sysfs backend, the machine Home Assistant runs on
+LOCAL_HOST = "localhost"
+LOCAL_PORT = 0
+# Seconds udev may take to make the files of an exported channel writable
+EXPORT_TIMEOUT = 2
+# Bounds of the backoff between two checks for a PWM chip
+RETRY_MIN_DELAY = 1
+RETRY_MAX_DELAY = 60
+
+
+def _read(path: str) -> int:
+    """Read the integer in a sysfs file."""
+    with open(path, encoding="ascii") as file:
+        return int(file.read().strip() or 0)
+
+
+def _write(path: str, value: int) -> None:
+    """Write an integer to a sysfs file."""
+    with open(path, "w", encoding="ascii") as file:
+        file.write(str(value))
+
+
+class SysfsPwmConnection(PwmConnection):
+    """The PWM peripheral of this machine, through the kernel sysfs interface.
+
+    The channels of the pwm-2chan overlay of a Raspberry Pi 4 or older are
+    the ones of the peripheral, pwm0 drives GPIO 12 or 18 and pwm1 GPIO 13
+    or 19.
+
+    A duty cycle is a write of a few bytes to a file of the pwm driver, in
+    nanoseconds of the period, so it reaches the pin without a socket, a
+    daemon or a round trip. Only the four pins of the PWM peripheral can
+    be driven this way, and there is no daemon to run transitions or count
+    a tachometer.
+    """
+
+    backend = BACKEND_SYSFS
+
+    def __init__(self, root: str = SYSFS_ROOT) -> None:
+        """Initialize the connection, async_start() finds the PWM chip."""
+        super().__init__(LOCAL_HOST, LOCAL_PORT)
+        self._root = root
+        self._chip: str | None = None
+        self._hass: HomeAssistant | None = None
+        self._task: asyncio.Task | None = None
+        # pin -> period in nanoseconds of the pins set up
+        self._periods: dict[int, int] = {}
+        # channel -> pin driving it, two pins never share a channel
+        self._channels: dict[int, int] = {}
+        self._commands = 0
+
+    @property
+    def commands(self) -> int:
+        """Return the number of duty cycle writes to the driver."""
+        return self._commands
+
+    def _channel_path(self, pin: int) -> str:
+        """Return the directory of the channel of a pin."""
+        return os.path.join(self._chip, f"pwm{HARDWARE_PWM_CHANNELS[pin]}")
+
+    def _find_chip(self) -> str:
+        """Return the directory of the first PWM chip."""
+        try:
+            chips = sorted(
+                name for name in os.listdir(self._root) if name.startswith("pwmchip")
+            )
+        except OSError as err:
+            raise PwmError(f"No PWM interface at {self._root}: {err}") from err
+        if not chips:
+            raise PwmError(f"No PWM chip in {self._root}, is the pwm-2chan overlay on?")
+        return os.path.join(self._root, chips[0])
+
+    def _setup_channel(self, pin: int, period: int) -> int | None:
+        """Export and enable the channel of a pin at a period.
+
+        Return its duty cycle, None if the channel was not enabled.
+        """
+        channel = HARDWARE_PWM_CHANNELS[pin]
+        path = self._channel_path(pin)
+        if not os.path.isdir(path):
+            _write(os.path.join(self._chip, "export"), channel)
+            deadline = time.monotonic() + EXPORT_TIMEOUT
+            while not os.access(os.path.join(path, "enable"), os.W_OK):
+                if time.monotonic() > deadline:
+                    raise PwmError(f"PWM channel {channel} was not exported")
+                time.sleep(0.01)
+        enabled = _read(os.path.join(path, "enable")) == 1
+        duty = _read(os.path.join(path, "duty_cycle"))
+        current = _read(os.path.join(path, "period"))
+        if current != period:
+            # Keep the ratio, the duty cycle may never exceed the period
+            scaled = round(duty * period / current) if current else 0
+            if scaled < duty:
+                _write(os.path.join(path, "duty_cycle"), scaled)
+            _write(os.path.join(path, "period"), period)
+            if scaled > duty:
+                _write(os.path.join(path, "duty_cycle"), scaled)
+            duty = scaled
+        if not enabled:
+            # A disabled channel may hold a duty cycle, it starts off
+            if duty:
+                _write(os.path.join(path, "duty_cycle"), 0)
+            _write(os.path.join(path, "enable"), 1)
+            return None
+        return duty
+
+    async def async_setup_pin(self, pin: int, frequency: int) -> float | None:
+        """Set a pin up for PWM without touching its output.
+
+        Return the value the pin has, None if its channel was not enabled.
+        The duty cycle read back goes into the write cache, like the one of
+        pigpiod, so a restored value is not written again.
+        """
+        if pin not in HARDWARE_PWM_CHANNELS:
+            raise PwmError(f"GPIO {pin} has no channel of the PWM peripheral")
+        channel = HARDWARE_PWM_CHANNELS[pin]
+        if self._channels.setdefault(channel, pin) != pin:
+            raise PwmError(
+                f"GPIO {pin} shares PWM channel {channel} with GPIO "
+                f"{self._channels[channel]}"
+            )
+        frequency = self._hardware_pwm.get(pin, frequency)
+        period = round(1e9 / frequency)
+        try:
+            duty = await self._hass.async_add_executor_job(
+                self._setup_channel, pin, period
+            )
+        except OSError as err:
+            raise PwmError(f"Cannot set GPIO {pin} up: {err}") from err
+        self._periods[pin] = period
+        self.set_hardware_pwm(pin, frequency)
+        self.cache.store(pin, duty or 0, frequency)
+        return None if duty is None else duty / period
+
+    async def _async_duties(
+        self, values: dict[int, float]
+    ) -> dict[int, tuple[int, int | None]]:
+        """Return the duty cycle of each value in nanoseconds of the period."""
+        missing = [pin for pin in values if pin not in self._periods]
+        if missing:
+            raise PwmError(f"GPIO {missing} not set up")
+        return {
+            pin: (round(value * self._periods[pin]), self._hardware_pwm[pin])
+            for pin, value in values.items()
+        }
+
+    def _write_duties(self, duties: dict[int, tuple[int, int | None]]) -> None:
+        """Write duty cycles to the files of their channels."""
+        for pin, (duty, _) in duties.items():
+            _write(os.path.join(self._channel_path(pin), "duty_cycle"), duty)
+            self._commands += 1
+
+    async def _async_write(self, duties: dict[int, tuple[int, int | None]]) -> None:
+        """Write duty cycles in one executor job."""
+        try:
+            await self._hass.async_add_executor_job(self._write_duties, duties)
+        except OSError as err:
+            raise PwmError(f"Cannot write the duty cycle: {err}") from err
+
+    async def async_set_frequency(self, pin: int, frequency: int) -> None:
+        """Change the PWM frequency of a pin, keeping its duty cycle."""
+        self.set_hardware_pwm(pin, frequency)
+        if self.available and pin in self._periods:
+            await self.async_setup_pin(pin, frequency)
+
+    async def _async_find(self) -> None:
+        """Find the PWM chip, checking again with a backoff until there is one."""
+        delay = RETRY_MIN_DELAY
+        attempts = 0
+        while True:
+            attempts += 1
+            start = time.monotonic()
+            try:
+                self._chip = await self._hass.async_add_executor_job(self._find_chip)
+            except PwmError as err:
+                _LOGGER.warning("%s, checking again in %s s", err, delay)
+                self.stats.connect_failures += 1
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, RETRY_MAX_DELAY)
+                continue
+            break
+        _LOGGER.debug("Driving PWM through %s", self._chip)
+        self.available = True
+        found = time.monotonic()
+        await self._async_notify()
+        done = time.monotonic()
+        self.startup = {
+            "attempts": attempts,
+            "waited_ms": round((start - self._started) * 1000, 3),
+            "connect_ms": round((found - start) * 1000, 3),
+            "pin_setup_ms": round((done - found) * 1000, 3),
+            "available_ms": round((done - self._started) * 1000, 3),
+            "listeners": len(self._listeners),
+        }
+
+    @callback
+    def async_start(self, hass: HomeAssistant) -> None:
+        """Look for the PWM chip in the background."""
+        self._hass = hass
+        self._started = time.monotonic()
+        self._task = hass.async_create_background_task(
+            self._async_find(), "rpi_gpio_pwm sysfs"
+        )
+
+    async def async_close(self, hass: HomeAssistant) -> None:
+        """Stop using the PWM chip, the channels keep their output."""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        self.available = False
+
+    def forget_pin(self, pin: int) -> None:
+        """Forget a pin that was released, freeing its channel."""
+        super().forget_pin(pin)
+        self._periods.pop(pin, None)
+        channel = HARDWARE_PWM_CHANNELS.get(pin)
+        if self._channels.get(channel) == pin:
+            del self._channels[channel]
+
+    def as_dict(self, pins=None) -> dict[str, Any]:
+        """Return the state and statistics of the connection, for diagnostics.
+
+        With pins, only the latencies of those pins are included.
+        """
+        return super().as_dict(pins) | {
+            "chip": self._chip,
+            "commands": self._commands,
+        }
@@ -0,0 +1,81 @@
+"""Fan tachometer for the rpi_gpio_pwm component."""
+
+from __future__ import annotations
+
+import logging
+import time
+
+import pigpio
+
+_LOGGER = logging.getLogger(__name__)
+
+# Pulses shorter than this (in microseconds) are noise on the tach line
+GLITCH_FILTER = 100
+
+
+class Tachometer:
+    """Count the tach pulses of a fan and turn them into windowed rates.
+
+    pigpiod reports every edge to the pigpio notification thread, which only
+    increments a counter. Home Assistant reads and resets that counter once
+    per window, so the event loop never sees individual edges.
+    """
+
+    def __init__(self, pin: int, pulses_per_revolution: int) -> None:
+        """Initialize the tachometer, start() begins counting."""
+        self._pi: pigpio.pi | None = None
+        self._pin = pin
+        self._pulses_per_revolution = pulses_per_revolution
+        self._callback = None
+        self._window: tuple[int, float] | None = None
+        self.rpm: float | None = None
+
+    def start(self, pi: pigpio.pi) -> None:
+        """Set the pin up and start counting. Blocking, run it in the executor."""
+        self._pi = pi
+        self._pi.set_mode(self._pin, pigpio.INPUT)
+        # Tach outputs are open collector
+        self._pi.set_pull_up_down(self._pin, pigpio.PUD_UP)
+        self._pi.set_glitch_filter(self._pin, GLITCH_FILTER)
+        # Without a function the callback only tallies the edges
+        self._callback = self._pi.callback(self._pin, pigpio.FALLING_EDGE)
+        self._window = self.sample()
+
+    def stop(self) -> None:
+        """Stop counting. Blocking, run it in the executor."""
+        if self._callback is None:
+            return
+        self._callback.cancel()
+        self._callback = None
+        self._pi.set_glitch_filter(self._pin, 0)
+
+    def forget(self) -> None:
+        """Drop the callback of a connection that was lost."""
+        self._callback = None
+
+    def sample(self) -> tuple[int, float] | None:
+        """Return the pulses counted so far and when they were read.
+
+        The tally is never reset, so several readers (the speed sensor, the fan
+        controller) can measure their own windows from their own samples.
+        """
+        if self._callback is None:
+            return None
+        return self._callback.tally(), time.monotonic()
+
+    def rpm_since(self, start: tuple[int, float] | None) -> float | None:
+        """Return the speed measured since an earlier sample."""
+        end = self.sample()
+        if start is None or end is None or end[1] <= start[1]:
+            return None
+        return (
+            (end[0] - start[0]) / self._pulses_per_revolution / (end[1] - start[1]) * 60
+        )
+
+    def update(self) -> float | None:
+        """Close the current window and return the speed measured over it."""
+        rpm = self.rpm_since(self._window)
+        self._window = self.sample()
+        if rpm is not None:
+            self.rpm = round(rpm)
+        return self.rpm
@@ -0,0 +1,93 @@
+"""Duty cycle write traces for the rpi_gpio_pwm component."""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+import json
+import struct
+import time
+
+# Seconds since the start of the trace, host index, pin, value
+RECORD = struct.Struct("<dHBf")
+MAGIC = b"RPIPWMTRACE1"
+_HEADER_LENGTH = struct.Struct("<I")
+
+
+class TraceRecorder:
+    """Record the duty cycle writes of every daemon into a ring buffer.
+
+    The buffer is allocated once and holds the newest size writes, 15
+    bytes each, so a running trace costs one pack per written pin and
+    never grows. The header keeps the hardware PWM frequency of every pin
+    written, None for a pin timed by pigpiod, so a replay sends the same
+    commands.
+    """
+
+    def __init__(self, size: int) -> None:
+        """Initialize an empty trace of at most size writes."""
+        self.size = size
+        self.recorded = 0
+        self._buffer = bytearray(size * RECORD.size)
+        self._next = 0
+        # host:port -> index in the records
+        self._hosts: dict[str, int] = {}
+        # index -> pin -> hardware PWM frequency, None for pigpiod timing
+        self._pins: list[dict[int, int | None]] = []
+        self._start = time.monotonic()
+
+    def record(
+        self,
+        host: str,
+        values: Mapping[int, float],
+        hardware_pwm: Mapping[int, int],
+    ) -> None:
+        """Record the values of one call writing pins of a daemon.
+
+        hardware_pwm maps the pins driven by the PWM peripheral to their
+        frequency.
+        """
+        index = self._hosts.setdefault(host, len(self._hosts))
+        if index == len(self._pins):
+            self._pins.append({})
+        pins = self._pins[index]
+        now = time.monotonic() - self._start
+        for pin, value in values.items():
+            pins[pin] = hardware_pwm.get(pin)
+            RECORD.pack_into(
+                self._buffer, self._next * RECORD.size, now, index, pin, value
+            )
+            self._next = (self._next + 1) % self.size
+            self.recorded += 1
+
+    def dump(self) -> bytes:
+        """Return the trace as a file, oldest write first."""
+        split = self._next * RECORD.size
+        if self.recorded >= self.size:
+            records = self._buffer[split:] + self._buffer[:split]
+        else:
+            records = self._buffer[:split]
+        header = json.dumps(
+            {
+                "hosts": list(self._hosts),
+                # JSON keys are strings, load_trace turns the pins back
+                "pins": self._pins,
+                "records": len(records) // RECORD.size,
+                "dropped": max(0, self.recorded - self.size),
+            }
+        ).encode()
+        return MAGIC + _HEADER_LENGTH.pack(len(header)) + header + bytes(records)
+
+
+def load_trace(data: bytes) -> tuple[dict, list[tuple[float, int, int, float]]]:
+    """Return the header and the records of a trace file."""
+    if not data.startswith(MAGIC):
+        raise ValueError("Not a rpi_gpio_pwm trace")
+    offset = len(MAGIC)
+    (length,) = _HEADER_LENGTH.unpack_from(data, offset)
+    offset += _HEADER_LENGTH.size
+    header = json.loads(data[offset : offset + length])
+    header["pins"] = [
+        {int(pin): frequency for pin, frequency in pins.items()}
+        for pins in header["pins"]
+    ]
+    return header, list(RECORD.iter_unpack(data[offset + length :]))
@@ -0,0 +1,269 @@
+"""Brightness transitions for the rpi_gpio_pwm component."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+import logging
+import time
+from typing import TYPE_CHECKING
+
+import pigpio
+
+from homeassistant.core import HomeAssistant
+
+from .backend import PwmError
+from .curves import BrightnessCurve
+
+if TYPE_CHECKING:
+    from .connection import PigpioConnection
+
+_LOGGER = logging.getLogger(__name__)
+
+# Highest number of writes per second and per pin during a fade.
+# Above this the pigpiod link spends its time on steps nobody can see.
+MAX_STEPS_PER_SECOND = 25
+# Smallest level change worth a write (one Home Assistant brightness step)
+MIN_STEP = 1 / 255
+# Steps per second of a fade run by pigpiod itself, no round trip involved
+DAEMON_STEPS_PER_SECOND = 100
+
+# pigpiod script fading p0 from duty p1 to duty p2 in p3 steps of p4 ms.
+# Stored once per pin and started with one command per transition.
+FADE_SCRIPT = (
+    "ld v0 0 "
+    "tag 1 "
+    "mils p4 "
+    "inr v0 "
+    "lda p2 sub p1 mlt v0 div p3 add p1 sta v1 "
+    "pwm p0 v1 "
+    "lda v0 cmp p3 jm 1"
+)
+
+
+def build_schedule(
+    start: float, end: float, duration: float
+) -> tuple[float, list[float]]:
+    """Return the step interval and the level of each step of a fade."""
+    steps = min(
+        int(duration * MAX_STEPS_PER_SECOND),
+        int(abs(end - start) / MIN_STEP),
+    )
+    if steps <= 1:
+        return duration, [end]
+    return duration / steps, [
+        start + (end - start) * i / steps for i in range(1, steps + 1)
+    ]
+
+
+class DaemonRamp:
+    """Run the fades of one pin as a script inside pigpiod.
+
+    The script steps linearly in duty cycle between the two ends of a fade
+    mapped through the curve. All methods block on the pigpiod socket, run
+    them in the executor. A script only exists on the daemon it was stored
+    on, so a restarted daemon gets it stored again and the id of the old one
+    is never sent to it.
+    """
+
+    def __init__(
+        self, connection: PigpioConnection, pin: int, curve: BrightnessCurve
+    ) -> None:
+        """Initialize the ramp, the script is stored on first use."""
+        self._connection = connection
+        self._pin = pin
+        self.curve = curve
+        self._script_id: int | None = None
+        # The script only exists on the daemon it was stored on
+        self._script_pi: pigpio.pi | None = None
+        self.failed = False
+
+    @property
+    def _pi(self) -> pigpio.pi:
+        """Return the pigpio handle of the connection."""
+        if self._connection.factory is None:
+            raise PwmError(f"pigpiod on {self._connection.host} is not connected")
+        return self._connection.factory.connection
+
+    def _current_script(self) -> int | None:
+        """Return the id of the script on the daemon connected now, if any."""
+        if self._script_id is not None and self._script_pi is not self._pi:
+            self._script_id = None
+            self._script_pi = None
+        return self._script_id
+
+    def _store(self) -> int:
+        """Store the fade script in the daemon and wait until it is ready."""
+        script_id = self._pi.store_script(FADE_SCRIPT.encode())
+        deadline = time.monotonic() + 1
+        while self._pi.script_status(script_id)[0] == pigpio.PI_SCRIPT_INITING:
+            if time.monotonic() > deadline:
+                self._pi.delete_script(script_id)
+                raise pigpio.error("script initialisation timed out")
+            time.sleep(0.01)
+        return script_id
+
+    def start(self, start: float, end: float, duration: float) -> bool:
+        """Start a fade on the daemon, return False if it was rejected."""
+        try:
+            if self._current_script() is None:
+                self._script_id = self._store()
+                self._script_pi = self._pi
+            pwm_range = self._pi.get_PWM_range(self._pin)
+            duty_start = round(self.curve.duty(start) * pwm_range)
+            duty_end = round(self.curve.duty(end) * pwm_range)
+            steps = max(
+                1,
+                min(
+                    int(duration * DAEMON_STEPS_PER_SECOND), abs(duty_end - duty_start)
+                ),
+            )
+            interval = max(1, round(duration * 1000 / steps))
+            # The script moves the pin behind the back of the write cache
+            self._connection.cache.invalidate([self._pin])
+            self._pi.run_script(
+                self._script_id, [self._pin, duty_start, duty_end, steps, interval]
+            )
+        except pigpio.error as err:
+            _LOGGER.warning(
+                "pigpiod rejected the fade script for pin %s, fading from Home Assistant instead: %s",
+                self._pin,
+                err,
+            )
+            self.failed = True
+            return False
+        return True
+
+    def stop(self) -> float:
+        """Stop a running fade and return the level it reached."""
+        try:
+            if (script_id := self._current_script()) is not None:
+                self._pi.stop_script(script_id)
+            return self.curve.level(
+                self._pi.get_PWM_dutycycle(self._pin)
+                / self._pi.get_PWM_range(self._pin)
+            )
+        except pigpio.error as err:
+            raise PwmError(f"Cannot stop the fade of pin {self._pin}: {err}") from err
+
+    def close(self) -> None:
+        """Remove the script from the daemon."""
+        try:
+            script_id = self._current_script()
+        except PwmError:
+            # The daemon went away with the script
+            script_id = None
+        self._script_id = None
+        self._script_pi = None
+        if script_id is None:
+            return
+        try:
+            self._pi.stop_script(script_id)
+            self._pi.delete_script(script_id)
+        except pigpio.error as err:
+            raise PwmError(
+                f"Cannot delete the fade script of pin {self._pin}: {err}"
+            ) from err
+
+
+class Fader:
+    """Drive the level of one pin, immediately or as a timed ramp.
+
+    Levels go from 0 to 1, the write coroutine maps them to a duty cycle.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        write: Callable[[float], Awaitable[None]],
+        ramp: DaemonRamp | None = None,
+    ) -> None:
+        """Initialize the fader with the coroutine writing a level.
+
+        With a ramp, fades run inside pigpiod until the daemon rejects one.
+        """
+        self._hass = hass
+        self._write = write
+        self._ramp = ramp
+        self._ramp_running = False
+        # Loop time the fade running on the daemon ends at
+        self._ramp_end = 0.0
+        self._task: asyncio.Task | None = None
+        self.value = 0.0
+
+    def cancel(self) -> None:
+        """Forget the running fade, leaving the output where it is.
+
+        Also called when the connection is lost, a fade on the daemon is
+        gone with it.
+        """
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        self._task = None
+        self._ramp_running = False
+
+    async def async_stop(self) -> None:
+        """Stop the running fade, wherever it runs."""
+        ramp_running = self._ramp_running and self._hass.loop.time() < self._ramp_end
+        self.cancel()
+        if ramp_running:
+            try:
+                self.value = await self._hass.async_add_executor_job(self._ramp.stop)
+            except PwmError as err:
+                _LOGGER.debug("Cannot stop the fade on the daemon: %s", err)
+
+    async def async_close(self) -> None:
+        """Stop fading and release the daemon script."""
+        self.cancel()
+        if self._ramp is not None:
+            try:
+                await self._hass.async_add_executor_job(self._ramp.close)
+            except PwmError as err:
+                _LOGGER.debug("Cannot release the fade script: %s", err)
+
+    async def async_set(self, value: float) -> None:
+        """Cancel any fade and write the level right away."""
+        await self.async_stop()
+        await self._async_write(value)
+
+    async def async_fade(self, value: float, duration: float) -> None:
+        """Start a fade from the current level to value.
+
+        A fade already running is cancelled and the new one starts from where
+        the output is now, so a retarget never jumps.
+        """
+        if duration <= 0:
+            await self.async_set(value)
+            return
+        await self.async_stop()
+        if self._ramp is not None and not self._ramp.failed:
+            if await self._hass.async_add_executor_job(
+                self._ramp.start, self.value, value, duration
+            ):
+                self._ramp_running = True
+                self._ramp_end = self._hass.loop.time() + duration
+                self.value = value
+                return
+        interval, steps = build_schedule(self.value, value, duration)
+        self._task = self._hass.async_create_background_task(
+            self._async_run(interval, steps), "rpi_gpio_pwm fade"
+        )
+
+    async def _async_run(self, interval: float, steps: list[float]) -> None:
+        """Play a fade schedule, skipping steps the link could not keep up with."""
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        index = 0
+        while index < len(steps):
+            await asyncio.sleep(max(0, start + (index + 1) * interval - loop.time()))
+            # Jump to the step matching the clock if a write took too long
+            index = max(
+                index, min(len(steps), int((loop.time() - start) / interval)) - 1
+            )
+            await self._async_write(steps[index])
+            index += 1
+
+    async def _async_write(self, value: float) -> None:
+        """Write a level and remember it as the current one."""
+        await self._write(value)
+        self.value = value
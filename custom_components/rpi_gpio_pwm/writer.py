@@ -0,0 +1,114 @@
+"""Coalesced duty cycle writes for the rpi_gpio_pwm component."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+
+from .pigpiod import CMD_PWM, PigpiodClient
+
+_LOGGER = logging.getLogger(__name__)
+
+# How long writes are collected before they are sent, in seconds.
+# Long enough to catch every entity of a scene, short enough to go unnoticed.
+WRITE_WINDOW = 0.005
+
+
+class WriteScheduler:
+    """Collect the duty cycle writes to one daemon and send them in bursts.
+
+    A write waiting for the next burst is replaced by a newer write to the
+    same pin, and every burst is pipelined on the socket in one go.
+    """
+
+    def __init__(self, client: PigpiodClient) -> None:
+        """Initialize the scheduler for the daemon behind client."""
+        self._client = client
+        # pin -> (duty, hardware PWM frequency or None)
+        self._pending: dict[int, tuple[int, int | None]] = {}
+        # One future per queued write, resolved when its burst is sent
+        self._waiters: list[asyncio.Future[None]] = []
+        self._flush_task: asyncio.Task | None = None
+        self.writes = 0
+        self.coalesced = 0
+        self.sent = 0
+        self.bursts = 0
+
+    def queue(
+        self, pin: int, duty: int, hardware_frequency: int | None = None
+    ) -> asyncio.Future[None]:
+        """Queue a duty cycle and return a future resolved with its burst.
+
+        With a hardware_frequency the pin is driven by the PWM peripheral and
+        duty is in millionths, otherwise it is in units of the pin PWM range.
+        Writes queued without awaiting in between always share a burst.
+        """
+        self.writes += 1
+        if pin in self._pending:
+            self.coalesced += 1
+        self._pending[pin] = (duty, hardware_frequency)
+        loop = asyncio.get_running_loop()
+        if not self._waiters:
+            self._flush_task = loop.create_task(self._async_flush_later())
+        waiter: asyncio.Future[None] = loop.create_future()
+        self._waiters.append(waiter)
+        return waiter
+
+    async def async_write(
+        self, pin: int, duty: int, hardware_frequency: int | None = None
+    ) -> None:
+        """Queue a duty cycle and wait until the burst holding it is sent."""
+        await asyncio.shield(self.queue(pin, duty, hardware_frequency))
+
+    async def _async_flush_later(self) -> None:
+        """Wait for the window to close, then send the burst."""
+        await asyncio.sleep(WRITE_WINDOW)
+        pending, self._pending = self._pending, {}
+        waiters, self._waiters = self._waiters, []
+        sent: list[asyncio.Future[int]] = []
+        error: Exception | None = None
+        try:
+            for pin, (duty, frequency) in pending.items():
+                sent.append(
+                    self._client.send(CMD_PWM, pin, duty)
+                    if frequency is None
+                    else self._client.send_hardware_pwm(pin, frequency, duty)
+                )
+        except Exception as err:  # noqa: BLE001
+            error = err
+            # The commands sent before the failure are waited for by nobody
+            for future in sent:
+                if future.done():
+                    future.exception()
+                else:
+                    future.cancel()
+        else:
+            self.sent += len(sent)
+            self.bursts += 1
+            # Every command is waited for, the first failure fails the burst
+            results = await asyncio.gather(
+                *(self._client.async_wait(future) for future in sent),
+                return_exceptions=True,
+            )
+            error = next((res for res in results if isinstance(res, Exception)), None)
+        _resolve(waiters, error)
+        _LOGGER.debug(
+            "Sent %s write(s) to %s:%s, %s coalesced so far",
+            len(pending),
+            self._client.host,
+            self._client.port,
+            self.coalesced,
+        )
+
+
+def _resolve(waiters: list[asyncio.Future[None]], error: Exception | None) -> None:
+    """Resolve the futures of every write of a burst with its outcome."""
+    for waiter in waiters:
+        if waiter.done():
+            continue
+        if error is None:
+            waiter.set_result(None)
+        else:
+            waiter.set_exception(error)
+            # A caller may have given up waiting, keep asyncio from complaining
+            waiter.exception()
@@ -0,0 +1,360 @@
+"""Benchmark the integration against the stand-in pigpiod.
+
+Sets up Home Assistant in a temporary config dir with PwmSimpleLed and
+PwmSimpleFan entities from YAML, all on one fake daemon, then measures:
+
+- setup: from the start of Home Assistant until every entity is available
+- single: the latency of one turn_on or set_percentage service call
+- fanout: the latency of one service call targeting every entity at once
+- transition: the duty cycle steps reaching the daemon during light fades
+- ramp: the sequential set_percentage calls one fan takes per second, and
+  the states they write
+- effects: the CPU time and writes of every light running the candle effect
+- backends: the latency of one duty cycle write to a hardware PWM pin
+  through pigpiod on its own fake daemon, and through the sysfs backend on
+  a fake sysfs tree
+
+Latency and jitter of the daemon are in milliseconds, so slow links can be
+measured on a laptop:
+
+    python scripts/benchmark.py --lights 8 --fans 4 --latency 5 --jitter 2
+
+This is a script rather than a pytest-benchmark suite because
+pytest-benchmark times synchronous callables. Every case here awaits
+coroutines on the loop of one running Home Assistant, and shares its
+setup with the cases after it. The daemon latency, jitter and entity
+counts are picked for each run. The tests in tests/ check the behaviour
+these cases time.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from typing import Any
+
+from fake_pigpiod import CMD_PWM, FakePigpiod
+from fake_sysfs import make_pwm_tree
+
+from homeassistant import bootstrap
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.runner import RuntimeConfig
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# The GPIOs of the 40 pin header, shared between the lights and the fans
+PINS = list(range(2, 28))
+AVAILABLE_TIMEOUT = 30
+# Longer than the shortest time between two states of an entity
+PUBLISH_SETTLE = 1.5
+# Hardware PWM pin written through each backend, and its frequency
+BACKEND_PIN = 18
+BACKEND_FREQUENCY = 25000
+
+
+def _configuration(port: int, lights: int, fans: int) -> str:
+    """Return a configuration.yaml with lights and fans on the fake daemon."""
+    lines = ["homeassistant:", "  name: Benchmark", "  time_zone: UTC"]
+    if lights:
+        lines += ["light:", "  - platform: rpi_gpio_pwm", "    leds:"]
+        for index in range(lights):
+            lines += [
+                f"      - name: Bench LED {index}",
+                f"        unique_id: bench_led_{index}",
+                f"        pin: {PINS[index]}",
+                f"        port: {port}",
+            ]
+    if fans:
+        lines += ["fan:", "  - platform: rpi_gpio_pwm", "    fans:"]
+        for index in range(fans):
+            lines += [
+                f"      - name: Bench Fan {index}",
+                f"        unique_id: bench_fan_{index}",
+                f"        pin: {PINS[lights + index]}",
+                f"        port: {port}",
+            ]
+    return "\n".join(lines) + "\n"
+
+
+def latency_summary(samples: list[float]) -> dict[str, Any]:
+    """Return the statistics of latencies in seconds, in milliseconds."""
+    samples = sorted(samples)
+    return {
+        "count": len(samples),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 3),
+        "p50_ms": round(samples[len(samples) // 2] * 1000, 3),
+        "p95_ms": round(samples[int(len(samples) * 0.95)] * 1000, 3),
+        "max_ms": round(samples[-1] * 1000, 3),
+    }
+
+
+async def _async_call_latencies(
+    hass: HomeAssistant, domain: str, service: str, data, iterations: int
+) -> list[float]:
+    """Time blocking service calls, data maps the iteration to the call data."""
+    latencies = []
+    for iteration in range(iterations):
+        start = time.perf_counter()
+        await hass.services.async_call(domain, service, data(iteration), blocking=True)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+async def async_wait_until(condition: Callable[[], bool]) -> None:
+    """Wait until a condition holds, for AVAILABLE_TIMEOUT seconds at most."""
+
+    async def _async_poll() -> None:
+        while not condition():
+            await asyncio.sleep(0.005)
+
+    await asyncio.wait_for(_async_poll(), AVAILABLE_TIMEOUT)
+
+
+async def _async_wait_available(hass: HomeAssistant, entity_ids: list[str]) -> None:
+    """Wait until no entity is unavailable."""
+    await async_wait_until(
+        lambda: all(
+            (state := hass.states.get(entity_id)) is not None
+            and state.state != "unavailable"
+            for entity_id in entity_ids
+        )
+    )
+
+
+async def _async_benchmark_lights(
+    hass: HomeAssistant,
+    daemon: FakePigpiod,
+    lights: list[str],
+    iterations: int,
+    transition: float,
+) -> dict[str, Any]:
+    """Benchmark PwmSimpleLed."""
+
+    def brightness(entity_id):
+        # Alternate, so no write is skipped as a duty cycle the pin already has
+        return lambda iteration: {
+            "entity_id": entity_id,
+            "brightness": 100 if iteration % 2 else 200,
+        }
+
+    results = {
+        "single": latency_summary(
+            await _async_call_latencies(
+                hass, "light", "turn_on", brightness(lights[0]), iterations
+            )
+        ),
+        "fanout": latency_summary(
+            await _async_call_latencies(
+                hass, "light", "turn_on", brightness(lights), iterations
+            )
+        ),
+    }
+    await hass.services.async_call(
+        "light", "turn_on", {"entity_id": lights, "brightness": 1}, blocking=True
+    )
+    daemon.reset_counts()
+    await hass.services.async_call(
+        "light",
+        "turn_on",
+        {"entity_id": lights, "brightness": 255, "transition": transition},
+        blocking=True,
+    )
+    await asyncio.sleep(transition + 0.5)
+    steps = daemon.commands[CMD_PWM]
+    results["transition"] = {
+        "seconds": transition,
+        "steps": steps,
+        "steps_per_second_per_light": round(steps / transition / len(lights), 1),
+    }
+    return results
+
+
+async def _async_benchmark_effects(
+    hass: HomeAssistant, daemon: FakePigpiod, lights: list[str], seconds: float
+) -> dict[str, Any]:
+    """Benchmark the effect player with every light flickering."""
+    await hass.services.async_call(
+        "light", "turn_on", {"entity_id": lights, "effect": "candle"}, blocking=True
+    )
+    daemon.reset_counts()
+    cpu = time.process_time()
+    await asyncio.sleep(seconds)
+    cpu = time.process_time() - cpu
+    writes = daemon.commands[CMD_PWM]
+    await hass.services.async_call(
+        "light", "turn_on", {"entity_id": lights, "effect": "off"}, blocking=True
+    )
+    return {
+        "seconds": seconds,
+        "lights": len(lights),
+        # The whole process, Home Assistant included
+        "cpu_percent": round(cpu / seconds * 100, 1),
+        "writes_per_second_per_light": round(writes / seconds / len(lights), 1),
+    }
+
+
+async def _async_benchmark_fans(
+    hass: HomeAssistant, fans: list[str], iterations: int
+) -> dict[str, Any]:
+    """Benchmark PwmSimpleFan."""
+
+    def percentage(entity_id):
+        return lambda iteration: {
+            "entity_id": entity_id,
+            "percentage": 40 if iteration % 2 else 60,
+        }
+
+    results = {
+        "single": latency_summary(
+            await _async_call_latencies(
+                hass, "fan", "set_percentage", percentage(fans[0]), iterations
+            )
+        ),
+        "fanout": latency_summary(
+            await _async_call_latencies(
+                hass, "fan", "set_percentage", percentage(fans), iterations
+            )
+        ),
+    }
+    states = []
+
+    @callback
+    def state_changed(event: Event) -> None:
+        if event.data["entity_id"] == fans[0]:
+            states.append(event.data["new_state"])
+
+    unsub = hass.bus.async_listen("state_changed", state_changed)
+    start = time.perf_counter()
+    await _async_call_latencies(
+        hass,
+        "fan",
+        "set_percentage",
+        lambda iteration: {"entity_id": fans[0], "percentage": iteration + 1},
+        100,
+    )
+    ramp = time.perf_counter() - start
+    # Let the last state held back by the rate limit land
+    await asyncio.sleep(PUBLISH_SETTLE)
+    unsub()
+    results["ramp"] = {
+        "steps_per_second": round(100 / ramp, 1),
+        "state_changes": len(states),
+    }
+    return results
+
+
+async def _async_benchmark_backends(
+    hass: HomeAssistant, args: argparse.Namespace
+) -> dict[str, Any]:
+    """Benchmark sequential writes of one pin through pigpiod and through sysfs."""
+    # Imported from the config dir, where the integration is
+    from custom_components.rpi_gpio_pwm.connection import PigpioConnection
+    from custom_components.rpi_gpio_pwm.sysfs import SysfsPwmConnection
+
+    daemon = FakePigpiod(latency=args.latency / 1000, jitter=args.jitter / 1000)
+    port = await daemon.async_start()
+    results = {}
+    with tempfile.TemporaryDirectory() as root:
+        make_pwm_tree(root)
+        for connection in (
+            PigpioConnection(daemon.host, port),
+            SysfsPwmConnection(root),
+        ):
+            connection.set_hardware_pwm(BACKEND_PIN, BACKEND_FREQUENCY)
+            connection.async_start(hass)
+            await async_wait_until(lambda: connection.available)
+            await connection.async_setup_pin(BACKEND_PIN, BACKEND_FREQUENCY)
+            latencies = []
+            for iteration in range(args.iterations):
+                start = time.perf_counter()
+                await connection.async_set_value(
+                    BACKEND_PIN, 0.25 if iteration % 2 else 0.75
+                )
+                latencies.append(time.perf_counter() - start)
+            results[connection.backend] = latency_summary(latencies)
+            await connection.async_close(hass)
+    await daemon.async_stop()
+    return results
+
+
+async def _async_benchmark(args: argparse.Namespace) -> dict[str, Any]:
+    """Run every benchmark and return the results."""
+    daemon = FakePigpiod(latency=args.latency / 1000, jitter=args.jitter / 1000)
+    port = await daemon.async_start()
+    with tempfile.TemporaryDirectory() as config_dir:
+        os.symlink(
+            os.path.join(ROOT, "custom_components"),
+            os.path.join(config_dir, "custom_components"),
+        )
+        with open(
+            os.path.join(config_dir, "configuration.yaml"), "w", encoding="utf-8"
+        ) as config:
+            config.write(_configuration(port, args.lights, args.fans))
+        sys.path.insert(0, config_dir)
+
+        start = time.perf_counter()
+        hass = await bootstrap.async_setup_hass(
+            RuntimeConfig(config_dir=config_dir, skip_pip=True)
+        )
+        setup = time.perf_counter() - start
+        await hass.async_start()
+        lights = [f"light.bench_led_{index}" for index in range(args.lights)]
+        fans = [f"fan.bench_fan_{index}" for index in range(args.fans)]
+        await _async_wait_available(hass, lights + fans)
+        results = {
+            "daemon": {"latency_ms": args.latency, "jitter_ms": args.jitter},
+            "setup": {
+                "entities": len(lights) + len(fans),
+                "setup_ms": round(setup * 1000, 3),
+                "available_ms": round((time.perf_counter() - start) * 1000, 3),
+            },
+        }
+        if lights:
+            results["light"] = await _async_benchmark_lights(
+                hass, daemon, lights, args.iterations, args.transition
+            )
+            results["effects"] = await _async_benchmark_effects(
+                hass, daemon, lights, args.effect_seconds
+            )
+        if fans:
+            results["fan"] = await _async_benchmark_fans(hass, fans, args.iterations)
+        results["backends"] = await _async_benchmark_backends(hass, args)
+        await hass.async_stop()
+    await daemon.async_stop()
+    return results
+
+
+def main() -> int:
+    """Parse the arguments, run the benchmarks and report the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lights", type=int, default=8)
+    parser.add_argument("--fans", type=int, default=4)
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--transition", type=float, default=2, help="seconds")
+    parser.add_argument("--effect-seconds", type=float, default=5)
+    parser.add_argument("--latency", type=float, default=1, help="milliseconds")
+    parser.add_argument("--jitter", type=float, default=0.5, help="milliseconds")
+    parser.add_argument("--output", help="also write the results to this JSON file")
+    args = parser.parse_args()
+    if args.lights + args.fans > len(PINS):
+        parser.error(f"at most {len(PINS)} lights and fans share one daemon")
+    if args.lights < 1 and args.fans < 1:
+        parser.error("benchmark at least one light or fan")
+
+    results = asyncio.run(_async_benchmark(args))
+    report = json.dumps(results, indent=2)
+    sys.stdout.write(report + "\n")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            output.write(report + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
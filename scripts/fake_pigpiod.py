@@ -0,0 +1,384 @@
+"""Stand-in pigpiod speaking the socket protocol, for benchmarks and development.
+
+Run it on its own to point Home Assistant at a daemon without a Raspberry
+Pi, or import FakePigpiod to drive it from a benchmark:
+
+    python scripts/fake_pigpiod.py --port 8888 --latency 5 --jitter 2
+
+Scripts are stored and run by a small interpreter of the pigpiod commands
+the fade script of the integration uses. With --reject-scripts every
+script is refused as invalid, so the fades fall back to Home Assistant.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections import Counter
+import contextlib
+from dataclasses import dataclass, field
+import logging
+import random
+import struct
+
+_LOGGER = logging.getLogger(__name__)
+
+_HEADER = struct.Struct("<IIII")
+_RESPONSE = struct.Struct("<IIIi")
+
+# Commands with a result other than 0
+CMD_MODES = 0
+CMD_MODEG = 1
+CMD_READ = 3
+CMD_PWM = 5
+CMD_PRS = 6
+CMD_PFS = 7
+CMD_BR1 = 10
+CMD_HWVER = 17
+CMD_PRG = 22
+CMD_PFG = 23
+CMD_PIGPV = 26
+CMD_PROC = 38
+CMD_PROCD = 39
+CMD_PROCR = 40
+CMD_PROCS = 41
+CMD_PROCP = 45
+CMD_GDC = 83
+CMD_HP = 86
+CMD_NOIB = 99
+
+# A Raspberry Pi 3 model B, so gpiozero knows the header
+HARDWARE_REVISION = 0xA02082
+PIGPIO_VERSION = 79
+DEFAULT_PWM_RANGE = 255
+DEFAULT_PWM_FREQUENCY = 800
+# Returned by GDC on a pin not running PWM
+PI_NOT_PWM_GPIO = -92
+PI_BAD_SCRIPT = -47
+PI_BAD_SCRIPT_ID = -48
+
+# Status of a script, returned by PROCP with its parameters
+PI_SCRIPT_INITING = 0
+PI_SCRIPT_HALTED = 1
+PI_SCRIPT_RUNNING = 2
+PI_SCRIPT_WAITING = 3
+PI_SCRIPT_FAILED = 4
+SCRIPT_PARAMS = 10
+_SCRIPT_STATUS = struct.Struct(f"<{SCRIPT_PARAMS + 1}i")
+# Script commands the interpreter knows, with their number of arguments
+SCRIPT_COMMANDS = {
+    "add": 1,
+    "cmp": 1,
+    "div": 1,
+    "inr": 1,
+    "jm": 1,
+    "ld": 2,
+    "lda": 1,
+    "mils": 1,
+    "mlt": 1,
+    "pwm": 2,
+    "sta": 1,
+    "sub": 1,
+    "tag": 1,
+}
+
+
+@dataclass
+class PinState:
+    """What the daemon knows about one GPIO."""
+
+    mode: int = 0
+    duty: int = 0
+    range: int = DEFAULT_PWM_RANGE
+    frequency: int = DEFAULT_PWM_FREQUENCY
+    pwm: bool = False
+
+
+@dataclass
+class Script:
+    """A script stored in the daemon, as (command, arguments) steps."""
+
+    steps: list[tuple[str, list[str]]]
+    # tag -> index of the step following it
+    tags: dict[str, int]
+    status: int = PI_SCRIPT_HALTED
+    params: list[int] = field(default_factory=lambda: [0] * SCRIPT_PARAMS)
+    task: asyncio.Task | None = None
+
+
+def parse_script(text: str) -> Script | None:
+    """Return a script, None if a command is unknown or misses arguments."""
+    tokens = text.split()
+    steps = []
+    tags = {}
+    while tokens:
+        command = tokens.pop(0)
+        count = SCRIPT_COMMANDS.get(command)
+        if count is None or len(tokens) < count:
+            return None
+        args, tokens = tokens[:count], tokens[count:]
+        if command == "tag":
+            tags[args[0]] = len(steps)
+        else:
+            steps.append((command, args))
+    if any(command == "jm" and args[0] not in tags for command, args in steps):
+        return None
+    return Script(steps, tags)
+
+
+@dataclass
+class FakePigpiod:
+    """Answer pigpiod commands from memory, after a configurable delay.
+
+    The delay models the network: each response leaves latency plus up to
+    jitter seconds after its command arrived, but never before the response
+    to the previous command, so pipelined commands overlap as they would on
+    a real link. Unknown commands succeed with a result of 0. A stored
+    script runs as a task of the daemon, writing duty cycles like PWM
+    commands would, without counting as commands.
+    """
+
+    host: str = "127.0.0.1"
+    port: int = 0
+    latency: float = 0.0
+    jitter: float = 0.0
+    reject_scripts: bool = False
+    pins: dict[int, PinState] = field(default_factory=dict)
+    commands: Counter = field(default_factory=Counter)
+    connections: int = 0
+    scripts: dict[int, Script] = field(default_factory=dict)
+    _server: asyncio.AbstractServer | None = None
+    _clients: set[asyncio.Task] = field(default_factory=set)
+    _notify_handles: int = 0
+    _next_script: int = 0
+
+    async def async_start(self) -> int:
+        """Start listening and return the port."""
+        self._server = await asyncio.start_server(
+            self._async_handle, self.host, self.port
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def async_stop(self) -> None:
+        """Stop listening and drop every connection."""
+        if self._server is not None:
+            self._server.close()
+            for client in self._clients:
+                client.cancel()
+            await asyncio.gather(*self._clients, return_exceptions=True)
+            await self._server.wait_closed()
+            self._server = None
+        for script in self.scripts.values():
+            if script.task is not None:
+                script.task.cancel()
+
+    def pin(self, pin: int) -> PinState:
+        """Return the state of a pin."""
+        if pin not in self.pins:
+            self.pins[pin] = PinState()
+        return self.pins[pin]
+
+    def reset_counts(self) -> None:
+        """Forget the commands counted so far."""
+        self.commands.clear()
+
+    def _execute(self, cmd: int, p1: int, p2: int, extension: bytes) -> int:
+        """Run one command and return its result."""
+        self.commands[cmd] += 1
+        if cmd == CMD_MODES:
+            self.pin(p1).mode = p2
+            self.pin(p1).pwm = False
+        elif cmd == CMD_MODEG:
+            return self.pin(p1).mode
+        elif cmd == CMD_PWM:
+            state = self.pin(p1)
+            state.duty = p2
+            state.pwm = True
+        elif cmd == CMD_PRS:
+            self.pin(p1).range = p2
+            return p2
+        elif cmd == CMD_PFS:
+            self.pin(p1).frequency = p2
+            return p2
+        elif cmd == CMD_PRG:
+            return self.pin(p1).range
+        elif cmd == CMD_PFG:
+            return self.pin(p1).frequency
+        elif cmd == CMD_GDC:
+            state = self.pin(p1)
+            return state.duty if state.pwm else PI_NOT_PWM_GPIO
+        elif cmd == CMD_HP:
+            state = self.pin(p1)
+            state.frequency = p2
+            state.range = 1_000_000
+            state.duty = struct.unpack("<I", extension)[0]
+            state.pwm = True
+        elif cmd == CMD_HWVER:
+            return HARDWARE_REVISION
+        elif cmd == CMD_PIGPV:
+            return PIGPIO_VERSION
+        elif cmd == CMD_NOIB:
+            self._notify_handles += 1
+            return self._notify_handles - 1
+        elif cmd in (CMD_PROC, CMD_PROCD, CMD_PROCR, CMD_PROCS, CMD_PROCP):
+            return self._execute_script(cmd, p1, extension)
+        return 0
+
+    def _execute_script(self, cmd: int, script_id: int, extension: bytes) -> int:
+        """Run one command storing, running or querying a script."""
+        if cmd == CMD_PROC:
+            script = None if self.reject_scripts else parse_script(extension.decode())
+            if script is None:
+                return PI_BAD_SCRIPT
+            self._next_script += 1
+            self.scripts[self._next_script - 1] = script
+            return self._next_script - 1
+        script = self.scripts.get(script_id)
+        if script is None:
+            return PI_BAD_SCRIPT_ID
+        if cmd == CMD_PROCP:
+            return _SCRIPT_STATUS.size
+        if script.task is not None:
+            script.task.cancel()
+            script.task = None
+        if cmd == CMD_PROCR:
+            params = struct.unpack(f"<{len(extension) // 4}I", extension)
+            script.params[: len(params)] = params
+            script.status = PI_SCRIPT_RUNNING
+            script.task = asyncio.get_running_loop().create_task(
+                self._async_run_script(script)
+            )
+        elif cmd == CMD_PROCS:
+            script.status = PI_SCRIPT_HALTED
+        elif cmd == CMD_PROCD:
+            del self.scripts[script_id]
+        return 0
+
+    def _script_status(self, script_id: int) -> bytes:
+        """Return the status and the parameters of a script, for PROCP."""
+        script = self.scripts[script_id]
+        return _SCRIPT_STATUS.pack(script.status, *script.params)
+
+    async def _async_run_script(self, script: Script) -> None:
+        """Interpret a script until it ends, fails or is stopped."""
+        variables = [0] * SCRIPT_PARAMS
+        accumulator = 0
+        flag = 0
+
+        def value(arg: str) -> int:
+            if arg[0] == "v":
+                return variables[int(arg[1:])]
+            if arg[0] == "p":
+                return script.params[int(arg[1:])]
+            return int(arg)
+
+        def store(arg: str, result: int) -> None:
+            (variables if arg[0] == "v" else script.params)[int(arg[1:])] = result
+
+        index = 0
+        try:
+            while index < len(script.steps):
+                command, args = script.steps[index]
+                index += 1
+                if command == "ld":
+                    store(args[0], value(args[1]))
+                elif command == "mils":
+                    await asyncio.sleep(value(args[0]) / 1000)
+                elif command == "inr":
+                    store(args[0], value(args[0]) + 1)
+                elif command == "lda":
+                    accumulator = value(args[0])
+                elif command == "sta":
+                    store(args[0], accumulator)
+                elif command == "add":
+                    accumulator += value(args[0])
+                elif command == "sub":
+                    accumulator -= value(args[0])
+                elif command == "mlt":
+                    accumulator *= value(args[0])
+                elif command == "div":
+                    # Integer division of C, rounding towards 0
+                    accumulator = int(accumulator / value(args[0]))
+                elif command == "cmp":
+                    flag = accumulator - value(args[0])
+                elif command == "jm" and flag < 0:
+                    index = script.tags[args[0]]
+                    # A loop without mils would never let the daemon answer
+                    await asyncio.sleep(0)
+                elif command == "pwm":
+                    state = self.pin(value(args[0]))
+                    state.duty = value(args[1])
+                    state.pwm = True
+        except (ArithmeticError, IndexError, ValueError):
+            script.status = PI_SCRIPT_FAILED
+            return
+        script.status = PI_SCRIPT_HALTED
+
+    def _delay(self) -> float:
+        """Return the delay of one response."""
+        return self.latency + random.uniform(0, self.jitter)
+
+    async def _async_handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Serve one client connection."""
+        self.connections += 1
+        self._clients.add(asyncio.current_task())
+        loop = asyncio.get_running_loop()
+        responses: asyncio.Queue[tuple[float, bytes]] = asyncio.Queue()
+
+        async def async_send_responses() -> None:
+            while True:
+                due, response = await responses.get()
+                await asyncio.sleep(max(0, due - loop.time()))
+                writer.write(response)
+
+        sender = loop.create_task(async_send_responses())
+        due = 0.0
+        try:
+            while True:
+                cmd, p1, p2, length = _HEADER.unpack(
+                    await reader.readexactly(_HEADER.size)
+                )
+                extension = await reader.readexactly(length) if length else b""
+                result = self._execute(cmd, p1, p2, extension)
+                response = _RESPONSE.pack(cmd, p1, p2, result)
+                if cmd == CMD_PROCP and result > 0:
+                    response += self._script_status(p1)
+                due = max(due, loop.time() + self._delay())
+                responses.put_nowait((due, response))
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._clients.discard(asyncio.current_task())
+            sender.cancel()
+            writer.close()
+
+
+async def _async_main(args: argparse.Namespace) -> None:
+    """Run the daemon until interrupted."""
+    daemon = FakePigpiod(
+        host=args.host,
+        port=args.port,
+        latency=args.latency / 1000,
+        jitter=args.jitter / 1000,
+        reject_scripts=args.reject_scripts,
+    )
+    port = await daemon.async_start()
+    _LOGGER.info("Fake pigpiod listening on %s:%s", args.host, port)
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8888)
+    parser.add_argument("--latency", type=float, default=0, help="milliseconds")
+    parser.add_argument("--jitter", type=float, default=0, help="milliseconds")
+    parser.add_argument(
+        "--reject-scripts", action="store_true", help="refuse to store scripts"
+    )
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(_async_main(parser.parse_args()))
@@ -0,0 +1,66 @@
+"""Stand-in kernel PWM sysfs tree, for benchmarks and development.
+
+Builds the files of /sys/class/pwm in a directory, with the two channels
+of the PWM peripheral already exported, as the pwm-2chan overlay leaves
+them once udev ran. Run it on its own to look at the tree, or import
+make_pwm_tree to point the sysfs backend at one:
+
+    python scripts/fake_sysfs.py /tmp/pwm
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+
+CHANNELS = 2
+
+
+def _write(path: str, value: int) -> None:
+    """Write a file of the tree."""
+    with open(path, "w", encoding="ascii") as file:
+        file.write(f"{value}\n")
+
+
+def make_pwm_tree(root: str, chip: int = 0) -> str:
+    """Build a PWM chip with its channels exported and disabled in root.
+
+    Return the directory of the chip.
+    """
+    path = os.path.join(root, f"pwmchip{chip}")
+    os.makedirs(path, exist_ok=True)
+    _write(os.path.join(path, "npwm"), CHANNELS)
+    for name in ("export", "unexport"):
+        _write(os.path.join(path, name), 0)
+    for channel in range(CHANNELS):
+        channel_path = os.path.join(path, f"pwm{channel}")
+        os.makedirs(channel_path, exist_ok=True)
+        for name in ("period", "duty_cycle", "enable"):
+            _write(os.path.join(channel_path, name), 0)
+    return path
+
+
+def read_channel(root: str, channel: int, chip: int = 0) -> dict[str, int]:
+    """Return the period, duty cycle and enable files of a channel."""
+    path = os.path.join(root, f"pwmchip{chip}", f"pwm{channel}")
+    values = {}
+    for name in ("period", "duty_cycle", "enable"):
+        with open(os.path.join(path, name), encoding="ascii") as file:
+            values[name] = int(file.read().strip() or 0)
+    return values
+
+
+def main() -> int:
+    """Build a tree and list its channels."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("root", help="directory standing in for /sys/class/pwm")
+    args = parser.parse_args()
+    sys.stdout.write(make_pwm_tree(args.root) + "\n")
+    for channel in range(CHANNELS):
+        sys.stdout.write(f"pwm{channel}: {read_channel(args.root, channel)}\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+"""Replay a trace of duty cycle writes against the stand-in pigpiod.
+
+A trace is saved by the rpi_gpio_pwm.stop_trace service, after
+rpi_gpio_pwm.start_trace, as rpi_gpio_pwm_trace.bin in the config dir.
+Each host of the trace gets its own fake daemon, and every call of the
+trace goes through the pigpiod connection of the integration at the time
+it was made, with the pins driven by the PWM peripheral at the frequency
+they had, so the write cache, the burst scheduler and the latencies
+behave as they did at the customer. Then reports:
+
+- calls: the latency of each call, from the call to the acknowledgment
+- writes: the pin writes of the trace and the commands reaching the daemons
+
+The speed runs the trace faster than it was recorded:
+
+    python scripts/replay.py rpi_gpio_pwm_trace.bin --speed 10 --latency 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Any
+
+from benchmark import ROOT, async_wait_until, latency_summary
+from fake_pigpiod import CMD_HP, CMD_PWM, FakePigpiod
+
+from homeassistant import bootstrap
+from homeassistant.runner import RuntimeConfig
+
+sys.path.insert(0, ROOT)
+
+from custom_components.rpi_gpio_pwm.connection import get_registry  # noqa: E402
+from custom_components.rpi_gpio_pwm.pigpiod import PigpiodError  # noqa: E402
+from custom_components.rpi_gpio_pwm.trace import load_trace  # noqa: E402
+
+
+def _calls(records: list[tuple]) -> list[tuple[float, int, dict[int, float]]]:
+    """Group the records of a trace back into the calls that wrote them."""
+    calls = []
+    for seconds, host, pin, value in records:
+        if calls and calls[-1][0] == seconds and calls[-1][1] == host:
+            calls[-1][2][pin] = value
+        else:
+            calls.append((seconds, host, {pin: value}))
+    return calls
+
+
+async def _async_replay(args: argparse.Namespace) -> dict[str, Any]:
+    """Replay the trace and return the results."""
+    with open(args.trace, "rb") as trace:
+        header, records = load_trace(trace.read())
+    calls = _calls(records)
+    if not calls:
+        raise SystemExit("The trace holds no writes")
+    daemons = [
+        FakePigpiod(latency=args.latency / 1000, jitter=args.jitter / 1000)
+        for _ in header["hosts"]
+    ]
+    for daemon in daemons:
+        await daemon.async_start()
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        with open(
+            os.path.join(config_dir, "configuration.yaml"), "w", encoding="utf-8"
+        ) as config:
+            config.write("homeassistant:\n  name: Replay\n  time_zone: UTC\n")
+        hass = await bootstrap.async_setup_hass(
+            RuntimeConfig(config_dir=config_dir, skip_pip=True)
+        )
+        await hass.async_start()
+        registry = get_registry(hass)
+        connections = [
+            await registry.async_acquire(daemon.host, daemon.port) for daemon in daemons
+        ]
+        for connection, pins in zip(connections, header["pins"], strict=True):
+            for pin, frequency in pins.items():
+                if frequency is not None:
+                    connection.set_hardware_pwm(pin, frequency)
+        await async_wait_until(
+            lambda: all(connection.available for connection in connections)
+        )
+        for daemon in daemons:
+            daemon.reset_counts()
+
+        latencies: list[float] = []
+        errors = 0
+
+        async def async_call(connection, values: dict[int, float]) -> None:
+            nonlocal errors
+            start = time.perf_counter()
+            try:
+                await connection.async_set_values(values)
+            except PigpiodError:
+                errors += 1
+                return
+            latencies.append(time.perf_counter() - start)
+
+        loop = asyncio.get_running_loop()
+        first = calls[0][0]
+        start = loop.time()
+        tasks = []
+        for seconds, host, values in calls:
+            await asyncio.sleep(
+                max(0, start + (seconds - first) / args.speed - loop.time())
+            )
+            tasks.append(loop.create_task(async_call(connections[host], values)))
+        await asyncio.gather(*tasks)
+        duration = loop.time() - start
+
+        results = {
+            "daemon": {"latency_ms": args.latency, "jitter_ms": args.jitter},
+            "trace": {
+                "hosts": len(header["hosts"]),
+                "writes": len(records),
+                "dropped": header["dropped"],
+                "calls": len(calls),
+                "seconds": round(calls[-1][0] - first, 3),
+            },
+            "replay": {"speed": args.speed, "seconds": round(duration, 3)},
+            "calls": (latency_summary(latencies) if latencies else {})
+            | {"errors": errors},
+            "writes": {
+                "traced": len(records),
+                "sent": sum(
+                    daemon.commands[CMD_PWM] + daemon.commands[CMD_HP]
+                    for daemon in daemons
+                ),
+                "skipped": sum(connection.cache.hits for connection in connections),
+            },
+        }
+        for daemon in daemons:
+            await registry.async_release(daemon.host, daemon.port)
+        await hass.async_stop()
+    for daemon in daemons:
+        await daemon.async_stop()
+    return results
+
+
+def main() -> int:
+    """Parse the arguments, replay the trace and report the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("trace", help="trace file saved by rpi_gpio_pwm.stop_trace")
+    parser.add_argument("--speed", type=float, default=1, help="1 is real time")
+    parser.add_argument("--latency", type=float, default=1, help="milliseconds")
+    parser.add_argument("--jitter", type=float, default=0.5, help="milliseconds")
+    parser.add_argument("--output", help="also write the results to this JSON file")
+    args = parser.parse_args()
+    if args.speed <= 0:
+        parser.error("the speed must be above 0")
+
+    results = asyncio.run(_async_replay(args))
+    report = json.dumps(results, indent=2)
+    sys.stdout.write(report + "\n")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            output.write(report + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+"""Tests for the rpi_gpio_pwm component."""
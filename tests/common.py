@@ -0,0 +1,65 @@
+"""Helpers for the rpi_gpio_pwm tests."""
+
+import asyncio
+from collections.abc import Callable
+from typing import Any
+
+from fake_pigpiod import FakePigpiod
+
+from homeassistant.config_entries import SOURCE_USER, ConfigEntry
+from homeassistant.const import STATE_UNAVAILABLE
+from homeassistant.core import HomeAssistant
+
+from custom_components.rpi_gpio_pwm.backend import PwmConnection
+from custom_components.rpi_gpio_pwm.const import DOMAIN
+
+# Seconds a connection to a stand-in may take to become available
+AVAILABLE_TIMEOUT = 10
+
+
+async def async_wait_until(condition: Callable[[], bool]) -> None:
+    """Wait until a condition holds, for AVAILABLE_TIMEOUT seconds at most."""
+
+    async def _async_poll() -> None:
+        while not condition():
+            await asyncio.sleep(0.005)
+
+    await asyncio.wait_for(_async_poll(), AVAILABLE_TIMEOUT)
+
+
+async def async_wait_available(
+    connection: PwmConnection, available: bool = True
+) -> None:
+    """Wait until the connection is, or is no longer, available."""
+    await async_wait_until(lambda: connection.available == available)
+
+
+async def async_wait_entity(hass: HomeAssistant, entity_id: str) -> None:
+    """Wait until an entity has set its pins up."""
+    await async_wait_until(
+        lambda: (state := hass.states.get(entity_id)) is not None
+        and state.state != STATE_UNAVAILABLE
+    )
+
+
+async def async_create_entry(
+    hass: HomeAssistant, step: str, user_input: dict[str, Any]
+) -> ConfigEntry:
+    """Create a config entry through a step of the config flow."""
+    result = await hass.config_entries.flow.async_init(
+        DOMAIN, context={"source": SOURCE_USER}
+    )
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"], {"next_step_id": step}
+    )
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"], user_input
+    )
+    await hass.async_block_till_done()
+    return result["result"]
+
+
+def pin_value(daemon: FakePigpiod, pin: int) -> float:
+    """Return the duty cycle of a pin of the stand-in, from 0 to 1."""
+    state = daemon.pin(pin)
+    return state.duty / state.range
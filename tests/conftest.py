@@ -0,0 +1,78 @@
+"""Fixtures for the rpi_gpio_pwm tests.
+
+The pigpiod and sysfs backends are tested against the stand-ins of the
+benchmarks, scripts/fake_pigpiod.py and scripts/fake_sysfs.py.
+"""
+
+from __future__ import annotations
+
+from collections.abc import AsyncGenerator
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "scripts"))
+
+from fake_pigpiod import FakePigpiod  # noqa: E402
+from fake_sysfs import make_pwm_tree  # noqa: E402
+
+from homeassistant import block_async_io, bootstrap  # noqa: E402
+from homeassistant.core import HomeAssistant  # noqa: E402
+from homeassistant.runner import RuntimeConfig  # noqa: E402
+
+from custom_components.rpi_gpio_pwm.connection import (  # noqa: E402
+    PigpioConnection,
+    get_registry,
+)
+
+from .common import async_wait_available  # noqa: E402
+
+
+@pytest.fixture
+async def hass(tmp_path) -> AsyncGenerator[HomeAssistant, None]:
+    """Return a running Home Assistant with an empty configuration."""
+    (tmp_path / "configuration.yaml").write_text(
+        "homeassistant:\n  name: Test\n  time_zone: UTC\n", encoding="utf-8"
+    )
+    hass = await bootstrap.async_setup_hass(
+        RuntimeConfig(config_dir=str(tmp_path), skip_pip=True)
+    )
+    await hass.async_start()
+    yield hass
+    await hass.async_stop(force=True)
+    # Bootstrap can only enable the blocking call detection once per process,
+    # undo it for the next instance as the Home Assistant tests do
+    calls = block_async_io._BLOCKED_CALLS.calls
+    for call in calls:
+        setattr(call.object, call.function, call.original_func)
+    calls.clear()
+
+
+@pytest.fixture
+async def daemon() -> AsyncGenerator[FakePigpiod, None]:
+    """Return a running stand-in pigpiod."""
+    daemon = FakePigpiod()
+    await daemon.async_start()
+    yield daemon
+    await daemon.async_stop()
+
+
+@pytest.fixture
+def pwm_root(tmp_path) -> str:
+    """Return a stand-in /sys/class/pwm with one PWM chip."""
+    root = tmp_path / "pwm"
+    make_pwm_tree(str(root))
+    return str(root)
+
+
+@pytest.fixture
+async def connection(hass, daemon) -> AsyncGenerator[PigpioConnection, None]:
+    """Return an available connection to the stand-in pigpiod."""
+    registry = get_registry(hass)
+    connection = await registry.async_acquire(daemon.host, daemon.port)
+    await async_wait_available(connection)
+    yield connection
+    await registry.async_release(daemon.host, daemon.port)
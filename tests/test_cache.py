@@ -0,0 +1,53 @@
+"""Tests for the write cache."""
+
+from custom_components.rpi_gpio_pwm import cache
+from custom_components.rpi_gpio_pwm.cache import WriteCache
+
+
+def test_skips_the_duty_cycle_a_pin_has() -> None:
+    """Test that only a write of the same duty cycle and frequency is fresh."""
+    write_cache = WriteCache()
+    assert not write_cache.is_fresh(18, 100)
+    write_cache.store(18, 100)
+    assert write_cache.is_fresh(18, 100)
+    assert not write_cache.is_fresh(18, 101)
+    assert not write_cache.is_fresh(18, 100, 25000)
+    assert (write_cache.hits, write_cache.misses) == (1, 3)
+
+
+def test_refresh_interval(monkeypatch) -> None:
+    """Test that an unchanged duty cycle is written again after its interval."""
+    now = 1000.0
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now)
+    write_cache = WriteCache()
+    write_cache.set_refresh_interval(18, 10)
+    write_cache.store(18, 100)
+    now += 9
+    assert write_cache.is_fresh(18, 100)
+    now += 2
+    assert not write_cache.is_fresh(18, 100)
+
+
+def test_refresh_interval_of_0_writes_every_time() -> None:
+    """Test that a refresh interval of 0 disables the cache of a pin."""
+    write_cache = WriteCache()
+    write_cache.set_refresh_interval(18, 0)
+    write_cache.store(18, 100)
+    assert not write_cache.is_fresh(18, 100)
+
+
+def test_invalidate_clear_and_forget() -> None:
+    """Test that forgotten duty cycles are written again."""
+    write_cache = WriteCache()
+    for pin in (4, 17, 18):
+        write_cache.store(pin, 100)
+    write_cache.set_refresh_interval(18, 0)
+    write_cache.invalidate([4])
+    assert not write_cache.is_fresh(4, 100)
+    assert write_cache.is_fresh(17, 100)
+    write_cache.forget(18)
+    write_cache.store(18, 100)
+    assert write_cache.is_fresh(18, 100)
+    write_cache.clear()
+    assert not write_cache.is_fresh(17, 100)
+    assert not write_cache.is_fresh(18, 100)
@@ -0,0 +1,84 @@
+"""Tests for the shared pigpiod connections."""
+
+from fake_pigpiod import CMD_HP, CMD_PWM
+import pytest
+
+from custom_components.rpi_gpio_pwm.connection import get_registry
+from custom_components.rpi_gpio_pwm.pigpiod import HARDWARE_PWM_RANGE, PigpiodError
+
+from .common import async_wait_available, async_wait_until
+
+
+async def test_registry_shares_one_connection(hass, daemon) -> None:
+    """Test that users of a host share a connection closed with the last one."""
+    registry = get_registry(hass)
+    first = await registry.async_acquire(daemon.host, daemon.port)
+    second = await registry.async_acquire(daemon.host, daemon.port)
+    assert first is second
+    assert registry.counts == {f"{daemon.host}:{daemon.port}": 2}
+    await async_wait_available(first)
+    await registry.async_release(daemon.host, daemon.port)
+    assert first.available
+    await registry.async_release(daemon.host, daemon.port)
+    assert registry.counts == {}
+    assert not first.available
+
+
+async def test_setup_and_write(daemon, connection) -> None:
+    """Test that a pin is set up at its frequency and written in its range."""
+    assert await connection.async_setup_pin(4, 1000) is None
+    assert daemon.pin(4).frequency == 1000
+    await connection.async_set_value(4, 0.5)
+    assert daemon.pin(4).duty == round(0.5 * daemon.pin(4).range)
+    assert connection.stats.latency.count == 1
+
+
+async def test_setup_reads_back_the_duty_cycle(daemon, connection) -> None:
+    """Test that the value a pin has is returned and not written again."""
+    daemon.pin(4).pwm = True
+    daemon.pin(4).duty = 51
+    value = await connection.async_setup_pin(4, daemon.pin(4).frequency)
+    assert value == pytest.approx(51 / daemon.pin(4).range)
+    daemon.reset_counts()
+    await connection.async_set_value(4, value)
+    assert daemon.commands[CMD_PWM] == 0
+    assert connection.cache.hits == 1
+
+
+async def test_unchanged_duty_cycle_is_skipped(daemon, connection) -> None:
+    """Test that writing the duty cycle a pin has sends nothing."""
+    await connection.async_setup_pin(4, 800)
+    await connection.async_set_value(4, 0.5)
+    daemon.reset_counts()
+    await connection.async_set_value(4, 0.5)
+    assert daemon.commands[CMD_PWM] == 0
+
+
+async def test_hardware_pwm(daemon, connection) -> None:
+    """Test that a hardware PWM pin is written with its frequency."""
+    connection.set_hardware_pwm(18, 25000)
+    await connection.async_setup_pin(18, 800)
+    await connection.async_set_values({4: 0.25, 18: 0.75})
+    assert daemon.commands[CMD_HP] == 1
+    assert daemon.pin(18).frequency == 25000
+    assert daemon.pin(18).duty == 0.75 * HARDWARE_PWM_RANGE
+    assert connection.writer.bursts == 1
+
+
+async def test_reconnects_after_a_restart(daemon, connection) -> None:
+    """Test that a restarted daemon gets the duty cycle of every pin back."""
+    await connection.async_setup_pin(4, 800)
+    await connection.async_set_value(4, 0.5)
+    duty = daemon.pin(4).duty
+    await daemon.async_stop()
+    await async_wait_available(connection, False)
+    with pytest.raises(PigpiodError):
+        await connection.async_set_value(4, 0.25)
+    daemon.pins.clear()
+    await daemon.async_start()
+    await async_wait_available(connection)
+    await async_wait_until(
+        lambda: daemon.pin(4).duty == round(0.25 * daemon.pin(4).range)
+    )
+    assert duty != daemon.pin(4).duty
+    assert connection.stats.reconnects == 1
@@ -0,0 +1,86 @@
+"""Tests for the closed-loop fan speed control."""
+
+import pytest
+
+from custom_components.rpi_gpio_pwm import controller as controller_module
+from custom_components.rpi_gpio_pwm.const import CONTROL_TEMPERATURE
+from custom_components.rpi_gpio_pwm.controller import FanController, PidController
+
+
+def test_proportional_output_is_clamped() -> None:
+    """Test that the output never leaves the duty cycle range."""
+    pid = PidController(kp=10, ki=0, kd=0, low=0.2, high=0.8, slew_rate=100)
+    pid.reset(0.5)
+    assert pid.update(100, 0, 1) == 0.8
+    assert pid.update(0, 100, 1) == 0.2
+
+
+def test_slew_rate_limits_the_step() -> None:
+    """Test that the output moves by at most the slew rate per second."""
+    pid = PidController(kp=10, ki=0, kd=0, low=0, high=1, slew_rate=0.1)
+    pid.reset(0.5)
+    assert pid.update(100, 0, 1) == pytest.approx(0.6)
+    assert pid.update(100, 0, 0.5) == pytest.approx(0.65)
+
+
+def test_integral_does_not_wind_up() -> None:
+    """Test that a saturated output recovers as soon as the error flips."""
+    pid = PidController(kp=0, ki=10, kd=0, low=0, high=1, slew_rate=100)
+    pid.reset(0)
+    for _ in range(100):
+        pid.update(100, 0, 1)
+    assert pid.output == 1
+    # A windup would keep the output at its maximum for as many steps
+    assert pid.update(0, 100, 0.01) < 1
+
+
+def test_reverse_cools_harder_when_hotter() -> None:
+    """Test that a reverse controller raises its output above the target."""
+    pid = PidController(kp=10, ki=0, kd=0, low=0, high=1, slew_rate=100, reverse=True)
+    pid.reset(0.5)
+    assert pid.update(40, 45, 1) > 0.5
+    assert pid.update(40, 35, 1) < 0.5
+
+
+def test_derivative_acts_on_the_measurement() -> None:
+    """Test that a change of the target does not kick the derivative."""
+    pid = PidController(kp=0, ki=0, kd=10, low=0, high=1, slew_rate=100)
+    pid.reset(0.5)
+    pid.update(50, 50, 1)
+    assert pid.update(80, 50, 1) == 0.5
+    assert pid.update(80, 40, 1) > 0.5
+
+
+async def test_fan_controller_holds_a_temperature(hass, monkeypatch) -> None:
+    """Test that the loop writes the duty cycles of a temperature sensor."""
+    now = 1000.0
+    monkeypatch.setattr(controller_module.time, "monotonic", lambda: now)
+    written = []
+
+    async def async_write(duty: float) -> None:
+        written.append(duty)
+
+    hass.states.async_set("sensor.cpu", "50")
+    controller = FanController(
+        hass,
+        async_write,
+        CONTROL_TEMPERATURE,
+        40,
+        PidController(kp=10, ki=0, kd=0, low=0.2, high=1, slew_rate=100, reverse=True),
+        temperature_entity="sensor.cpu",
+    )
+    controller.start(0.3)
+    assert controller.running
+    now += 1
+    await controller._async_step()
+    assert written == [1]
+    # An unchanged duty cycle is not written again
+    now += 1
+    await controller._async_step()
+    assert written == [1]
+    hass.states.async_set("sensor.cpu", "unavailable")
+    now += 1
+    await controller._async_step()
+    assert written == [1]
+    controller.stop()
+    assert not controller.running
@@ -0,0 +1,47 @@
+"""Tests for the dimming curves."""
+
+import pytest
+
+from custom_components.rpi_gpio_pwm.const import (
+    CURVE_CIE1931,
+    CURVE_GAMMA,
+    CURVE_LINEAR,
+)
+from custom_components.rpi_gpio_pwm.curves import TABLE_STEPS, BrightnessCurve
+
+
+@pytest.mark.parametrize("curve", [CURVE_LINEAR, CURVE_GAMMA, CURVE_CIE1931])
+def test_bounds(curve: str) -> None:
+    """Test that off is 0 and every other level stays within the duty range."""
+    brightness = BrightnessCurve(curve, 2.2, 10, 90)
+    assert brightness.duty(0) == 0
+    assert brightness.duty(1 / TABLE_STEPS) >= 0.1
+    assert brightness.duty(1) == pytest.approx(0.9)
+    duties = [brightness.duty(step / TABLE_STEPS) for step in range(TABLE_STEPS + 1)]
+    assert duties == sorted(duties)
+
+
+def test_linear_interpolates_between_steps() -> None:
+    """Test that a level between two steps gets a duty cycle between theirs."""
+    brightness = BrightnessCurve(CURVE_LINEAR, 1, 0, 100)
+    assert brightness.duty(0.5) == pytest.approx(0.5)
+    assert brightness.duty(0.3333) == pytest.approx(0.3333)
+
+
+def test_gamma_and_cie1931_dim_the_low_levels() -> None:
+    """Test that the perceptual curves are below the linear one at mid level."""
+    assert BrightnessCurve(CURVE_GAMMA, 2.2, 0, 100).duty(0.5) == pytest.approx(
+        0.5**2.2, abs=0.001
+    )
+    assert BrightnessCurve(CURVE_CIE1931, 1, 0, 100).duty(0.5) == pytest.approx(
+        0.184, abs=0.001
+    )
+
+
+@pytest.mark.parametrize("curve", [CURVE_LINEAR, CURVE_GAMMA, CURVE_CIE1931])
+def test_level_reads_back_the_duty_cycle(curve: str) -> None:
+    """Test that the level of a duty cycle written is the level it came from."""
+    brightness = BrightnessCurve(curve, 2.2, 5, 100)
+    for step in range(TABLE_STEPS + 1):
+        level = step / TABLE_STEPS
+        assert brightness.level(brightness.duty(level)) == level
@@ -0,0 +1,98 @@
+"""Tests for the PWM fan entities."""
+
+import pytest
+
+from homeassistant.components.fan import (
+    ATTR_PERCENTAGE,
+    DOMAIN as FAN_DOMAIN,
+    SERVICE_SET_PERCENTAGE,
+)
+from homeassistant.const import (
+    ATTR_ENTITY_ID,
+    CONF_HOST,
+    CONF_NAME,
+    CONF_PLATFORM,
+    CONF_PORT,
+    SERVICE_TURN_OFF,
+)
+from homeassistant.core import HomeAssistant
+from homeassistant.setup import async_setup_component
+
+from custom_components.rpi_gpio_pwm.const import (
+    CONF_FAN,
+    CONF_FREQUENCY,
+    CONF_GROUPS,
+    CONF_MEMBERS,
+    CONF_OFFSET,
+    CONF_PIN,
+    CONF_SCALE,
+    DOMAIN,
+)
+
+from .common import async_create_entry, async_wait_entity, pin_value
+
+
+async def _async_call(
+    hass: HomeAssistant, service: str, entity_id: str, **data
+) -> None:
+    """Call a fan service and wait for the entity to have handled it."""
+    await hass.services.async_call(
+        FAN_DOMAIN, service, {ATTR_ENTITY_ID: entity_id, **data}, blocking=True
+    )
+
+
+async def test_group_spreads_the_speed_over_its_members(hass, daemon) -> None:
+    """Test that every member runs at the speed of the group, offset and scaled."""
+    assert await async_setup_component(
+        hass,
+        FAN_DOMAIN,
+        {
+            FAN_DOMAIN: {
+                CONF_PLATFORM: DOMAIN,
+                CONF_GROUPS: [
+                    {
+                        CONF_NAME: "Rack",
+                        CONF_MEMBERS: [
+                            {CONF_PIN: 5, CONF_SCALE: 0.8},
+                            {CONF_PIN: 6, CONF_OFFSET: 20},
+                        ],
+                        CONF_HOST: daemon.host,
+                        CONF_PORT: daemon.port,
+                    }
+                ],
+            }
+        },
+    )
+    await hass.async_block_till_done()
+    await async_wait_entity(hass, "fan.rack")
+    await _async_call(hass, SERVICE_SET_PERCENTAGE, "fan.rack", **{ATTR_PERCENTAGE: 50})
+    assert pin_value(daemon, 5) == pytest.approx(0.4, abs=0.01)
+    assert pin_value(daemon, 6) == pytest.approx(0.7, abs=0.01)
+    await _async_call(hass, SERVICE_TURN_OFF, "fan.rack")
+    assert pin_value(daemon, 5) == 0
+    assert pin_value(daemon, 6) == 0
+
+
+async def test_options_apply_in_place(hass, daemon) -> None:
+    """Test that a changed frequency never stops the fan."""
+    entry = await async_create_entry(
+        hass,
+        CONF_FAN,
+        {
+            CONF_NAME: "Case",
+            CONF_PIN: 12,
+            CONF_HOST: daemon.host,
+            CONF_PORT: daemon.port,
+        },
+    )
+    await async_wait_entity(hass, "fan.case")
+    await _async_call(hass, SERVICE_SET_PERCENTAGE, "fan.case", **{ATTR_PERCENTAGE: 60})
+    state = hass.states.get("fan.case")
+    hass.config_entries.async_update_entry(
+        entry, data={**entry.data, CONF_FREQUENCY: 400}
+    )
+    await hass.async_block_till_done()
+    assert daemon.pin(12).frequency == 400
+    assert pin_value(daemon, 12) == pytest.approx(0.6, abs=0.01)
+    # A reload would have made the fan unavailable in between
+    assert hass.states.get("fan.case").last_changed == state.last_changed
@@ -0,0 +1,229 @@
+"""Tests for the PWM light entities."""
+
+import asyncio
+
+import pytest
+
+from homeassistant.components.light import (
+    ATTR_BRIGHTNESS,
+    ATTR_EFFECT,
+    ATTR_RGB_COLOR,
+    ATTR_TRANSITION,
+    DOMAIN as LIGHT_DOMAIN,
+)
+from homeassistant.const import (
+    ATTR_ENTITY_ID,
+    CONF_HOST,
+    CONF_NAME,
+    CONF_PLATFORM,
+    CONF_PORT,
+    CONF_UNIQUE_ID,
+    SERVICE_TURN_OFF,
+    SERVICE_TURN_ON,
+)
+from homeassistant.core import HomeAssistant
+from homeassistant.setup import async_setup_component
+
+from custom_components.rpi_gpio_pwm.const import (
+    CONF_BLUE_PIN,
+    CONF_COLOR_LIGHT,
+    CONF_COLOR_TYPE,
+    CONF_FREQUENCY,
+    CONF_GREEN_PIN,
+    CONF_GROUPS,
+    CONF_LEDS,
+    CONF_LIGHT,
+    CONF_MAX_DUTY,
+    CONF_MEMBERS,
+    CONF_OFFSET,
+    CONF_PIN,
+    CONF_RED_PIN,
+    CONF_SCALE,
+    COLOR_TYPE_RGB,
+    DOMAIN,
+    EFFECT_BREATHE,
+)
+
+from .common import (
+    async_create_entry,
+    async_wait_entity,
+    async_wait_until,
+    pin_value,
+)
+
+
+async def _async_setup_platform(hass: HomeAssistant, config: dict) -> None:
+    """Set up the YAML light platform of the integration."""
+    assert await async_setup_component(
+        hass, LIGHT_DOMAIN, {LIGHT_DOMAIN: {CONF_PLATFORM: DOMAIN, **config}}
+    )
+    await hass.async_block_till_done()
+
+
+async def _async_turn_on(hass: HomeAssistant, entity_id: str, **data) -> None:
+    """Turn a light on and wait for the entity to have handled it."""
+    await hass.services.async_call(
+        LIGHT_DOMAIN,
+        SERVICE_TURN_ON,
+        {ATTR_ENTITY_ID: entity_id, **data},
+        blocking=True,
+    )
+
+
+async def _async_turn_off(hass: HomeAssistant, entity_id: str, **data) -> None:
+    """Turn a light off and wait for the entity to have handled it."""
+    await hass.services.async_call(
+        LIGHT_DOMAIN,
+        SERVICE_TURN_OFF,
+        {ATTR_ENTITY_ID: entity_id, **data},
+        blocking=True,
+    )
+
+
+@pytest.fixture
+async def led(hass, daemon) -> str:
+    """Return the entity id of a YAML LED on pin 4 of the stand-in pigpiod."""
+    await _async_setup_platform(
+        hass,
+        {
+            CONF_LEDS: [
+                {
+                    CONF_NAME: "Desk",
+                    CONF_UNIQUE_ID: "desk",
+                    CONF_PIN: 4,
+                    CONF_HOST: daemon.host,
+                    CONF_PORT: daemon.port,
+                }
+            ]
+        },
+    )
+    await async_wait_entity(hass, "light.desk")
+    return "light.desk"
+
+
+async def test_fade_retargets_from_where_the_light_is(hass, daemon, led) -> None:
+    """Test that a new fade starts at the level of the one it replaces."""
+    await _async_turn_on(hass, led, **{ATTR_BRIGHTNESS: 255})
+    assert pin_value(daemon, 4) == 1
+    await _async_turn_off(hass, led, **{ATTR_TRANSITION: 2})
+    await asyncio.sleep(0.5)
+    level = pin_value(daemon, 4)
+    assert 0 < level < 1
+    await _async_turn_on(hass, led, **{ATTR_BRIGHTNESS: 255, ATTR_TRANSITION: 1})
+    assert pin_value(daemon, 4) == pytest.approx(level, abs=0.1)
+    await async_wait_until(lambda: pin_value(daemon, 4) == 1)
+
+
+async def test_effect_runs_until_turned_off(hass, daemon, led) -> None:
+    """Test that an effect writes frames and stops with the light."""
+    await _async_turn_on(hass, led, **{ATTR_EFFECT: EFFECT_BREATHE})
+    await async_wait_until(lambda: pin_value(daemon, 4) > 0)
+    level = pin_value(daemon, 4)
+    await async_wait_until(lambda: pin_value(daemon, 4) != level)
+    await _async_turn_off(hass, led)
+    assert pin_value(daemon, 4) == 0
+    await asyncio.sleep(0.1)
+    assert pin_value(daemon, 4) == 0
+    await async_wait_until(lambda: hass.states.get(led).attributes[ATTR_EFFECT] is None)
+
+
+async def test_commands_within_the_interval_publish_once(hass, daemon, led) -> None:
+    """Test that a burst of commands writes its first and last states only."""
+    brightnesses = []
+
+    def _state_changed(event) -> None:
+        if event.data[ATTR_ENTITY_ID] == led:
+            brightnesses.append(event.data["new_state"].attributes[ATTR_BRIGHTNESS])
+
+    hass.bus.async_listen("state_changed", _state_changed)
+    for brightness in (64, 128, 192, 255):
+        await _async_turn_on(hass, led, **{ATTR_BRIGHTNESS: brightness})
+    await hass.async_block_till_done()
+    assert brightnesses == [64]
+    assert pin_value(daemon, 4) == 1
+    await async_wait_until(lambda: len(brightnesses) == 2)
+    assert brightnesses == [64, 255]
+
+
+async def test_group_spreads_the_level_over_its_members(hass, daemon) -> None:
+    """Test that every member gets the level of the group, offset and scaled."""
+    await _async_setup_platform(
+        hass,
+        {
+            CONF_GROUPS: [
+                {
+                    CONF_NAME: "Shelf",
+                    CONF_MEMBERS: [
+                        {CONF_PIN: 5},
+                        {CONF_PIN: 6, CONF_OFFSET: 10, CONF_SCALE: 0.5},
+                    ],
+                    CONF_HOST: daemon.host,
+                    CONF_PORT: daemon.port,
+                }
+            ]
+        },
+    )
+    await async_wait_entity(hass, "light.shelf")
+    await _async_turn_on(hass, "light.shelf", **{ATTR_BRIGHTNESS: 255})
+    assert pin_value(daemon, 5) == 1
+    assert pin_value(daemon, 6) == pytest.approx(0.6, abs=0.01)
+    await _async_turn_on(hass, "light.shelf", **{ATTR_BRIGHTNESS: 51})
+    assert pin_value(daemon, 5) == pytest.approx(0.2, abs=0.01)
+    assert pin_value(daemon, 6) == pytest.approx(0.2, abs=0.01)
+    await _async_turn_off(hass, "light.shelf")
+    assert pin_value(daemon, 5) == 0
+    assert pin_value(daemon, 6) == 0
+
+
+async def test_color_light_drives_a_pin_per_channel(hass, daemon) -> None:
+    """Test that an RGB light writes each channel to its pin."""
+    await async_create_entry(
+        hass,
+        CONF_COLOR_LIGHT,
+        {
+            CONF_NAME: "Strip",
+            CONF_COLOR_TYPE: COLOR_TYPE_RGB,
+            CONF_RED_PIN: 17,
+            CONF_GREEN_PIN: 27,
+            CONF_BLUE_PIN: 22,
+            CONF_HOST: daemon.host,
+            CONF_PORT: daemon.port,
+        },
+    )
+    await async_wait_entity(hass, "light.strip")
+    await _async_turn_on(
+        hass,
+        "light.strip",
+        **{ATTR_BRIGHTNESS: 255, ATTR_RGB_COLOR: (255, 51, 0)},
+    )
+    assert pin_value(daemon, 17) == 1
+    assert pin_value(daemon, 27) == pytest.approx(0.2, abs=0.01)
+    assert pin_value(daemon, 22) == 0
+    await _async_turn_on(hass, "light.strip", **{ATTR_BRIGHTNESS: 51})
+    assert pin_value(daemon, 17) == pytest.approx(0.2, abs=0.01)
+    assert pin_value(daemon, 27) == pytest.approx(0.04, abs=0.01)
+
+
+async def test_options_apply_in_place(hass, daemon) -> None:
+    """Test that a changed frequency and curve never turn the LED off."""
+    entry = await async_create_entry(
+        hass,
+        CONF_LIGHT,
+        {
+            CONF_NAME: "Lamp",
+            CONF_PIN: 4,
+            CONF_HOST: daemon.host,
+            CONF_PORT: daemon.port,
+        },
+    )
+    await async_wait_entity(hass, "light.lamp")
+    await _async_turn_on(hass, "light.lamp", **{ATTR_BRIGHTNESS: 255})
+    state = hass.states.get("light.lamp")
+    hass.config_entries.async_update_entry(
+        entry, data={**entry.data, CONF_FREQUENCY: 400, CONF_MAX_DUTY: 50}
+    )
+    await hass.async_block_till_done()
+    assert daemon.pin(4).frequency == 400
+    assert pin_value(daemon, 4) == pytest.approx(0.5, abs=0.01)
+    # A reload would have made the light unavailable in between
+    assert hass.states.get("light.lamp").last_changed == state.last_changed
@@ -0,0 +1,61 @@
+"""Tests for the latency statistics."""
+
+import pytest
+
+from custom_components.rpi_gpio_pwm.stats import (
+    LATENCY_BUCKETS,
+    ConnectionStats,
+    LatencyHistogram,
+)
+
+
+def test_histogram() -> None:
+    """Test the buckets, the percentiles and the maximum of a histogram."""
+    histogram = LatencyHistogram()
+    assert histogram.percentile(0.5) is None
+    for seconds in (0.0005, 0.0015, 0.0015, 0.003, 10):
+        histogram.record(seconds)
+    assert histogram.count == 5
+    assert histogram.buckets[0] == 1
+    assert histogram.buckets[1] == 2
+    assert histogram.buckets[-1] == 1
+    assert histogram.percentile(0.5) == 0.002
+    assert histogram.percentile(1) == 10
+    assert histogram.max == 10
+
+
+def test_histogram_as_dict() -> None:
+    """Test the diagnostics of a histogram, in milliseconds."""
+    histogram = LatencyHistogram()
+    assert histogram.as_dict()["mean_ms"] is None
+    histogram.record(0.004)
+    histogram.record(0.006)
+    data = histogram.as_dict()
+    assert data["count"] == 2
+    assert data["mean_ms"] == 5
+    assert data["max_ms"] == 6
+    assert data["p50_ms"] == 5
+    assert len(data["buckets"]) == len(LATENCY_BUCKETS) + 1
+    assert data["buckets"]["le_5.0ms"] == 1
+
+
+def test_recent_is_a_moving_average() -> None:
+    """Test that the recent latency follows the newest ones."""
+    histogram = LatencyHistogram()
+    histogram.record(1)
+    assert histogram.recent == 1
+    histogram.record(2)
+    assert histogram.recent == pytest.approx(1.2)
+
+
+def test_connection_stats() -> None:
+    """Test that a burst counts for the daemon and for each of its pins."""
+    stats = ConnectionStats()
+    stats.record([4, 18], 0.002)
+    stats.record([18], 0.01)
+    assert stats.latency.count == 2
+    assert stats.pins[4].count == 1
+    assert stats.pins[18].count == 2
+    assert stats.recent([4]) == 0.002
+    assert stats.recent([4, 18]) == stats.pins[18].recent
+    assert stats.recent([17]) is None
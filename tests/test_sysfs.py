@@ -0,0 +1,64 @@
+"""Tests for the kernel PWM sysfs backend."""
+
+from fake_sysfs import read_channel
+import pytest
+
+from custom_components.rpi_gpio_pwm.backend import PwmError
+from custom_components.rpi_gpio_pwm.sysfs import SysfsPwmConnection
+
+from .common import async_wait_available
+
+
+@pytest.fixture
+async def connection(hass, pwm_root):
+    """Return an available connection to the stand-in PWM chip."""
+    connection = SysfsPwmConnection(pwm_root)
+    connection.async_start(hass)
+    await async_wait_available(connection)
+    yield connection
+    await connection.async_close(hass)
+
+
+async def test_setup_and_write(pwm_root, connection) -> None:
+    """Test that a pin enables its channel and is written in nanoseconds."""
+    assert await connection.async_setup_pin(18, 25000) is None
+    assert read_channel(pwm_root, 0) == {"period": 40000, "duty_cycle": 0, "enable": 1}
+    await connection.async_set_value(18, 0.25)
+    assert read_channel(pwm_root, 0)["duty_cycle"] == 10000
+    assert connection.commands == 1
+    await connection.async_set_value(18, 0.25)
+    assert connection.commands == 1
+
+
+async def test_setup_keeps_the_duty_cycle(pwm_root, connection) -> None:
+    """Test that an enabled channel keeps its ratio at a new frequency."""
+    await connection.async_setup_pin(13, 25000)
+    await connection.async_set_value(13, 0.5)
+    connection.forget_pin(13)
+    assert await connection.async_setup_pin(13, 50000) == pytest.approx(0.5)
+    assert read_channel(pwm_root, 1) == {
+        "period": 20000,
+        "duty_cycle": 10000,
+        "enable": 1,
+    }
+
+
+async def test_pins_sharing_a_channel(connection) -> None:
+    """Test that a second pin on a channel is refused until the first is freed."""
+    await connection.async_setup_pin(12, 25000)
+    with pytest.raises(PwmError, match="shares PWM channel 0 with GPIO 12"):
+        await connection.async_setup_pin(18, 25000)
+    connection.forget_pin(12)
+    await connection.async_setup_pin(18, 25000)
+
+
+async def test_pin_without_a_channel(connection) -> None:
+    """Test that a pin the PWM peripheral does not drive is refused."""
+    with pytest.raises(PwmError, match="has no channel"):
+        await connection.async_setup_pin(4, 25000)
+
+
+async def test_missing_pin_is_not_written(connection) -> None:
+    """Test that a pin that was not set up is refused."""
+    with pytest.raises(PwmError, match="not set up"):
+        await connection.async_set_value(19, 0.5)
@@ -0,0 +1,40 @@
+"""Tests for the duty cycle write traces."""
+
+import pytest
+
+from custom_components.rpi_gpio_pwm.trace import TraceRecorder, load_trace
+
+
+def test_round_trip() -> None:
+    """Test that a trace loads back with its hosts, pins and writes."""
+    recorder = TraceRecorder(10)
+    recorder.record("pi:8888", {4: 0.25, 18: 0.5}, {18: 25000})
+    recorder.record("other:8888", {4: 1.0}, {})
+    header, records = load_trace(recorder.dump())
+    assert header["hosts"] == ["pi:8888", "other:8888"]
+    assert header["pins"] == [{4: None, 18: 25000}, {4: None}]
+    assert header["records"] == 3
+    assert header["dropped"] == 0
+    assert [record[1:] for record in records] == [
+        (0, 4, 0.25),
+        (0, 18, 0.5),
+        (1, 4, 1.0),
+    ]
+    assert records[0][0] <= records[2][0]
+
+
+def test_ring_buffer_keeps_the_newest_writes() -> None:
+    """Test that a full trace drops its oldest writes first."""
+    recorder = TraceRecorder(3)
+    for value in range(5):
+        recorder.record("pi:8888", {4: value}, {})
+    header, records = load_trace(recorder.dump())
+    assert header["records"] == 3
+    assert header["dropped"] == 2
+    assert [record[3] for record in records] == [2, 3, 4]
+
+
+def test_not_a_trace() -> None:
+    """Test that another file is refused."""
+    with pytest.raises(ValueError, match="Not a rpi_gpio_pwm trace"):
+        load_trace(b"something else")
@@ -0,0 +1,102 @@
+"""Tests for the fades run as a script inside pigpiod."""
+
+import asyncio
+
+from fake_pigpiod import CMD_PWM, PI_SCRIPT_HALTED, PI_SCRIPT_RUNNING, parse_script
+import pytest
+
+from custom_components.rpi_gpio_pwm.const import CURVE_LINEAR
+from custom_components.rpi_gpio_pwm.curves import BrightnessCurve
+from custom_components.rpi_gpio_pwm.transition import FADE_SCRIPT, DaemonRamp, Fader
+
+from .common import async_wait_available, async_wait_until
+
+PIN = 4
+
+
+@pytest.fixture
+async def ramp(hass, connection):
+    """Return the ramp of a pin set up on the stand-in pigpiod."""
+    await connection.async_setup_pin(PIN, 800)
+    ramp = DaemonRamp(connection, PIN, BrightnessCurve(CURVE_LINEAR, 1, 0, 100))
+    yield ramp
+    await hass.async_add_executor_job(ramp.close)
+
+
+async def _async_wait_duty(daemon, duty: int) -> None:
+    """Wait until the pin has a duty cycle."""
+    await async_wait_until(lambda: daemon.pin(PIN).duty == duty)
+
+
+def test_fade_script_parses() -> None:
+    """Test that the stand-in knows every command of the fade script."""
+    assert parse_script(FADE_SCRIPT) is not None
+    assert parse_script("ld v0 0 bogus 1") is None
+    assert parse_script("jm 1") is None
+
+
+async def test_fade_runs_on_the_daemon(hass, daemon, ramp) -> None:
+    """Test that a fade reaches its end without a write from Home Assistant."""
+    daemon.reset_counts()
+    assert await hass.async_add_executor_job(ramp.start, 0, 1, 0.2)
+    await _async_wait_duty(daemon, daemon.pin(PIN).range)
+    assert daemon.commands[CMD_PWM] == 0
+    assert not ramp.failed
+
+
+async def test_stop_returns_the_level_reached(hass, daemon, ramp) -> None:
+    """Test that a stopped fade halts its script where the pin is."""
+    assert await hass.async_add_executor_job(ramp.start, 0, 1, 2)
+    (script,) = daemon.scripts.values()
+    assert script.status == PI_SCRIPT_RUNNING
+    await asyncio.sleep(0.3)
+    level = await hass.async_add_executor_job(ramp.stop)
+    assert 0 < level < 1
+    assert script.status == PI_SCRIPT_HALTED
+    duty = daemon.pin(PIN).duty
+    await asyncio.sleep(0.1)
+    assert daemon.pin(PIN).duty == duty
+
+
+async def test_close_deletes_the_script(hass, daemon, ramp) -> None:
+    """Test that the script of a ramp is removed from the daemon."""
+    assert await hass.async_add_executor_job(ramp.start, 0, 1, 0.1)
+    assert len(daemon.scripts) == 1
+    await hass.async_add_executor_job(ramp.close)
+    assert daemon.scripts == {}
+
+
+async def test_restarted_daemon_gets_the_script_again(
+    hass, daemon, connection, ramp
+) -> None:
+    """Test that the id of a script of a former daemon is never sent."""
+    assert await hass.async_add_executor_job(ramp.start, 0, 1, 0.1)
+    await daemon.async_stop()
+    await async_wait_available(connection, False)
+    daemon.scripts.clear()
+    daemon.pins.clear()
+    await daemon.async_start()
+    await async_wait_available(connection)
+    await connection.async_setup_pin(PIN, 800)
+    assert await hass.async_add_executor_job(ramp.start, 0, 1, 0.1)
+    assert len(daemon.scripts) == 1
+    await _async_wait_duty(daemon, daemon.pin(PIN).range)
+
+
+async def test_rejected_script_fades_from_home_assistant(
+    hass, daemon, connection, ramp
+) -> None:
+    """Test that a daemon refusing the script gets the steps written instead."""
+    daemon.reject_scripts = True
+    daemon.reset_counts()
+
+    async def async_write(level: float) -> None:
+        await connection.async_set_value(PIN, ramp.curve.duty(level))
+
+    fader = Fader(hass, async_write, ramp)
+    await fader.async_fade(1, 0.2)
+    assert ramp.failed
+    assert daemon.scripts == {}
+    await _async_wait_duty(daemon, daemon.pin(PIN).range)
+    assert daemon.commands[CMD_PWM] > 1
+    await fader.async_close()
@@ -0,0 +1,55 @@
+"""Tests for the coalesced duty cycle writes."""
+
+import asyncio
+
+from fake_pigpiod import CMD_HP, CMD_PWM
+import pytest
+
+from custom_components.rpi_gpio_pwm.pigpiod import PigpiodClient, PigpiodError
+from custom_components.rpi_gpio_pwm.writer import WriteScheduler
+
+
+@pytest.fixture
+async def client(daemon):
+    """Return a client connected to the stand-in pigpiod."""
+    client = PigpiodClient(daemon.host, daemon.port)
+    await client.async_connect()
+    yield client
+    await client.async_close()
+
+
+async def test_writes_share_a_burst(daemon, client) -> None:
+    """Test that writes queued together are sent in one burst."""
+    writer = WriteScheduler(client)
+    await asyncio.gather(
+        writer.async_write(4, 10),
+        writer.async_write(17, 20),
+        writer.async_write(18, 300_000, 25000),
+    )
+    assert (writer.writes, writer.sent, writer.bursts) == (3, 3, 1)
+    assert daemon.commands[CMD_PWM] == 2
+    assert daemon.commands[CMD_HP] == 1
+    assert daemon.pin(4).duty == 10
+    assert daemon.pin(18).duty == 300_000
+    assert daemon.pin(18).frequency == 25000
+
+
+async def test_newer_write_replaces_a_pending_one(daemon, client) -> None:
+    """Test that only the last duty cycle of a pin in a burst is sent."""
+    writer = WriteScheduler(client)
+    first = writer.queue(4, 10)
+    second = writer.queue(4, 20)
+    await asyncio.gather(first, second)
+    assert (writer.writes, writer.coalesced, writer.sent) == (2, 1, 1)
+    assert daemon.pin(4).duty == 20
+
+
+async def test_failed_burst_fails_every_write(client) -> None:
+    """Test that every write of a burst that cannot be sent gets the error."""
+    writer = WriteScheduler(client)
+    writes = [writer.queue(4, 10), writer.queue(17, 20)]
+    await client.async_close()
+    for write in writes:
+        with pytest.raises(PigpiodError):
+            await write
+    assert writer.bursts == 0